@@ -0,0 +1,59 @@
+"""
+Benchmark the categorical aggregation engine against the pandas groupby path.
+
+Run from the repository root:
+    python -m benchmarks.bench_categorical_aggregation --rows 5000000
+"""
+import argparse
+import time
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from src.lambda_functions.data_processor import (
+    calculate_average_by_category,
+    _groupby_average_by_category
+)
+
+CATEGORIES = ['<1H OCEAN', 'INLAND', 'ISLAND', 'NEAR BAY', 'NEAR OCEAN']
+
+
+def _make_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Build a synthetic frame with object-dtype category strings, as read_csv returns"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'ocean_proximity': np.array(CATEGORIES, dtype=object)[rng.integers(0, len(CATEGORIES), rows)],
+        'median_house_value': rng.uniform(15_000, 500_001, rows)
+    })
+
+def _best_of(func: Callable[[pd.DataFrame], object], df: pd.DataFrame, repeat: int) -> float:
+    """Return the best wall-clock time in seconds over several runs"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[20_640, 1_000_000, 5_000_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'Rows':>12} {'Key dtype':>10} {'groupby (ms)':>14} {'categorical (ms)':>18} {'speedup':>9}")
+    for rows in args.rows:
+        object_df = _make_frame(rows)
+        category_df = object_df.astype({'ocean_proximity': 'category'})
+        for dtype, df in (('object', object_df), ('category', category_df)):
+            groupby_time = _best_of(_groupby_average_by_category, df, args.repeat)
+            categorical_time = _best_of(calculate_average_by_category, df, args.repeat)
+            print(
+                f"{rows:>12,} {dtype:>10} {groupby_time * 1000:>14.2f} {categorical_time * 1000:>18.2f} "
+                f"{groupby_time / categorical_time:>8.2f}x"
+            )
+
+
+if __name__ == '__main__':
+    main()
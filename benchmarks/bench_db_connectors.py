@@ -0,0 +1,93 @@
+"""
+Compare write throughput of the sync RDSConnector with the pooled
+AsyncRDSConnector when flushing the statistics of many files.
+
+Three modes are timed:
+    sync-per-file  one RDSConnector (connection + transaction) per file, as
+                   the Lambda handler does
+    sync-shared    one RDSConnector for all files, one transaction per file
+    async-pool     one AsyncRDSConnector, files flushed concurrently
+
+Needs a reachable Postgres configured through DB_HOST, DB_PORT, DB_NAME,
+DB_USER and DB_PASSWORD (or DB_SECRET_NAME). Rows are written under a
+dedicated report name and deleted afterwards. Run from the repository root:
+    python -m benchmarks.bench_db_connectors --files 200 --categories 5
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List, Tuple
+
+from loguru import logger
+
+from src.lambda_functions.async_db_connector import AsyncRDSConnector
+from src.lambda_functions.db_connector import RDSConnector
+from src.lambda_functions.utils import get_db_credentials
+
+BENCH_REPORT = 'bench_db_connectors'
+
+
+def make_batches(files: int, categories: int) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    stats = [
+        {'category': f'CATEGORY {i}', 'average_value': 100000.0 + i, 'count': 1000 + i}
+        for i in range(categories)
+    ]
+    return [(BENCH_REPORT, stats) for _ in range(files)]
+
+
+def sync_per_file(db_config: Dict[str, str], batches: List[Tuple[str, List[Dict[str, Any]]]]) -> None:
+    for report, stats in batches:
+        with RDSConnector(db_config) as db:
+            db.store_summary_statistics(stats, report=report)
+
+
+def sync_shared(db_config: Dict[str, str], batches: List[Tuple[str, List[Dict[str, Any]]]]) -> None:
+    with RDSConnector(db_config) as db:
+        for report, stats in batches:
+            db.store_summary_statistics(stats, report=report)
+
+
+def async_pool(db_config: Dict[str, str], batches: List[Tuple[str, List[Dict[str, Any]]]], pool_size: int) -> None:
+    async def run() -> None:
+        async with AsyncRDSConnector(db_config, pool_size=pool_size) as db:
+            await db.store_many(batches)
+    asyncio.run(run())
+
+
+def cleanup(db_config: Dict[str, str]) -> None:
+    with RDSConnector(db_config) as db:
+        db.cursor.execute("DELETE FROM housing_summary_statistics WHERE report = %s", (BENCH_REPORT,))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--categories', type=int, default=5, help='rows written per file')
+    parser.add_argument('--pool-size', type=int, default=4)
+    args = parser.parse_args()
+
+    logger.remove()
+    db_config = get_db_credentials()
+    batches = make_batches(args.files, args.categories)
+    rows = args.files * args.categories
+
+    modes = [
+        ('sync-per-file', lambda: sync_per_file(db_config, batches)),
+        ('sync-shared', lambda: sync_shared(db_config, batches)),
+        (f'async-pool({args.pool_size})', lambda: async_pool(db_config, batches, args.pool_size)),
+    ]
+
+    print(f"{args.files} files x {args.categories} rows")
+    print(f"{'Mode':<16} {'Time (s)':>9} {'Files/s':>9} {'Rows/s':>10}")
+    try:
+        for name, run in modes:
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            print(f"{name:<16} {elapsed:>9.3f} {args.files / elapsed:>9.1f} {rows / elapsed:>10.1f}")
+    finally:
+        cleanup(db_config)
+
+
+if __name__ == '__main__':
+    main()
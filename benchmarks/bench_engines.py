@@ -0,0 +1,119 @@
+"""
+Compare the pandas and lite processing engines: cold start, peak memory and
+throughput, and whether each fits the 256/512/1024 MB Lambda memory sizes.
+
+Every measurement runs in a fresh interpreter so imports are cold. Lambda
+allocates CPU in proportion to memory (one full vCPU at 1769 MB), so the
+duration at each memory size is estimated by scaling the local duration by
+that CPU share. Run from the repository root:
+    python -m benchmarks.bench_engines --rows 1000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict
+
+import numpy as np
+
+MEMORY_SIZES_MB = (256, 512, 1024)
+FULL_VCPU_MB = 1769
+CATEGORIES = ['<1H OCEAN', 'INLAND', 'ISLAND', 'NEAR BAY', 'NEAR OCEAN']
+
+CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {src!r})
+from lambda_functions.engines import get_engine
+engine = get_engine({engine!r})
+imported = time.perf_counter()
+engine.process_california_housing_data({path!r})
+done = time.perf_counter()
+# ru_maxrss survives fork+exec on Linux and would report the parent's peak
+try:
+    with open("/proc/self/status") as status:
+        peak_kb = next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+except OSError:
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{
+    "import_s": imported - start,
+    "process_s": done - imported,
+    "peak_rss_mb": peak_kb / 1024,
+    "pandas_loaded": "pandas" in sys.modules
+}}))
+"""
+
+
+def _write_csv(path: str, rows: int, seed: int = 0) -> None:
+    """Write a synthetic housing CSV with all ten columns"""
+    rng = np.random.default_rng(seed)
+    numeric = np.column_stack([
+        rng.uniform(-124.35, -114.31, rows).round(2),
+        rng.uniform(32.54, 41.95, rows).round(2),
+        rng.integers(1, 53, rows),
+        rng.integers(2, 39_320, rows),
+        rng.integers(1, 6_445, rows),
+        rng.integers(3, 35_682, rows),
+        rng.integers(1, 6_082, rows),
+        rng.uniform(0.5, 15.0, rows).round(4),
+        rng.integers(14_999, 500_001, rows),
+    ])
+    categories = np.array(CATEGORIES)[rng.integers(0, len(CATEGORIES), rows)]
+    with open(path, 'w') as csv_file:
+        csv_file.write(
+            "longitude,latitude,housing_median_age,total_rooms,total_bedrooms,population,"
+            "households,median_income,median_house_value,ocean_proximity\n"
+        )
+        for start in range(0, rows, 100_000):
+            block = numeric[start:start + 100_000]
+            lines = (
+                ",".join(map(str, values)) + "," + category + "\n"
+                for values, category in zip(block.tolist(), categories[start:start + 100_000])
+            )
+            csv_file.writelines(lines)
+
+def _measure(engine: str, path: str) -> Dict[str, Any]:
+    """Run one engine in a fresh interpreter and return its measurements"""
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+    env = dict(os.environ, LOGURU_LEVEL='WARNING')
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD.format(src=src, engine=engine, path=path)],
+        check=True, capture_output=True, text=True, env=env
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'housing.csv')
+        _write_csv(path, args.rows)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"Input: {args.rows:,} rows, {size_mb:.1f} MB\n")
+
+        header = f"{'Engine':<8} {'Import (s)':>10} {'Process (s)':>11} {'Rows/s':>12} {'Peak RSS (MB)':>14} {'pandas':>7}"
+        header += "".join(f" {f'{mb} MB est. (s)':>16}" for mb in MEMORY_SIZES_MB)
+        print(header)
+        for engine in ('pandas', 'lite'):
+            runs = [_measure(engine, path) for _ in range(args.repeat)]
+            best = min(runs, key=lambda run: run['import_s'] + run['process_s'])
+            peak = max(run['peak_rss_mb'] for run in runs)
+            total = best['import_s'] + best['process_s']
+
+            line = (
+                f"{engine:<8} {best['import_s']:>10.3f} {best['process_s']:>11.3f} "
+                f"{args.rows / best['process_s']:>12,.0f} {peak:>14.1f} {str(best['pandas_loaded']):>7}"
+            )
+            for mb in MEMORY_SIZES_MB:
+                estimate = "OOM" if peak > mb else f"{total / min(1.0, mb / FULL_VCPU_MB):.2f}"
+                line += f" {estimate:>16}"
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
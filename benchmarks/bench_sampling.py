@@ -0,0 +1,130 @@
+"""
+Compare the approximate (sampled) average-by-category with the exact path:
+latency, bytes read, error against the exact means and how often the
+confidence intervals cover them.
+
+The input is the sample dataset repeated ``--copies`` times, which keeps its
+real row order (rows are grouped by region, the hard case for block
+sampling). Each sample size is run with ``--repeats`` different seeds.
+With ``--s3-uri``, the exact path downloads the object and the approximate
+path uses ranged GETs against it instead of the local file. Run from the
+repository root:
+    python -m benchmarks.bench_sampling --copies 50 --blocks 16 64 256
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import boto3
+import numpy as np
+from loguru import logger
+
+from src.lambda_functions.engines import get_engine
+from src.lambda_functions.sampling import DEFAULT_BLOCK_BYTES, estimate_average_by_category
+
+SAMPLE_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_data', 'housing.csv')
+
+
+def _write_csv(path: str, copies: int) -> None:
+    """Write the sample dataset repeated copies times under one header"""
+    with open(SAMPLE_CSV, 'rb') as sample_file:
+        header = sample_file.readline()
+        body = sample_file.read()
+    if not body.endswith(b'\n'):
+        body += b'\n'
+    with open(path, 'wb') as csv_file:
+        csv_file.write(header)
+        for _ in range(copies):
+            csv_file.write(body)
+
+
+def time_exact(source: str, engine: str, s3_client: Optional[Any]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    if s3_client is not None:
+        bucket, key = source[len('s3://'):].split('/', 1)
+        with tempfile.TemporaryDirectory() as download_dir:
+            path = os.path.join(download_dir, 'exact.csv')
+            s3_client.download_file(bucket, key, path)
+            result = get_engine(engine).process_california_housing_data(path)
+    else:
+        result = get_engine(engine).process_california_housing_data(source)
+    return {'seconds': time.perf_counter() - start, 'result': result}
+
+
+def time_sampled(
+    source: str,
+    blocks: int,
+    block_bytes: int,
+    repeats: int,
+    exact: Dict[str, float],
+    s3_client: Optional[Any]
+) -> Dict[str, float]:
+    seconds: List[float] = []
+    errors: List[float] = []
+    widths: List[float] = []
+    covered = intervals = missing = 0
+    for seed in range(repeats):
+        start = time.perf_counter()
+        result = estimate_average_by_category(source, blocks, block_bytes, s3_client=s3_client, seed=seed)
+        seconds.append(time.perf_counter() - start)
+
+        estimates = {row['category']: row for row in result}
+        missing += len(set(exact) - set(estimates))
+        for category, row in estimates.items():
+            errors.append(abs(row['average_value'] - exact[category]) / exact[category])
+            if not np.isnan(row['ci_low']):
+                intervals += 1
+                covered += row['ci_low'] <= exact[category] <= row['ci_high']
+                widths.append((row['ci_high'] - row['ci_low']) / 2 / exact[category])
+    return {
+        'seconds': float(np.median(seconds)),
+        'mean_error': float(np.mean(errors)),
+        'max_error': float(np.max(errors)),
+        'half_width': float(np.mean(widths)) if widths else float('nan'),
+        'coverage': covered / intervals if intervals else float('nan'),
+        'missing': missing / repeats
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--copies', type=int, default=50, help='copies of the sample data (20,640 rows each)')
+    parser.add_argument('--blocks', type=int, nargs='+', default=[16, 64, 256])
+    parser.add_argument('--block-bytes', type=int, default=DEFAULT_BLOCK_BYTES)
+    parser.add_argument('--repeats', type=int, default=20, help='seeds per sample size')
+    parser.add_argument('--engine', choices=('pandas', 'lite'), default='pandas', help='engine of the exact path')
+    parser.add_argument('--s3-uri', help='s3://bucket/key of an uploaded copy of the generated file')
+    args = parser.parse_args()
+
+    logger.remove()
+    s3_client = boto3.client('s3') if args.s3_uri else None
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'housing.csv')
+        _write_csv(path, args.copies)
+        size = os.path.getsize(path)
+        source = args.s3_uri or path
+
+        exact_run = time_exact(source, args.engine, s3_client)
+        exact = {row['category']: row['average_value'] for row in exact_run['result']}
+
+        print(f"{args.copies * 20_640:,} rows, {size / 2**20:.1f} MiB, source {'S3' if args.s3_uri else 'local'}")
+        print(f"{'Mode':<16} {'Read':>7} {'Time (s)':>9} {'Speedup':>8} {'Mean err':>9} {'Max err':>8} "
+              f"{'CI +/-':>7} {'Coverage':>9} {'Missed':>7}")
+        print(f"{'exact-' + args.engine:<16} {'100%':>7} {exact_run['seconds']:>9.3f} {'1.0x':>8} "
+              f"{'-':>9} {'-':>8} {'-':>7} {'-':>9} {'-':>7}")
+        for blocks in args.blocks:
+            stats = time_sampled(source, blocks, args.block_bytes, args.repeats, exact, s3_client)
+            read = min(1.0, blocks * args.block_bytes / size)
+            print(f"{f'sample({blocks})':<16} {read:>7.1%} {stats['seconds']:>9.3f} "
+                  f"{exact_run['seconds'] / stats['seconds']:>7.1f}x {stats['mean_error']:>9.2%} "
+                  f"{stats['max_error']:>8.2%} {stats['half_width']:>7.2%} {stats['coverage']:>9.1%} "
+                  f"{stats['missing']:>7.2f}")
+        print("err: relative error of the estimated means; CI +/-: mean relative half-width of the intervals;")
+        print("Coverage: share of intervals containing the exact mean; Missed: categories absent per sample")
+
+
+if __name__ == '__main__':
+    main()
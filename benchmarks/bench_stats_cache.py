@@ -0,0 +1,36 @@
+"""
+Measure read latency of the cached statistics API for cache hits and misses.
+
+Needs a reachable Postgres configured through DB_HOST, DB_PORT, DB_NAME,
+DB_USER and DB_PASSWORD (or DB_SECRET_NAME). Run from the repository root:
+    python -m benchmarks.bench_stats_cache --reads 10000 --write-every 100
+"""
+import argparse
+
+from src.lambda_functions.db_connector import bump_statistics_version
+from src.lambda_functions.stats_api import StatisticsReader
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reads', type=int, default=10_000)
+    parser.add_argument('--write-every', type=int, default=100,
+                        help='bump the statistics version every N reads to force a miss')
+    args = parser.parse_args()
+
+    reader = StatisticsReader()
+    for i in range(args.reads):
+        if args.write_every and i and i % args.write_every == 0:
+            bump_statistics_version()
+        reader.query_latest_statistics()
+
+    print(f"{'Kind':<6} {'Count':>8} {'Mean (ms)':>10} {'p50 (ms)':>10} {'Max (ms)':>10}")
+    for kind, stats in reader.latency_stats().items():
+        print(
+            f"{kind:<6} {stats['count']:>8} {stats['mean_ms']:>10.3f} "
+            f"{stats['p50_ms']:>10.3f} {stats['max_ms']:>10.3f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
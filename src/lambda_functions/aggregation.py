@@ -0,0 +1,442 @@
+"""
+Sort-free aggregation engine for low-cardinality categorical keys.
+
+Keys are mapped to small integer codes through a dictionary that persists
+across chunks and files, and sums/counts are accumulated with ``np.bincount``
+into fixed-size arrays indexed by code. This module does not depend on pandas
+so that it can be shared by every processing engine.
+
+Declarative reports (``AggregationSpec``) are evaluated on top of the same
+machinery: every group-by key becomes an integer code column, the codes of
+several keys are combined into one mixed-radix code, and sums and counts are
+taken with a single ``np.bincount`` per report. Columns, derived features and
+key codes are computed once per batch and shared by all reports.
+"""
+import numpy as np
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Protocol, Sequence, Tuple
+
+from .results import SummaryTable
+from .settings import AggregationSpec, GroupKey
+
+# Above this many distinct keys the generic pandas groupby path is used instead
+LOW_CARDINALITY_THRESHOLD = 64
+
+# Largest combined key space aggregated with dense bincount arrays
+DENSE_KEY_SPACE_LIMIT = 1 << 20
+
+# Derived numeric features: name -> (input columns, function of those columns)
+DERIVED_FEATURES: Dict[str, Tuple[Tuple[str, ...], Callable[..., np.ndarray]]] = {
+    'rooms_per_household': (('total_rooms', 'households'), np.divide),
+    'bedrooms_per_room': (('total_bedrooms', 'total_rooms'), np.divide),
+    'population_per_household': (('population', 'households'), np.divide),
+}
+
+
+class CategoricalAggregator:
+    """
+    Accumulate per-category sums and counts using integer codes.
+
+    The aggregator is fed with already-factorized data: an array of unique
+    keys for the current batch and an array of local codes pointing into it.
+    Local codes are remapped to global codes so the same aggregator can be
+    updated with any number of chunks or files.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty aggregator.
+        """
+        self.codes: Dict[Hashable, int] = {}
+        self.sums = np.zeros(0, dtype=np.float64)
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        """
+        Number of distinct categories seen so far.
+        """
+        return len(self.codes)
+
+    def update(self, uniques: Sequence[Hashable], local_codes: np.ndarray, values: np.ndarray) -> None:
+        """
+        Add a factorized batch of values to the running aggregates.
+
+        Args:
+            uniques: Distinct keys of the batch, indexed by local code
+            local_codes: Integer code per row; negative codes (nulls) are ignored
+            values: Numeric value per row, aligned with local_codes
+        """
+        local_codes = np.asarray(local_codes)
+        values = np.asarray(values, dtype=np.float64)
+
+        valid = local_codes >= 0
+        if not valid.all():
+            local_codes = local_codes[valid]
+            values = values[valid]
+
+        # Translate local codes into global codes; only len(uniques) dict lookups
+        mapping = np.fromiter(
+            (self._code_for(key) for key in uniques),
+            dtype=np.int64,
+            count=len(uniques)
+        )
+        size = len(self.codes)
+        self._grow(size)
+
+        global_codes = mapping[local_codes]
+        self.sums += np.bincount(global_codes, weights=values, minlength=size)
+        self.counts += np.bincount(global_codes, minlength=size)
+
+    def add(self, keys: Sequence[Hashable], sums: np.ndarray, counts: np.ndarray) -> None:
+        """
+        Add pre-aggregated partial sums and counts.
+
+        Args:
+            keys: Distinct keys of the partials
+            sums: Sum of values per key
+            counts: Number of values per key
+        """
+        mapping = np.fromiter((self._code_for(key) for key in keys), dtype=np.int64, count=len(keys))
+        self._grow(len(self.codes))
+
+        np.add.at(self.sums, mapping, np.asarray(sums, dtype=np.float64))
+        np.add.at(self.counts, mapping, np.asarray(counts, dtype=np.int64))
+
+    def merge(self, other: 'CategoricalAggregator') -> None:
+        """
+        Merge the aggregates of another aggregator into this one.
+
+        Args:
+            other: Aggregator whose sums and counts should be added
+        """
+        keys = list(other.codes)
+        mapping = np.fromiter((self._code_for(key) for key in keys), dtype=np.int64, count=len(keys))
+        self._grow(len(self.codes))
+
+        other_codes = np.fromiter((other.codes[key] for key in keys), dtype=np.int64, count=len(keys))
+        np.add.at(self.sums, mapping, other.sums[other_codes])
+        np.add.at(self.counts, mapping, other.counts[other_codes])
+
+    def results(self) -> SummaryTable:
+        """
+        Build the summary statistics for all categories seen so far.
+
+        Returns:
+            Table with category, average value and count, ordered by
+            category like a pandas groupby
+        """
+        keys = sorted(self.codes)
+        codes = np.fromiter((self.codes[key] for key in keys), dtype=np.int64, count=len(keys))
+        counts = self.counts[codes]
+        present = counts > 0
+
+        return SummaryTable(
+            np.fromiter(keys, dtype=object, count=len(keys))[present],
+            self.sums[codes][present] / counts[present],
+            counts[present]
+        )
+
+    def _code_for(self, key: Hashable) -> int:
+        """
+        Return the global code of a key, assigning a new one if needed.
+        """
+        code = self.codes.get(key)
+        if code is None:
+            code = len(self.codes)
+            self.codes[key] = code
+        return code
+
+    def _grow(self, size: int) -> None:
+        """
+        Extend the accumulator arrays to hold ``size`` categories.
+        """
+        missing = size - len(self.sums)
+        if missing > 0:
+            self.sums = np.concatenate([self.sums, np.zeros(missing, dtype=np.float64)])
+            self.counts = np.concatenate([self.counts, np.zeros(missing, dtype=np.int64)])
+
+
+class ColumnSource(Protocol):
+    """
+    Column access used by the report engine, implemented by each processing engine.
+    """
+
+    def numeric(self, name: str) -> np.ndarray:
+        """
+        Return a column as float64 with NaN for nulls.
+        """
+        ...
+
+    def categorical(self, name: str) -> Tuple[np.ndarray, Sequence[str]]:
+        """
+        Return a column as (codes, categories) with code -1 for nulls.
+        """
+        ...
+
+    def isnull(self, name: str) -> np.ndarray:
+        """
+        Return a boolean mask of the null values of a column.
+        """
+        ...
+
+
+def spec_columns(specs: Iterable[AggregationSpec]) -> List[str]:
+    """
+    List the input columns needed to evaluate a set of reports.
+
+    Args:
+        specs: Report specifications
+
+    Returns:
+        Column names, with derived features expanded to their inputs
+    """
+    columns: Dict[str, None] = {}
+    for spec in specs:
+        for name in [key.column for key in spec.group_by] + [spec.metric]:
+            inputs = DERIVED_FEATURES[name][0] if name in DERIVED_FEATURES else (name,)
+            columns.update(dict.fromkeys(inputs))
+    return list(columns)
+
+
+class CachedColumns:
+    """
+    Memoized numeric columns, derived features and key codes for one batch.
+    """
+
+    def __init__(self, source: ColumnSource):
+        """
+        Initialize the cache.
+
+        Args:
+            source: Engine-specific column access for the batch
+        """
+        self.source = source
+        self._numeric: Dict[str, np.ndarray] = {}
+        self._keys: Dict[Tuple[str, Any], Tuple[np.ndarray, List[str]]] = {}
+
+    def select(self, mask: np.ndarray) -> 'CachedColumns':
+        """
+        Keep only the rows selected by a boolean mask.
+
+        Columns that were already converted are filtered rather than converted
+        again; the others are filtered when first requested.
+
+        Args:
+            mask: Boolean mask of the rows to keep
+
+        Returns:
+            Cached columns of the selected rows
+        """
+        selected = CachedColumns(_MaskedSource(self.source, mask))
+        selected._numeric = {name: values[mask] for name, values in self._numeric.items()}
+        return selected
+
+    def isnull(self, name: str) -> np.ndarray:
+        """
+        Return a boolean mask of the null values of a raw column.
+        """
+        if name in self._numeric and name not in DERIVED_FEATURES:
+            return np.isnan(self._numeric[name])
+        return self.source.isnull(name)
+
+    def numeric(self, name: str) -> np.ndarray:
+        """
+        Return a raw or derived numeric column; non-finite values become NaN.
+        """
+        if name not in self._numeric:
+            if name in DERIVED_FEATURES:
+                inputs, func = DERIVED_FEATURES[name]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    values = func(*(self.numeric(column) for column in inputs))
+                values[~np.isfinite(values)] = np.nan
+            else:
+                values = self.source.numeric(name)
+            self._numeric[name] = values
+        return self._numeric[name]
+
+    def key_codes(self, key: GroupKey) -> Tuple[np.ndarray, List[str]]:
+        """
+        Return integer codes and their labels for a group-by key.
+
+        Codes follow the label order (sorted categories, or bins by edge);
+        rows with a null or out-of-range value get code -1.
+        """
+        cache_key = (key.column, tuple(key.bins) if key.bins else None)
+        if cache_key not in self._keys:
+            if key.bins:
+                self._keys[cache_key] = self._bin_codes(key.column, key.bins)
+            else:
+                self._keys[cache_key] = self._category_codes(key.column)
+        return self._keys[cache_key]
+
+    def _bin_codes(self, column: str, edges: List[float]) -> Tuple[np.ndarray, List[str]]:
+        values = self.numeric(column)
+        codes = np.searchsorted(np.asarray(edges, dtype=np.float64), values, side='right') - 1
+        codes[(codes >= len(edges) - 1) | np.isnan(values)] = -1
+        return codes.astype(np.int64), bin_labels(edges)
+
+    def _category_codes(self, column: str) -> Tuple[np.ndarray, List[str]]:
+        codes, categories = self.source.categorical(column)
+        labels = key_labels(categories)
+        order = np.argsort(np.asarray(labels, dtype=object), kind='stable')
+        rank = np.empty(len(labels) + 1, dtype=np.int64)
+        rank[order] = np.arange(len(labels))
+        rank[-1] = -1
+        # Index -1 maps null codes onto the trailing -1 entry
+        return rank[np.asarray(codes, dtype=np.int64)], [labels[i] for i in order]
+
+
+class _MaskedSource:
+    """
+    Row-filtered view of a column source.
+    """
+
+    def __init__(self, source: ColumnSource, mask: np.ndarray):
+        self.source = source
+        self.mask = mask
+
+    def numeric(self, name: str) -> np.ndarray:
+        return self.source.numeric(name)[self.mask]
+
+    def categorical(self, name: str) -> Tuple[np.ndarray, Sequence[str]]:
+        codes, categories = self.source.categorical(name)
+        return np.asarray(codes)[self.mask], categories
+
+    def isnull(self, name: str) -> np.ndarray:
+        return self.source.isnull(name)[self.mask]
+
+
+def key_labels(categories: Sequence[Any]) -> List[str]:
+    """
+    Labels of the categories of a group-by key.
+
+    Numeric keys are labelled the same whichever engine parsed them: pandas
+    yields 41.0 for a numeric column with nulls, the lite engine the text
+    "41" or "41.0" from the file, and all of them become "41".
+    """
+    try:
+        numbers = [float(category) for category in categories]
+    except (TypeError, ValueError):
+        return [str(category) for category in categories]
+    return [str(int(number)) if number.is_integer() else repr(number) for number in numbers]
+
+def bin_labels(edges: List[float]) -> List[str]:
+    """
+    Labels of the half-open bins defined by increasing edges.
+    """
+    return [f"[{lo:g}, {hi:g})" for lo, hi in zip(edges, edges[1:])]
+
+
+class SpecAggregator:
+    """
+    Accumulate one report over any number of batches.
+    """
+
+    def __init__(self, spec: AggregationSpec):
+        """
+        Initialize the aggregator.
+
+        Args:
+            spec: Report specification
+        """
+        self.spec = spec
+        # Rows left out of this report per reason: "required:<column>" for
+        # nulls in a column it uses, "out_of_range:<column>" for binned values
+        # outside every edge
+        self.skipped: Dict[str, int] = {}
+        self._aggregator = CategoricalAggregator()
+        # Bin labels sort by edge, not alphabetically
+        self._bin_rank = [
+            {label: i for i, label in enumerate(bin_labels(key.bins))} if key.bins else None
+            for key in spec.group_by
+        ]
+
+    def update(self, columns: CachedColumns) -> None:
+        """
+        Add a batch to the report.
+
+        Args:
+            columns: Cached columns of the batch
+        """
+        key_codes = [columns.key_codes(key) for key in self.spec.group_by]
+        values = columns.numeric(self.spec.metric)
+
+        sizes = [max(len(labels), 1) for _, labels in key_codes]
+        combined = np.zeros(len(values), dtype=np.int64)
+        valid = ~np.isnan(values)
+        self._count_skipped(f"required:{self.spec.metric}", ~valid)
+        for key, (codes, _), size in zip(self.spec.group_by, key_codes, sizes):
+            combined = combined * size + codes
+            valid &= codes >= 0
+            if key.bins:
+                null = np.isnan(columns.numeric(key.column))
+                self._count_skipped(f"out_of_range:{key.column}", (codes < 0) & ~null)
+            else:
+                null = codes < 0
+            self._count_skipped(f"required:{key.column}", null)
+
+        combined = combined[valid]
+        values = values[valid]
+        space = int(np.prod(sizes, dtype=np.float64))
+
+        if space <= DENSE_KEY_SPACE_LIMIT:
+            counts = np.bincount(combined, minlength=space)
+            sums = np.bincount(combined, weights=values, minlength=space)
+            present = np.flatnonzero(counts)
+            counts, sums = counts[present], sums[present]
+        else:
+            present, inverse = np.unique(combined, return_inverse=True)
+            counts = np.bincount(inverse, minlength=len(present))
+            sums = np.bincount(inverse, weights=values, minlength=len(present))
+
+        positions = np.unravel_index(present, sizes)
+        label_columns = [
+            [labels[i] for i in position] for (_, labels), position in zip(key_codes, positions)
+        ]
+        self._aggregator.add(list(zip(*label_columns)), sums, counts)
+
+    def results(self) -> SummaryTable:
+        """
+        Build the report rows.
+
+        Returns:
+            Table with category (labels joined by " | "), keys (label column
+            per group-by column), average value and count, ordered by key
+        """
+        aggregator = self._aggregator
+        names = [f"{key.column}_bin" if key.bins else key.column for key in self.spec.group_by]
+
+        ordered = sorted(aggregator.codes, key=self._sort_key)
+        codes = np.fromiter((aggregator.codes[labels] for labels in ordered), dtype=np.int64, count=len(ordered))
+        counts = aggregator.counts[codes]
+        label_columns = list(zip(*ordered)) if ordered else [()] * len(names)
+
+        return SummaryTable(
+            [" | ".join(labels) for labels in ordered],
+            aggregator.sums[codes] / counts,
+            counts,
+            keys=dict(zip(names, label_columns))
+        )
+
+    def _count_skipped(self, label: str, mask: np.ndarray) -> None:
+        self.skipped[label] = self.skipped.get(label, 0) + int(np.count_nonzero(mask))
+
+    def _sort_key(self, labels: Tuple[str, ...]) -> Tuple[Any, ...]:
+        return tuple(rank[label] if rank else label for label, rank in zip(labels, self._bin_rank))
+
+
+def run_aggregations(source: ColumnSource, specs: Sequence[AggregationSpec]) -> Dict[str, SummaryTable]:
+    """
+    Evaluate several reports over one batch of data.
+
+    Args:
+        source: Engine-specific column access for the batch
+        specs: Report specifications
+
+    Returns:
+        Report rows keyed by report name
+    """
+    aggregators = [SpecAggregator(spec) for spec in specs]
+    columns = CachedColumns(source)
+    for aggregator in aggregators:
+        aggregator.update(columns)
+    return {aggregator.spec.name: aggregator.results() for aggregator in aggregators}
@@ -0,0 +1,244 @@
+"""
+Asynchronous database connector for bulk writes to RDS PostgreSQL.
+
+``AsyncRDSConnector`` mirrors ``RDSConnector`` (``store_summary_statistics``
+and ``query_latest_statistics``) on top of a small asyncpg connection pool,
+so a backfill can flush the statistics of many files concurrently instead of
+one blocking transaction after another. Each ``store_summary_statistics`` call
+is one transaction on its own pooled connection and copies the table's columns
+with a single binary COPY.
+"""
+import os
+import asyncio
+from datetime import datetime
+from itertools import repeat
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import asyncpg
+from loguru import logger
+
+from .db_connector import (
+    COPY_COLUMNS,
+    DELETE_EXPIRED_QUERY,
+    LATEST_STATISTICS_QUERY,
+    MIGRATE_SCHEMA_QUERY,
+    PROVISIONAL_TTL,
+    REPLACE_SOURCE_QUERY,
+    SCHEMA_COLUMNS_QUERY,
+    SCHEMA_INDEXES_QUERY,
+    bump_statistics_version,
+    mark_schema_checked,
+    optional_column,
+    random_uuid_column,
+    schema_checked,
+    schema_is_current
+)
+from .results import SummaryTable
+from .settings import DEFAULT_REPORT
+
+DEFAULT_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "4"))
+
+
+class AsyncRDSConnector:
+    """
+    An asyncio counterpart of RDSConnector backed by a connection pool.
+    """
+
+    def __init__(self, db_config: Dict[str, str], pool_size: int = DEFAULT_POOL_SIZE):
+        """
+        Initialize the connector with database configuration.
+
+        Args:
+            db_config: Dictionary containing database connection parameters
+                       (host, port, dbname, username, password)
+            pool_size: Maximum number of pooled connections, i.e. the number
+                       of writes in flight at once
+        """
+        self.db_config = db_config
+        self.pool_size = pool_size
+        self.pool: Optional[asyncpg.Pool] = None
+
+    async def __aenter__(self) -> 'AsyncRDSConnector':
+        """
+        Async context manager entry method - opens the connection pool.
+
+        Returns:
+            Self reference for context manager
+        """
+        try:
+            logger.info(
+                f"Opening pool of {self.pool_size} connections to "
+                f"{self.db_config['host']}:{self.db_config['port']}"
+            )
+            self.pool = await asyncpg.create_pool(
+                host=self.db_config['host'],
+                port=int(self.db_config['port']),
+                database=self.db_config['dbname'],
+                user=self.db_config['username'],
+                password=self.db_config['password'],
+                min_size=1,
+                max_size=self.pool_size
+            )
+
+            # Ensure the required table exists
+            await self._ensure_table_exists()
+
+            return self
+        except Exception as e:
+            logger.error(f"Error connecting to database: {str(e)}")
+            raise
+
+    async def __aexit__(self, exc_type: Optional[type], exc_val: Optional[Exception], exc_tb: Optional[Any]) -> None:
+        """
+        Async context manager exit method - closes the connection pool.
+
+        Writes are committed per call, so there is nothing to roll back here.
+
+        Args:
+            exc_type: Exception type if an exception was raised
+            exc_val: Exception value if an exception was raised
+            exc_tb: Exception traceback if an exception was raised
+        """
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+
+    async def _ensure_table_exists(self) -> None:
+        """
+        Ensure that the necessary tables exist in the database.
+        Creates or migrates them once per process, and only if the catalog
+        shows they are missing or out of date.
+        """
+        if not self.pool:
+            raise RuntimeError("Database connection not established")
+
+        if schema_checked(self.db_config):
+            return
+
+        async with self.pool.acquire() as conn:
+            columns = [tuple(row) for row in await conn.fetch(SCHEMA_COLUMNS_QUERY)]
+            indexes = [row[0] for row in await conn.fetch(SCHEMA_INDEXES_QUERY)]
+            if not schema_is_current(columns, indexes):
+                # One transaction, so the advisory lock is held until the end
+                async with conn.transaction():
+                    await conn.execute(MIGRATE_SCHEMA_QUERY)
+                logger.info("Created or migrated database table")
+        mark_schema_checked(self.db_config)
+        logger.info("Ensured database table exists")
+
+    async def store_summary_statistics(
+        self,
+        summary_stats: Union[SummaryTable, Sequence[Mapping[str, Any]]],
+        report: str = DEFAULT_REPORT,
+        provisional: bool = False,
+        processed_at: Optional[datetime] = None,
+        source: Optional[str] = None
+    ) -> None:
+        """
+        Store summary statistics in the database in one transaction.
+
+        As with RDSConnector.store_many, storing exact statistics with a
+        source replaces that source's earlier rows of the report in the same
+        transaction, and expired provisional rows are deleted too.
+
+        Args:
+            summary_stats: Table (or dictionaries) of summary statistics
+                          (category, average_value, count)
+            report: Name of the report the statistics belong to
+            provisional: Whether the statistics are approximate results
+            processed_at: Time the statistics are stamped with (naive UTC);
+                          defaults to now
+            source: File the statistics were computed from, e.g. its S3 URI
+        """
+        if not self.pool:
+            raise RuntimeError("Database connection not established")
+
+        now = datetime.utcnow()
+        table = SummaryTable.from_rows(summary_stats)
+        records = zip(
+            random_uuid_column(len(table)).tolist(),
+            repeat(report),
+            table.column('category'),
+            table.column('average_value').tolist(),
+            table.column('count').tolist(),
+            repeat(processed_at or now),
+            repeat(provisional),
+            optional_column(table, 'ci_low'),
+            optional_column(table, 'ci_high'),
+            optional_column(table, 'sample_size'),
+            repeat(source)
+        )
+
+        async with self.pool.acquire() as conn, conn.transaction():
+            if source is not None and not provisional:
+                await conn.execute(REPLACE_SOURCE_QUERY.format(sources="$1", reports="$2"), [source], [report])
+            await conn.copy_records_to_table('housing_summary_statistics', records=records, columns=COPY_COLUMNS)
+            await conn.execute(DELETE_EXPIRED_QUERY.format(expired_before="$1"), now - PROVISIONAL_TTL)
+
+        bump_statistics_version()
+        logger.info(f"Stored {len(table)} records in the database")
+
+    async def store_many(
+        self,
+        batches: Iterable[Union[
+            Tuple[str, Union[SummaryTable, Sequence[Mapping[str, Any]]]],
+            Tuple[str, Union[SummaryTable, Sequence[Mapping[str, Any]]], datetime],
+            Tuple[str, Union[SummaryTable, Sequence[Mapping[str, Any]]], datetime, str]
+        ]],
+        provisional: bool = False,
+        source: Optional[str] = None
+    ) -> None:
+        """
+        Store several reports concurrently, at most pool_size at a time.
+
+        Each batch is committed on its own; if any batch fails, the others
+        are still awaited and the first error is raised afterwards.
+
+        Args:
+            batches: Tuples of (report name, summary statistics), optionally
+                     followed by the batch's processed_at and source, e.g.
+                     the reports of many processed files
+            provisional: Whether the statistics are approximate results
+            source: File the statistics were computed from, for batches
+                    that do not carry their own
+        """
+        # The pool queues acquires past its size too, but the semaphore keeps
+        # the limit independent of how the pool was configured
+        limit = asyncio.Semaphore(self.pool_size)
+
+        async def store(
+            report: str,
+            stats: Union[SummaryTable, Sequence[Mapping[str, Any]]],
+            processed_at: Optional[datetime] = None,
+            batch_source: Optional[str] = None
+        ) -> None:
+            async with limit:
+                await self.store_summary_statistics(stats, report, provisional, processed_at, batch_source or source)
+
+        results = await asyncio.gather(
+            *(store(*batch) for batch in batches),
+            return_exceptions=True
+        )
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            logger.error(f"{len(errors)} of {len(results)} batches failed to store")
+            raise errors[0]
+
+    async def query_latest_statistics(self, report: str = DEFAULT_REPORT) -> List[Tuple[Any, ...]]:
+        """
+        Query the latest statistics for each category of a report.
+
+        Args:
+            report: Name of the report to query
+
+        Returns:
+            List of tuples of (category, average_value, record_count,
+            processed_at, provisional)
+        """
+        if not self.pool:
+            raise RuntimeError("Database connection not established")
+
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(LATEST_STATISTICS_QUERY.format(report="$1"), report)
+
+        return [tuple(row) for row in rows]
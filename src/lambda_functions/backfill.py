@@ -0,0 +1,374 @@
+"""
+Backfill runner that reprocesses historical files without re-uploading them.
+
+Lists an S3 prefix (``s3://bucket/prefix``) or local files and directories,
+runs the configured reports over every CSV file in a bounded pool of worker
+processes or threads, and writes the results to RDS in large bulk batches
+through ``RDSConnector.store_many``. Results are stored in source order and
+stamped with the time each file was last modified (S3 LastModified or the
+local mtime) rather than the time of the backfill, so reprocessed history
+never shadows newer live results. Each file's results replace its earlier
+rows, from the upload or an earlier backfill, so a file processed again
+(after an aggregation change, or after a crash between a commit and the
+checkpoint write) keeps one set of results. A file is recorded in the
+checkpoint file once the batch holding its results is committed, so an
+interrupted backfill resumes where it stopped.
+
+Run from the ``src`` directory:
+    python -m lambda_functions.backfill s3://housing-data/2024/ --workers 8
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import tempfile
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import boto3
+from loguru import logger
+
+from .db_connector import RDSConnector
+from .engines import process_configured_reports
+from .local_runner import resolve_files
+from .quality import QualityReport
+from .results import SummaryTable
+from .s3_backend import split_s3_uri
+from .utils import get_db_credentials
+
+DEFAULT_CHECKPOINT = "backfill-checkpoint.jsonl"
+
+# Statistics rows buffered before they are written in one transaction
+DEFAULT_BATCH_ROWS = 5000
+
+
+class Checkpoint:
+    """
+    Append-only record of the files whose results are committed.
+
+    Each line is a JSON object with the source of one completed file, so a
+    partially written last line is the worst a crash can leave behind.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the checkpoint.
+
+        Args:
+            path: Checkpoint file; created on the first record
+        """
+        self.path = path
+
+    def completed(self) -> Set[str]:
+        """
+        Read the sources completed by earlier runs.
+
+        Returns:
+            Set of completed sources
+        """
+        if not os.path.exists(self.path):
+            return set()
+
+        completed = set()
+        with open(self.path) as checkpoint_file:
+            for line in checkpoint_file:
+                try:
+                    completed.add(json.loads(line)["source"])
+                except (ValueError, KeyError):
+                    logger.warning(f"Ignoring malformed checkpoint line: {line.strip()}")
+        return completed
+
+    def record(self, sources: Sequence[str]) -> None:
+        """
+        Durably mark sources as completed.
+
+        Args:
+            sources: Sources whose results were committed
+        """
+        with open(self.path, "a") as checkpoint_file:
+            checkpoint_file.writelines(json.dumps({"source": source}) + "\n" for source in sources)
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+
+
+def list_sources(paths: Sequence[str]) -> List[str]:
+    """
+    Expand S3 prefixes, local files, directories and glob patterns into a
+    sorted list of CSV sources.
+
+    Args:
+        paths: ``s3://bucket/prefix`` URIs or local paths
+
+    Returns:
+        S3 URIs and absolute local paths of the CSV files
+
+    Raises:
+        FileNotFoundError: If nothing matches
+    """
+    sources = []
+    local_paths = []
+    for path in paths:
+        if path.startswith("s3://"):
+            sources.extend(_list_s3_prefix(path))
+        else:
+            local_paths.append(path)
+
+    if local_paths:
+        sources.extend(resolve_files(local_paths))
+
+    if not sources:
+        raise FileNotFoundError(f"No input files found for: {', '.join(paths)}")
+
+    return sorted(set(sources))
+
+def _list_s3_prefix(uri: str) -> List[str]:
+    """
+    List the CSV objects under an S3 prefix.
+
+    Args:
+        uri: ``s3://bucket/prefix`` URI
+
+    Returns:
+        S3 URIs of the CSV objects
+    """
+    bucket, prefix = split_s3_uri(uri)
+    paginator = boto3.client("s3").get_paginator("list_objects_v2")
+
+    sources = []
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for item in page.get("Contents", []):
+            if item["Key"].endswith(".csv"):
+                sources.append(f"s3://{bucket}/{item['Key']}")
+
+    logger.info(f"Found {len(sources)} CSV objects under {uri}")
+    return sources
+
+# S3 client of the current worker; created on first use
+_s3_client: Optional[Any] = None
+
+
+def process_source(source: str) -> Dict[str, Any]:
+    """
+    Run the configured reports over one file, downloading it first if it is in S3.
+
+    Args:
+        source: S3 URI or local path
+
+    Returns:
+        Dictionary with the source, its reports, the number of input rows,
+        the time the source was last modified (naive UTC), the processing
+        time and the error message if it failed
+    """
+    global _s3_client
+    start = time.perf_counter()
+    quality_report = QualityReport()
+    modified_at = None
+
+    try:
+        if source.startswith("s3://"):
+            bucket, key = split_s3_uri(source)
+            if _s3_client is None:
+                _s3_client = boto3.client("s3")
+            modified_at = _s3_client.head_object(Bucket=bucket, Key=key)["LastModified"]
+            with tempfile.TemporaryDirectory() as download_dir:
+                download_path = os.path.join(download_dir, os.path.basename(key))
+                _s3_client.download_file(bucket, key, download_path)
+                reports = process_configured_reports(download_path, quality_report)
+        else:
+            modified_at = datetime.fromtimestamp(os.path.getmtime(source), timezone.utc)
+            reports = process_configured_reports(source, quality_report)
+        modified_at = modified_at.astimezone(timezone.utc).replace(tzinfo=None)
+        error = None
+    except Exception as e:
+        logger.error(f"Error processing {source}: {str(e)}")
+        reports, error = {}, str(e)
+
+    return {
+        "source": source,
+        "reports": reports,
+        "rows": quality_report.total_rows,
+        "modified_at": modified_at,
+        "seconds": time.perf_counter() - start,
+        "error": error
+    }
+
+def _bounded_map(
+    executor: Executor,
+    func: Callable[[str], Dict[str, Any]],
+    items: Iterable[str],
+    max_in_flight: int
+) -> Iterator[Dict[str, Any]]:
+    """
+    Like executor.map, but with at most max_in_flight tasks submitted and not
+    yet yielded, so results do not pile up for thousands of files. Results
+    are yielded in the order of the items, whichever task finishes first.
+    """
+    items = iter(items)
+    in_flight = deque(executor.submit(func, item) for item in itertools.islice(items, max_in_flight))
+    while in_flight:
+        result = in_flight.popleft().result()
+        in_flight.extend(executor.submit(func, item) for item in itertools.islice(items, 1))
+        yield result
+
+def _init_worker(log_level: str) -> None:
+    """
+    Configure the logging of a worker process.
+    """
+    logger.remove()
+    logger.add(sys.stderr, level=log_level)
+
+def run_backfill(
+    sources: Sequence[str],
+    store: Optional[Callable[[List[Tuple[str, SummaryTable, datetime, str]]], Any]],
+    workers: int = 4,
+    executor: str = "process",
+    checkpoint: Optional[Checkpoint] = None,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    log_level: str = "WARNING"
+) -> Dict[str, Any]:
+    """
+    Process the sources in a bounded pool and store the results in bulk batches.
+
+    Args:
+        sources: S3 URIs or local paths to process
+        store: Callable writing a list of (report, statistics, processed_at,
+               source) tuples in one transaction, replacing the sources'
+               earlier rows, e.g. RDSConnector.store_many; None for a dry run
+        workers: Number of worker processes or threads
+        executor: "process" or "thread"
+        checkpoint: Checkpoint to skip completed sources and record new ones
+        batch_rows: Statistics rows buffered before each write
+        log_level: Log level of worker processes
+
+    Returns:
+        Dictionary with file and row counts, throughput and database time
+    """
+    completed = checkpoint.completed() if checkpoint else set()
+    pending = [source for source in sources if source not in completed]
+    logger.info(f"Backfilling {len(pending)} files ({len(sources) - len(pending)} already completed)")
+
+    batch: List[Tuple[str, SummaryTable, datetime, str]] = []
+    batch_sources: List[str] = []
+    summary: Dict[str, Any] = {
+        "files": 0,
+        "failed": 0,
+        "skipped": len(sources) - len(pending),
+        "rows": 0,
+        "rows_stored": 0,
+        "batches": 0,
+        "db_seconds": 0.0,
+        "error_samples": []
+    }
+
+    def flush() -> None:
+        if batch_sources:
+            if store is not None:
+                start = time.perf_counter()
+                store(list(batch))
+                summary["db_seconds"] += time.perf_counter() - start
+                summary["rows_stored"] += sum(len(stats) for _, stats, _, _ in batch)
+                summary["batches"] += 1
+                if checkpoint:
+                    checkpoint.record(batch_sources)
+            batch.clear()
+            batch_sources.clear()
+
+    if executor == "process":
+        pool: Executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(log_level,))
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers)
+
+    start = time.perf_counter()
+    with pool:
+        for result in _bounded_map(pool, process_source, pending, max_in_flight=2 * workers):
+            if result["error"]:
+                summary["failed"] += 1
+                if len(summary["error_samples"]) < 3:
+                    summary["error_samples"].append(f"{result['source']}: {result['error']}")
+                continue
+
+            summary["files"] += 1
+            summary["rows"] += result["rows"]
+            batch.extend(
+                (report, stats, result["modified_at"], result["source"])
+                for report, stats in result["reports"].items()
+            )
+            batch_sources.append(result["source"])
+            if sum(len(stats) for _, stats, _, _ in batch) >= batch_rows:
+                flush()
+        flush()
+    wall_seconds = time.perf_counter() - start
+
+    summary["wall_seconds"] = wall_seconds
+    summary["files_per_second"] = summary["files"] / wall_seconds if wall_seconds else 0.0
+    summary["rows_per_second"] = summary["rows"] / wall_seconds if wall_seconds else 0.0
+    return summary
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """
+    Format a backfill summary as readable text.
+
+    Args:
+        summary: Dictionary returned by run_backfill()
+
+    Returns:
+        Formatted summary
+    """
+    lines = [
+        "Backfill summary",
+        "-" * 60,
+        f"{'Files processed':<20} {summary['files']:>14,} ({summary['failed']:,} failed, {summary['skipped']:,} skipped)",
+        f"{'Rows processed':<20} {summary['rows']:>14,}",
+        f"{'Rows stored':<20} {summary['rows_stored']:>14,} in {summary['batches']:,} batches",
+        f"{'Wall time (s)':<20} {summary['wall_seconds']:>14.2f}",
+        f"{'Files/sec':<20} {summary['files_per_second']:>14.2f}",
+        f"{'Rows/sec':<20} {summary['rows_per_second']:>14,.0f}",
+        f"{'DB time (s)':<20} {summary['db_seconds']:>14.2f}",
+    ]
+    lines.extend(f"Error: {error}" for error in summary["error_samples"])
+    return "\n".join(lines)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Reprocess historical housing files and bulk-write their statistics.",
+        epilog="Processing follows the HOUSING_* settings; database settings are read from "
+               "DB_SECRET_NAME or DB_HOST, DB_PORT, DB_NAME, DB_USER and DB_PASSWORD."
+    )
+    parser.add_argument("paths", nargs="+", help="s3://bucket/prefix URIs, CSV files, directories or glob patterns")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes or threads")
+    parser.add_argument("--executor", choices=("process", "thread"), default="process")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="file recording completed sources")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS,
+                        help="statistics rows written per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="process without writing or checkpointing")
+    parser.add_argument("--verbose", action="store_true", help="keep per-file logging")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    log_level = "INFO" if args.verbose else "WARNING"
+    _init_worker(log_level)
+
+    sources = list_sources(args.paths)
+    options = dict(
+        workers=args.workers,
+        executor=args.executor,
+        batch_rows=args.batch_rows,
+        log_level=log_level
+    )
+
+    if args.dry_run:
+        summary = run_backfill(sources, store=None, **options)
+    else:
+        with RDSConnector(get_db_credentials()) as db:
+            summary = run_backfill(sources, store=db.store_many, checkpoint=Checkpoint(args.checkpoint), **options)
+
+    print(json.dumps(summary, indent=2) if args.json else format_summary(summary))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
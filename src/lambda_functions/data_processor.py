@@ -1,42 +1,105 @@
 """
 Data processing module for California Housing dataset.
 """
+import numpy as np
 import pandas as pd
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional, Sequence
 from loguru import logger
 
+from .aggregation import (
+    CachedColumns,
+    CategoricalAggregator,
+    SpecAggregator,
+    LOW_CARDINALITY_THRESHOLD,
+    spec_columns
+)
+from .quality import QualityReport, active_rules, apply_quality_rules, log_quality_report
+from .results import SummaryTable
+from .sampling import estimate_average_by_category
+from .settings import AggregationSpec, DEFAULT_AGGREGATIONS, DEFAULT_QUALITY_RULES, QualityRule
+from .spill import SpillingAggregator
 
+# Columns of the average-by-category report
+REQUIRED_COLUMNS = ['median_house_value', 'ocean_proximity']
 
-def process_california_housing_data(file_path: str) -> List[Dict[str, Any]]:
+# Parse the category column straight into codes instead of object strings
+READ_CSV_DTYPES = {'ocean_proximity': 'category'}
+
+# Rows per chunk when a memory budget is set without an explicit chunksize
+SPILL_CHUNKSIZE = 100_000
+
+def process_california_housing_data(
+    file_path: str,
+    chunksize: Optional[int] = None,
+    memory_budget_bytes: Optional[int] = None,
+    spill_dir: Optional[str] = None,
+    quality_rules: Optional[Sequence[QualityRule]] = None,
+    quality_report: Optional[QualityReport] = None,
+    sample_blocks: Optional[int] = None,
+    sample_block_bytes: Optional[int] = None,
+    confidence: Optional[float] = None
+) -> SummaryTable:
     """
     Process California Housing dataset to calculate average median house value
     per ocean_proximity category.
     
     Args:
         file_path: Path to the CSV file containing California Housing data
+        chunksize: If set, read the file in chunks of this many rows and
+                   accumulate the aggregates across chunks
+        memory_budget_bytes: If set, process in chunks and spill sorted runs to
+                             disk whenever buffered rows exceed this size; the
+                             results then also include the exact median_value
+        spill_dir: Directory for spill files (defaults to the temp directory)
+        quality_rules: Range and cap rules applied before aggregation;
+                       defaults to DEFAULT_QUALITY_RULES
+        quality_report: If given, receives the per-rule rejection counts
+        sample_blocks: If set, estimate the averages from this many randomly
+                       placed blocks instead of reading the whole file; the
+                       results then also include ci_low, ci_high and
+                       sample_size (see sampling.estimate_average_by_category)
+        sample_block_bytes: Size of each sampled block
+        confidence: Confidence level of the estimates' intervals
         
     Returns:
-        List of dictionaries with category and average value
+        Table with category, average value and count
         
     Raises:
-        ValueError: If the data is missing required columns
+        ValueError: If the data is missing required columns, or sample_blocks
+                    is combined with chunksize or memory_budget_bytes
         FileNotFoundError: If the file cannot be found
     """
+    if sample_blocks and (chunksize or memory_budget_bytes):
+        raise ValueError("sample_blocks cannot be combined with chunksize or memory_budget_bytes")
+    
     logger.info(f"Processing file: {file_path}")
     
+    rules = DEFAULT_QUALITY_RULES if quality_rules is None else quality_rules
+    report = quality_report if quality_report is not None else QualityReport()
+    
     try:
+        if sample_blocks:
+            return estimate_average_by_category(
+                file_path, sample_blocks, sample_block_bytes, confidence, quality_rules=rules, quality_report=report
+            )
+        
+        if memory_budget_bytes:
+            return _process_with_spill(
+                file_path, chunksize or SPILL_CHUNKSIZE, memory_budget_bytes, spill_dir, rules, report
+            )
+        
+        if chunksize:
+            return _process_in_chunks(file_path, chunksize, rules, report)
+
         # Read the dataset
-        df = pd.read_csv(file_path)
+        df = pd.read_csv(file_path, dtype=READ_CSV_DTYPES)
         
         # Validate required columns exist
         _validate_dataframe(df)
         
-        # Clean data by removing rows with missing values
-        original_size = len(df)
-        df = df.dropna()
-        cleaned_size = len(df)
-        
-        logger.info(f"Removed {original_size - cleaned_size} rows with missing values")
+        # Drop rows with nulls in the required columns or failing a rule
+        df = _apply_quality(df, REQUIRED_COLUMNS, rules, report)
+        log_quality_report(report)
         
         # Calculate average median house value per ocean_proximity category
         result = calculate_average_by_category(df)
@@ -51,17 +114,205 @@ def process_california_housing_data(file_path: str) -> List[Dict[str, Any]]:
         logger.error(f"Error processing data: {str(e)}")
         raise
 
-def _validate_dataframe(df: pd.DataFrame) -> None:
+def _process_in_chunks(
+    file_path: str,
+    chunksize: int,
+    rules: Sequence[QualityRule],
+    report: QualityReport
+) -> SummaryTable:
+    """
+    Process the dataset chunk by chunk, sharing one category dictionary
+    and one set of accumulators across all chunks.
+    
+    Args:
+        file_path: Path to the CSV file containing California Housing data
+        chunksize: Number of rows per chunk
+        rules: Range and cap rules
+        report: Report receiving the rejection counts
+        
+    Returns:
+        Table with category, average value and count
+    """
+    aggregator = CategoricalAggregator()
+    
+    for chunk in pd.read_csv(file_path, chunksize=chunksize, dtype=READ_CSV_DTYPES):
+        _validate_dataframe(chunk)
+        chunk = _apply_quality(chunk, REQUIRED_COLUMNS, rules, report)
+        _accumulate(chunk, aggregator)
+    
+    log_quality_report(report)
+    
+    result = aggregator.results()
+    logger.info(f"Calculated averages for {len(result)} categories")
+    return result
+
+def _process_with_spill(
+    file_path: str,
+    chunksize: int,
+    memory_budget_bytes: int,
+    spill_dir: Optional[str],
+    rules: Sequence[QualityRule],
+    report: QualityReport
+) -> SummaryTable:
+    """
+    Process the dataset chunk by chunk within a memory budget, spilling
+    sorted runs to local disk and merging them at the end.
+    
+    Args:
+        file_path: Path to the CSV file containing California Housing data
+        chunksize: Number of rows per chunk
+        memory_budget_bytes: Size of buffered rows that triggers a spill
+        spill_dir: Directory for spill files
+        rules: Range and cap rules
+        report: Report receiving the rejection counts
+        
+    Returns:
+        Table with category, average value, count and median value
+    """
+    with SpillingAggregator(memory_budget_bytes, spill_dir) as aggregator:
+        for chunk in pd.read_csv(file_path, chunksize=chunksize, dtype=READ_CSV_DTYPES):
+            _validate_dataframe(chunk)
+            chunk = _apply_quality(chunk, REQUIRED_COLUMNS, rules, report)
+            
+            aggregator.update(
+                chunk['ocean_proximity'].to_numpy(dtype=str),
+                chunk['median_house_value'].to_numpy(dtype=np.float64)
+            )
+        
+        log_quality_report(report)
+        
+        result = aggregator.results()
+        logger.info(f"Calculated statistics for {len(result)} categories from {aggregator.spilled_runs} spilled runs")
+        return result
+
+def process_housing_reports(
+    file_path: str,
+    specs: Optional[Sequence[AggregationSpec]] = None,
+    chunksize: Optional[int] = None,
+    quality_rules: Optional[Sequence[QualityRule]] = None,
+    quality_report: Optional[QualityReport] = None
+) -> Dict[str, SummaryTable]:
+    """
+    Evaluate several declarative reports over a single parse of the dataset.
+    
+    Columns, derived features and key codes are computed once per chunk and
+    shared by the quality rules and all reports.
+    
+    Args:
+        file_path: Path to the CSV file containing California Housing data
+        specs: Report specifications; defaults to the average value per
+               ocean_proximity category
+        chunksize: If set, read the file in chunks of this many rows
+        quality_rules: Range and cap rules applied before aggregation;
+                       defaults to DEFAULT_QUALITY_RULES
+        quality_report: If given, receives the per-rule rejection counts
+        
+    Returns:
+        Report rows keyed by report name
+        
+    Raises:
+        ValueError: If the data is missing columns needed by a report
+        FileNotFoundError: If the file cannot be found
+    """
+    specs = list(specs or DEFAULT_AGGREGATIONS)
+    rules = DEFAULT_QUALITY_RULES if quality_rules is None else quality_rules
+    report = quality_report if quality_report is not None else QualityReport()
+    logger.info(f"Processing file: {file_path} for {len(specs)} reports")
+    
+    try:
+        required_columns = spec_columns(specs)
+        aggregators = [SpecAggregator(spec) for spec in specs]
+        
+        if chunksize:
+            chunks = pd.read_csv(file_path, chunksize=chunksize, dtype=READ_CSV_DTYPES)
+        else:
+            chunks = [pd.read_csv(file_path, dtype=READ_CSV_DTYPES)]
+        
+        for chunk in chunks:
+            _validate_dataframe(chunk, required_columns)
+            
+            # The rules and the reports share the converted columns; each
+            # report skips and counts the nulls in its own columns
+            columns = CachedColumns(_FrameColumns(chunk))
+            keep = apply_quality_rules(columns, (), active_rules(rules, chunk.columns), report)
+            if not keep.all():
+                columns = columns.select(keep)
+            
+            for aggregator in aggregators:
+                aggregator.update(columns)
+        
+        for aggregator in aggregators:
+            report.add_report_counts(aggregator.spec.name, aggregator.skipped)
+        log_quality_report(report)
+        
+        reports = {aggregator.spec.name: aggregator.results() for aggregator in aggregators}
+        for name, rows in reports.items():
+            logger.info(f"Calculated {len(rows)} groups for report {name}")
+        return reports
+        
+    except FileNotFoundError:
+        logger.error(f"File not found: {file_path}")
+        raise
+    except Exception as e:
+        logger.error(f"Error processing data: {str(e)}")
+        raise
+
+class _FrameColumns:
+    """
+    Column access to a pandas DataFrame for the report engine.
+    """
+    
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+    
+    def numeric(self, name: str) -> np.ndarray:
+        return self.df[name].to_numpy(dtype=np.float64, na_value=np.nan)
+    
+    def categorical(self, name: str) -> Tuple[np.ndarray, Sequence[str]]:
+        keys = self.df[name]
+        if isinstance(keys.dtype, pd.CategoricalDtype):
+            return keys.cat.codes.to_numpy(), keys.cat.categories
+        return pd.factorize(keys, sort=False)
+    
+    def isnull(self, name: str) -> np.ndarray:
+        return self.df[name].isna().to_numpy()
+
+def _apply_quality(
+    df: pd.DataFrame,
+    required_columns: Sequence[str],
+    rules: Sequence[QualityRule],
+    report: QualityReport
+) -> pd.DataFrame:
+    """
+    Drop the rows with nulls in required columns or failing a reject rule.
+    
+    Args:
+        df: Pandas DataFrame to clean
+        required_columns: Columns that must not be null
+        rules: Range and cap rules
+        report: Report receiving the rejection counts
+        
+    Returns:
+        The DataFrame with the kept rows
+    """
+    columns = CachedColumns(_FrameColumns(df))
+    keep = apply_quality_rules(columns, required_columns, active_rules(rules, df.columns), report)
+    return df if keep.all() else df[keep]
+
+def _validate_dataframe(df: pd.DataFrame, required_columns: Optional[Sequence[str]] = None) -> None:
     """
     Validate that the DataFrame contains the required columns.
     
     Args:
         df: Pandas DataFrame to validate
+        required_columns: Columns to check for; defaults to the columns of
+                          the average-by-category report
         
     Raises:
         ValueError: If required columns are missing
     """
-    required_columns = ['median_house_value', 'ocean_proximity']
+    if required_columns is None:
+        required_columns = REQUIRED_COLUMNS
     
     missing_columns = [col for col in required_columns if col not in df.columns]
     
@@ -70,26 +321,69 @@ def _validate_dataframe(df: pd.DataFrame) -> None:
         logger.error(error_msg)
         raise ValueError(error_msg)
 
-def calculate_average_by_category(df: pd.DataFrame) -> List[Dict[str, Any]]:
+def calculate_average_by_category(df: pd.DataFrame) -> SummaryTable:
     """
     Calculate average median house value per ocean_proximity category.
     
+    Low-cardinality keys are aggregated with the sort-free categorical
+    engine; anything else falls back to a pandas groupby.
+    
     Args:
         df: Pandas DataFrame with housing data
         
     Returns:
-        List of dictionaries with category and average value
+        Table with category, average value and count
     """
-    # Group by ocean_proximity and calculate mean of median_house_value
-    averages = df.groupby('ocean_proximity')['median_house_value'].mean().reset_index()
+    aggregator = CategoricalAggregator()
+    if _accumulate(df, aggregator, max_categories=LOW_CARDINALITY_THRESHOLD):
+        return aggregator.results()
     
-    # Convert to list of dictionaries
-    result = []
-    for _, row in averages.iterrows():
-        result.append({
-            'category': row['ocean_proximity'],
-            'average_value': float(row['median_house_value']),
-            'count': int(df[df['ocean_proximity'] == row['ocean_proximity']].shape[0])
-        })
+    return _groupby_average_by_category(df)
+
+def _accumulate(
+    df: pd.DataFrame,
+    aggregator: CategoricalAggregator,
+    max_categories: Optional[int] = None
+) -> bool:
+    """
+    Factorize the category column once and add the values to an aggregator.
+    
+    Args:
+        df: Pandas DataFrame with housing data
+        aggregator: Aggregator to update
+        max_categories: If set, leave the aggregator untouched when the
+                        data has more distinct categories than this
+        
+    Returns:
+        True if the aggregator was updated
+    """
+    keys = df['ocean_proximity']
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        codes, uniques = keys.cat.codes.to_numpy(), keys.cat.categories
+    else:
+        codes, uniques = pd.factorize(keys, sort=False)
+    if max_categories is not None and len(uniques) > max_categories:
+        return False
+    
+    values = df['median_house_value'].to_numpy(dtype=np.float64)
+    aggregator.update(uniques, codes, values)
+    return True
+
+def _groupby_average_by_category(df: pd.DataFrame) -> SummaryTable:
+    """
+    Calculate average median house value per category with a pandas groupby.
+    
+    Args:
+        df: Pandas DataFrame with housing data
+        
+    Returns:
+        Table with category, average value and count
+    """
+    # Group by ocean_proximity and calculate mean and size of median_house_value
+    averages = df.groupby('ocean_proximity', observed=True)['median_house_value'].agg(['mean', 'count'])
     
-    return result
\ No newline at end of file
+    return SummaryTable(
+        averages.index.to_numpy(dtype=object),
+        averages['mean'].to_numpy(dtype=np.float64),
+        averages['count'].to_numpy(dtype=np.int64)
+    )
\ No newline at end of file
@@ -2,12 +2,228 @@
 Database connector module for interacting with RDS PostgreSQL.
 """
 from loguru import logger
+import io
+import os
+import csv
 import psycopg2
-from typing import Dict, Any, List, Optional, Tuple
-from datetime import datetime
-import uuid
+import threading
+import numpy as np
+from itertools import repeat
+from typing import Dict, Any, Iterable, List, Mapping, Optional, Sequence, Set, Tuple, Union
+from datetime import datetime, timedelta
 from psycopg2.extensions import connection, cursor
 
+from .results import SummaryTable
+from .settings import DEFAULT_REPORT
+
+# Bumped every time statistics are written from this process, so that
+# read-side caches can tell their entries are stale without a DB round-trip
+_statistics_version = 0
+_statistics_version_lock = threading.Lock()
+
+# Databases whose schema this process has checked; see ensure_schema_checked
+_checked_databases: Set[Tuple[str, str, str]] = set()
+
+# Schema and queries shared with AsyncRDSConnector.
+
+# Creates or migrates the table. ALTER TABLE takes an ACCESS EXCLUSIVE lock,
+# so this only runs when SCHEMA_COLUMNS_QUERY and SCHEMA_INDEXES_QUERY show
+# the schema is out of date; the advisory lock keeps concurrent cold starts
+# from migrating at once. DDL cannot take bind parameters, so the default
+# report is inlined as a literal.
+MIGRATE_SCHEMA_QUERY = """
+SELECT pg_advisory_xact_lock(hashtext('housing_summary_statistics'));
+
+CREATE TABLE IF NOT EXISTS housing_summary_statistics (
+    id UUID PRIMARY KEY,
+    category TEXT NOT NULL,
+    average_value NUMERIC NOT NULL,
+    record_count INTEGER NOT NULL,
+    processed_at TIMESTAMP NOT NULL
+);
+
+ALTER TABLE housing_summary_statistics
+    ALTER COLUMN category TYPE TEXT,
+    ADD COLUMN IF NOT EXISTS report VARCHAR(100) NOT NULL DEFAULT '{default_report}',
+    ADD COLUMN IF NOT EXISTS provisional BOOLEAN NOT NULL DEFAULT FALSE,
+    ADD COLUMN IF NOT EXISTS ci_low NUMERIC,
+    ADD COLUMN IF NOT EXISTS ci_high NUMERIC,
+    ADD COLUMN IF NOT EXISTS sample_size INTEGER,
+    ADD COLUMN IF NOT EXISTS source TEXT;
+
+-- Unconstrained, so derived ratios such as bedrooms_per_room (about 0.2) keep
+-- their precision; removing the scale does not rewrite the table
+ALTER TABLE housing_summary_statistics
+    ALTER COLUMN average_value TYPE NUMERIC,
+    ALTER COLUMN ci_low TYPE NUMERIC,
+    ALTER COLUMN ci_high TYPE NUMERIC;
+
+CREATE INDEX IF NOT EXISTS idx_category ON housing_summary_statistics(category);
+CREATE INDEX IF NOT EXISTS idx_report_category ON housing_summary_statistics(report, category);
+CREATE INDEX IF NOT EXISTS idx_source_report ON housing_summary_statistics(source, report);
+CREATE INDEX IF NOT EXISTS idx_provisional ON housing_summary_statistics(processed_at) WHERE provisional;
+""".format(default_report=DEFAULT_REPORT.replace("'", "''"))
+
+SCHEMA_COLUMNS_QUERY = """
+SELECT column_name, data_type, numeric_precision
+FROM information_schema.columns
+WHERE table_schema = current_schema() AND table_name = 'housing_summary_statistics'
+"""
+
+SCHEMA_INDEXES_QUERY = """
+SELECT indexname FROM pg_indexes
+WHERE schemaname = current_schema() AND tablename = 'housing_summary_statistics'
+"""
+
+# (data_type, numeric_precision) of every column after MIGRATE_SCHEMA_QUERY
+SCHEMA_COLUMNS = {
+    'id': ('uuid', None),
+    'category': ('text', None),
+    'average_value': ('numeric', None),
+    'record_count': ('integer', 32),
+    'processed_at': ('timestamp without time zone', None),
+    'report': ('character varying', None),
+    'provisional': ('boolean', None),
+    'ci_low': ('numeric', None),
+    'ci_high': ('numeric', None),
+    'sample_size': ('integer', 32),
+    'source': ('text', None)
+}
+
+SCHEMA_INDEXES = {'idx_category', 'idx_report_category', 'idx_source_report', 'idx_provisional'}
+
+# Columns written by the COPY of both connectors, in order
+COPY_COLUMNS = [
+    'id', 'report', 'category', 'average_value', 'record_count', 'processed_at',
+    'provisional', 'ci_low', 'ci_high', 'sample_size', 'source'
+]
+
+# Provisional rows older than this are deleted on the next write, in case the
+# exact job of their file never stored its results (Lambdas run 15 minutes at most)
+PROVISIONAL_TTL = timedelta(hours=1)
+
+# The queries below are formatted with the driver's placeholders
+
+# Deletes the earlier rows, provisional or exact, of the (source, report)
+# pairs about to be stored, so each file keeps one set of results per report
+REPLACE_SOURCE_QUERY = """
+DELETE FROM housing_summary_statistics h
+USING unnest({sources}::text[], {reports}::text[]) AS r(source, report)
+WHERE h.source = r.source AND h.report = r.report
+"""
+
+DELETE_EXPIRED_QUERY = """
+DELETE FROM housing_summary_statistics WHERE provisional AND processed_at < {expired_before}
+"""
+
+# Files stamped with the same time resolve to the last source, so the result
+# is one row per category
+LATEST_STATISTICS_QUERY = """
+SELECT DISTINCT ON (category)
+    category,
+    average_value,
+    record_count,
+    processed_at,
+    provisional
+FROM
+    housing_summary_statistics
+WHERE
+    report = {report}
+ORDER BY
+    category, processed_at DESC, source DESC NULLS LAST;
+"""
+
+
+def get_statistics_version() -> int:
+    """
+    Get the current version of the statistics written by this process.
+    
+    Returns:
+        Monotonically increasing version counter
+    """
+    return _statistics_version
+
+def bump_statistics_version() -> int:
+    """
+    Increment the statistics version after a write.
+    
+    Returns:
+        The new version counter
+    """
+    global _statistics_version
+    with _statistics_version_lock:
+        _statistics_version += 1
+        return _statistics_version
+
+def schema_is_current(columns: Iterable[Tuple[str, str, Optional[int]]], indexes: Iterable[str]) -> bool:
+    """
+    Check the table's catalog entries against the migrated schema.
+    
+    Args:
+        columns: Rows of SCHEMA_COLUMNS_QUERY
+        indexes: Index names from SCHEMA_INDEXES_QUERY
+        
+    Returns:
+        Whether MIGRATE_SCHEMA_QUERY has nothing to do
+    """
+    found = {name: (data_type, precision) for name, data_type, precision in columns}
+    return all(found.get(name) == column_type for name, column_type in SCHEMA_COLUMNS.items()) \
+        and SCHEMA_INDEXES <= set(indexes)
+
+def schema_checked(db_config: Mapping[str, str]) -> bool:
+    """
+    Whether this process already brought the database's schema up to date,
+    so that warm invocations skip the catalog queries.
+    
+    Args:
+        db_config: Database connection parameters
+    """
+    return (db_config['host'], str(db_config['port']), db_config['dbname']) in _checked_databases
+
+def mark_schema_checked(db_config: Mapping[str, str]) -> None:
+    """
+    Record that the database's schema is up to date; see schema_checked.
+    
+    Args:
+        db_config: Database connection parameters
+    """
+    _checked_databases.add((db_config['host'], str(db_config['port']), db_config['dbname']))
+
+def random_uuid_column(size: int) -> np.ndarray:
+    """
+    Generate random (version 4) UUIDs in bulk.
+    
+    Args:
+        size: Number of UUIDs
+        
+    Returns:
+        Array of UUIDs as 32-character hex strings
+    """
+    raw = np.frombuffer(os.urandom(16 * size), dtype=np.uint8).reshape(size, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    return np.frombuffer(raw.tobytes().hex().encode('ascii'), dtype='S32').astype('U32')
+
+def optional_column(table: SummaryTable, name: str) -> List[Any]:
+    """
+    Values of a column that only some tables have, e.g. the confidence
+    intervals of approximate results, ready to be written.
+    
+    Args:
+        table: Summary statistics
+        name: Column name
+        
+    Returns:
+        The values with NaN as None, or None for every row if the table has
+        no such column
+    """
+    if name not in table.columns:
+        return [None] * len(table)
+    values = table.column(name)
+    if values.dtype.kind == 'f':
+        return [None if np.isnan(value) else value for value in values.tolist()]
+    return values.tolist()
+
 
 class RDSConnector:
     """
@@ -73,100 +289,177 @@ class RDSConnector:
     def _ensure_table_exists(self) -> None:
         """
         Ensure that the necessary tables exist in the database.
-        Creates them if they don't exist.
+        Creates or migrates them once per process, and only if the catalog
+        shows they are missing or out of date.
         """
         if not self.cursor or not self.conn:
             raise RuntimeError("Database connection not established")
-            
-        create_table_query = """
-        CREATE TABLE IF NOT EXISTS housing_summary_statistics (
-            id UUID PRIMARY KEY,
-            category VARCHAR(50) NOT NULL,
-            average_value NUMERIC(12, 2) NOT NULL,
-            record_count INTEGER NOT NULL,
-            processed_at TIMESTAMP NOT NULL
-        );
         
-        CREATE INDEX IF NOT EXISTS idx_category ON housing_summary_statistics(category);
-        """
+        if schema_checked(self.db_config):
+            return
         
-        self.cursor.execute(create_table_query)
+        self.cursor.execute(SCHEMA_COLUMNS_QUERY)
+        columns = self.cursor.fetchall()
+        self.cursor.execute(SCHEMA_INDEXES_QUERY)
+        indexes = [name for name, in self.cursor.fetchall()]
+        if not schema_is_current(columns, indexes):
+            self.cursor.execute(MIGRATE_SCHEMA_QUERY)
+            logger.info("Created or migrated database table")
         self.conn.commit()
+        mark_schema_checked(self.db_config)
         logger.info("Ensured database table exists")
     
-    def store_summary_statistics(self, summary_stats: List[Dict[str, Any]]) -> None:
+    def store_summary_statistics(
+        self,
+        summary_stats: Union[SummaryTable, Sequence[Mapping[str, Any]]],
+        report: str = DEFAULT_REPORT,
+        provisional: bool = False,
+        source: Optional[str] = None
+    ) -> None:
         """
         Store summary statistics in the database.
         
         Args:
-            summary_stats: List of dictionaries containing summary statistics
+            summary_stats: Table (or dictionaries) of summary statistics
                           (category, average_value, count)
+            report: Name of the report the statistics belong to
+            provisional: Whether these are approximate results; see store_many
+            source: File the statistics were computed from; see store_many
+        """
+        self.store_many([(report, summary_stats)], provisional=provisional, source=source)
+    
+    def store_many(
+        self,
+        batches: Iterable[Union[
+            Tuple[str, Union[SummaryTable, Sequence[Mapping[str, Any]]]],
+            Tuple[str, Union[SummaryTable, Sequence[Mapping[str, Any]]], datetime],
+            Tuple[str, Union[SummaryTable, Sequence[Mapping[str, Any]]], datetime, str]
+        ]],
+        provisional: bool = False,
+        source: Optional[str] = None
+    ) -> int:
+        """
+        Store the statistics of many files in one transaction with a single COPY.
+        
+        The columns of each table are streamed into the COPY buffer directly,
+        without building an insert tuple per row. A batch may carry its own
+        processed_at, e.g. the time a backfilled file was last modified;
+        otherwise each batch gets its own, increasing processed_at from now,
+        so that the latest statistics of a report resolve to its last batch
+        rather than a mix of every batch written together.
+        
+        Provisional (approximate) statistics are stored with their confidence
+        intervals and sample sizes. Storing exact statistics with a source
+        replaces the earlier rows of the same source and report in the same
+        transaction: the file's provisional estimates, and its results from
+        an earlier upload or backfill, while other files' rows are left
+        alone. Every write also deletes provisional rows older than
+        PROVISIONAL_TTL.
+        
+        Args:
+            batches: Tuples of (report name, summary statistics), optionally
+                     followed by the batch's processed_at (naive UTC) and
+                     source, e.g. for a backfill of many files
+            provisional: Whether the statistics are approximate results
+            source: File the statistics were computed from, e.g. its S3 URI,
+                    for batches that do not carry their own
+            
+        Returns:
+            Number of rows stored
         """
         if not self.cursor or not self.conn:
             raise RuntimeError("Database connection not established")
-            
+        
         now = datetime.utcnow()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        rows = 0
+        replaced = set()
+        for i, (report, summary_stats, *extra) in enumerate(batches):
+            table = SummaryTable.from_rows(summary_stats)
+            processed_at = (extra[0] if extra else now + timedelta(microseconds=i)).isoformat()
+            batch_source = extra[1] if len(extra) > 1 else source
+            if batch_source is not None and not provisional:
+                replaced.add((batch_source, report))
+            writer.writerows(zip(
+                random_uuid_column(len(table)),
+                repeat(report),
+                table.column('category'),
+                table.column('average_value').tolist(),
+                table.column('count').tolist(),
+                repeat(processed_at),
+                repeat(provisional),
+                optional_column(table, 'ci_low'),
+                optional_column(table, 'ci_high'),
+                optional_column(table, 'sample_size'),
+                repeat(batch_source)
+            ))
+            rows += len(table)
         
-        for stat in summary_stats:
-            insert_query = """
-            INSERT INTO housing_summary_statistics 
-            (id, category, average_value, record_count, processed_at)
-            VALUES (%s, %s, %s, %s, %s)
-            """
-            
-            # Generate a UUID for the record
-            record_id = str(uuid.uuid4())
-            
+        if replaced:
+            sources, reports = zip(*sorted(replaced))
             self.cursor.execute(
-                insert_query,
-                (
-                    record_id,
-                    stat['category'],
-                    stat['average_value'],
-                    stat['count'],
-                    now
-                )
+                REPLACE_SOURCE_QUERY.format(sources='%(sources)s', reports='%(reports)s'),
+                {'sources': list(sources), 'reports': list(reports)}
             )
         
+        buffer.seek(0)
+        self.cursor.copy_expert(
+            # An empty category is written as an unquoted empty field, which
+            # COPY would otherwise read as NULL
+            f"COPY housing_summary_statistics ({', '.join(COPY_COLUMNS)}) "
+            "FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (category))",
+            buffer
+        )
+        
+        self.cursor.execute(
+            DELETE_EXPIRED_QUERY.format(expired_before='%(expired_before)s'),
+            {'expired_before': now - PROVISIONAL_TTL}
+        )
+        
+        self.conn.commit()
+        bump_statistics_version()
+        logger.info(f"Stored {rows} records in the database")
+        return rows
+    
+    def delete_provisional_statistics(self, source: str) -> int:
+        """
+        Delete the provisional statistics of a file, e.g. after its exact job
+        failed, so the estimates do not stay the latest results.
+        
+        Args:
+            source: File the estimates were computed from
+            
+        Returns:
+            Number of rows deleted
+        """
+        if not self.cursor or not self.conn:
+            raise RuntimeError("Database connection not established")
+        
+        self.cursor.execute(
+            "DELETE FROM housing_summary_statistics WHERE provisional AND source = %s",
+            (source,)
+        )
         self.conn.commit()
-        logger.info(f"Stored {len(summary_stats)} records in the database")
+        bump_statistics_version()
+        logger.info(f"Deleted {self.cursor.rowcount} provisional records of {source}")
+        return self.cursor.rowcount
     
-    def query_latest_statistics(self) -> List[Tuple[Any, ...]]:
+    def query_latest_statistics(self, report: str = DEFAULT_REPORT) -> List[Tuple[Any, ...]]:
         """
-        Query the latest statistics for each category.
+        Query the latest statistics for each category of a report.
+        
+        Args:
+            report: Name of the report to query
         
         Returns:
-            List of tuples containing the latest statistics
+            List of tuples of (category, average_value, record_count,
+            processed_at, provisional)
         """
         if not self.cursor:
             raise RuntimeError("Database connection not established")
             
-        query = """
-        WITH latest_stats AS (
-            SELECT 
-                category,
-                MAX(processed_at) as latest_processed_at
-            FROM 
-                housing_summary_statistics
-            GROUP BY 
-                category
-        )
-        SELECT 
-            h.category,
-            h.average_value,
-            h.record_count,
-            h.processed_at
-        FROM 
-            housing_summary_statistics h
-        JOIN 
-            latest_stats ls
-        ON 
-            h.category = ls.category AND h.processed_at = ls.latest_processed_at
-        ORDER BY 
-            h.category;
-        """
-        
-        self.cursor.execute(query)
+        self.cursor.execute(LATEST_STATISTICS_QUERY.format(report='%(report)s'), {'report': report})
         results = self.cursor.fetchall()
         
         return results
@@ -0,0 +1,110 @@
+"""
+Selection between the pandas and the lightweight processing engines.
+
+The engine is chosen per call or through ``HOUSING_ENGINE`` and imported
+lazily, so a container configured for the lite engine never imports pandas.
+"""
+import importlib
+from typing import Any, Dict, List, Optional, Sequence
+
+from .quality import QualityReport
+from .results import SummaryTable
+from .settings import AggregationSpec, DEFAULT_REPORT, get_settings
+
+ENGINE_MODULES = {
+    'pandas': 'data_processor',
+    'lite': 'lite_engine',
+}
+
+
+def get_engine(engine: Optional[str] = None) -> Any:
+    """
+    Import the module implementing a processing engine.
+
+    Args:
+        engine: "pandas" or "lite"; defaults to the configured engine
+
+    Returns:
+        The engine module
+
+    Raises:
+        ValueError: If the engine is unknown
+    """
+    engine = engine or get_settings().engine
+    if engine not in ENGINE_MODULES:
+        raise ValueError(f"Unknown processing engine: {engine}. Expected one of {', '.join(ENGINE_MODULES)}")
+    return importlib.import_module(f".{ENGINE_MODULES[engine]}", __package__)
+
+def process_california_housing_data(file_path: str, engine: Optional[str] = None, **kwargs: Any) -> SummaryTable:
+    """
+    Calculate the average median house value per ocean_proximity category
+    with the selected engine.
+
+    Args:
+        file_path: Path to the CSV file containing California Housing data
+        engine: "pandas" or "lite"; defaults to the configured engine
+        **kwargs: Engine-specific options such as chunksize
+
+    Returns:
+        Table with category, average value and count
+    """
+    return get_engine(engine).process_california_housing_data(file_path, **kwargs)
+
+def process_housing_reports(
+    file_path: str,
+    specs: Optional[Sequence[AggregationSpec]] = None,
+    engine: Optional[str] = None,
+    **kwargs: Any
+) -> Dict[str, SummaryTable]:
+    """
+    Evaluate several declarative reports with the selected engine.
+
+    Args:
+        file_path: Path to the CSV file containing California Housing data
+        specs: Report specifications
+        engine: "pandas" or "lite"; defaults to the configured engine
+        **kwargs: Engine-specific options such as chunksize
+
+    Returns:
+        Report rows keyed by report name
+    """
+    return get_engine(engine).process_housing_reports(file_path, specs, **kwargs)
+
+def process_configured_reports(
+    file_path: str,
+    quality_report: Optional[QualityReport] = None
+) -> Dict[str, SummaryTable]:
+    """
+    Run the reports configured through the HOUSING_* settings.
+    
+    Args:
+        file_path: Path to the CSV file containing California Housing data
+        quality_report: If given, receives the data-quality counts
+        
+    Returns:
+        Report rows keyed by report name
+    """
+    settings = get_settings()
+    
+    if settings.memory_budget_bytes:
+        # Spill mode is implemented by the pandas engine; the settings only
+        # allow it together with the default report
+        return {
+            DEFAULT_REPORT: process_california_housing_data(
+                file_path,
+                engine='pandas',
+                chunksize=settings.chunksize,
+                memory_budget_bytes=settings.memory_budget_bytes,
+                spill_dir=settings.spill_dir,
+                quality_rules=settings.quality_rules,
+                quality_report=quality_report
+            )
+        }
+    
+    return process_housing_reports(
+        file_path,
+        settings.aggregations,
+        chunksize=settings.chunksize,
+        quality_rules=settings.quality_rules,
+        quality_report=quality_report
+    )
@@ -1,24 +1,34 @@
 """
 Lambda handler for California Housing data processing pipeline.
-Triggered by S3 upload events and processes housing data using Pandas.
+Triggered by S3 upload events and processes housing data using Pandas,
+or the lightweight csv/NumPy engine when HOUSING_ENGINE=lite. With
+HOUSING_PROVISIONAL_ESTIMATES=true, estimates from a sample of the file are
+stored as provisional results before the exact run. Results are stored with
+the file's S3 URI as their source, so the exact results of an upload replace
+only that file's estimates and earlier results; estimates are deleted again
+if the exact run fails.
 """
 import os
 import json
+import time
 import urllib.parse
-import boto3
 import traceback
 from typing import Dict, Any, List, Tuple
 
-from lambda_functions.data_processor import process_california_housing_data
+from lambda_functions.engines import process_configured_reports
 from lambda_functions.db_connector import RDSConnector
+from lambda_functions.quality import QualityReport
+from lambda_functions.s3_backend import create_s3_client
+from lambda_functions.sampling import estimate_average_by_category
+from lambda_functions.settings import DEFAULT_AGGREGATIONS, DEFAULT_REPORT, get_settings
 from lambda_functions.utils import setup_logging, get_db_credentials, format_query_results
 from loguru import logger
 
 # Configure logging
 setup_logging()
 
-# Initialize AWS clients
-s3_client = boto3.client('s3')
+# Initialize AWS clients (or the local filesystem backend when S3_BACKEND=local)
+s3_client = create_s3_client()
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
@@ -32,46 +42,65 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         Dict containing status and processing results
     """
     logger.info("Processing new California Housing data file")
+    download_path = None
+    source = None
     
     try:
         # Extract bucket and key from the S3 event
         bucket, key = _extract_s3_info(event)
         logger.info(f"Processing file {key} from bucket {bucket}")
-        # Download file from S3
-        download_path = f"/tmp/{os.path.basename(key)}"
+        source = f"s3://{bucket}/{key}"
+        timings: Dict[str, float] = {}
+        if get_settings().provisional_estimates:
+            timings["estimate_ms"] = _store_provisional_estimates(source)
+        
+        # Download file from S3; the request id keeps concurrent invocations apart
+        request_id = getattr(context, 'aws_request_id', None)
+        file_name = os.path.basename(key)
+        download_path = f"/tmp/{request_id}-{file_name}" if request_id else f"/tmp/{file_name}"
+        start = time.perf_counter()
         s3_client.download_file(bucket, key, download_path)
+        timings["download_ms"] = (time.perf_counter() - start) * 1000
         logger.info(f"Downloaded file to {download_path}")
         
-        # Process data using Pandas
-        summary_stats = process_california_housing_data(download_path)
+        # Process data with the configured engine; all reports share one parse
+        start = time.perf_counter()
+        quality_report = QualityReport()
+        reports = process_configured_reports(download_path, quality_report)
+        timings["process_ms"] = (time.perf_counter() - start) * 1000
+        first_report, summary_stats = next(iter(reports.items()))
         logger.info(f"Successfully processed data. Found {len(summary_stats)} categories.")
         
         # Store results in RDS
+        start = time.perf_counter()
         db_credentials = get_db_credentials()
         with RDSConnector(db_credentials) as db:
-            db.store_summary_statistics(summary_stats)
-            logger.info("Successfully stored summary statistics in the database")
+            for report, stats in reports.items():
+                db.store_summary_statistics(stats, report=report, source=source)
+            logger.info(f"Successfully stored summary statistics for {len(reports)} reports in the database")
             logger.info("Querying database to validate insertion")
-            latest_stats = db.query_latest_statistics()
+            latest_stats = db.query_latest_statistics(first_report)
             logger.info(f"Successfully retrieved {len(latest_stats)} records from database")
             formatted_results = format_query_results(latest_stats)
             logger.info(f"Housing data summary:\n{formatted_results}")
-        
-        # Clean up
-        os.remove(download_path)
-        logger.info(f"Removed temporary file {download_path}")
+        timings["db_ms"] = (time.perf_counter() - start) * 1000
         
         return {
             "statusCode": 200,
             "body": json.dumps({
                 "message": "Successfully processed housing data",
-                "categories_processed": len(summary_stats)
+                "categories_processed": len(summary_stats),
+                "reports": {report: len(stats) for report, stats in reports.items()},
+                "quality": quality_report.as_dict(),
+                "timings": {name: round(ms, 3) for name, ms in timings.items()}
             })
         }
         
     except Exception as e:
         logger.error(f"Error processing housing data: {str(e)}")
         logger.error(traceback.format_exc())
+        if source and get_settings().provisional_estimates:
+            _delete_provisional_estimates(source)
         
         return {
             "statusCode": 500,
@@ -80,6 +109,66 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 "error": str(e)
             })
         }
+    
+    finally:
+        # Clean up, also after failures so /tmp does not fill up in warm containers
+        if download_path and os.path.exists(download_path):
+            os.remove(download_path)
+            logger.info(f"Removed temporary file {download_path}")
+
+def _store_provisional_estimates(source: str) -> float:
+    """
+    Estimate the default report from a sample of ranged reads and store it
+    as provisional, so that readers get approximate statistics before the
+    exact job finishes; the exact results then replace them.
+    
+    Failures are logged and do not stop the exact job.
+    
+    Args:
+        source: S3 URI of the uploaded file
+        
+    Returns:
+        Time taken in milliseconds
+    """
+    start = time.perf_counter()
+    settings = get_settings()
+    
+    # Provisional rows are only deleted when the exact default report is stored
+    if DEFAULT_AGGREGATIONS[0] not in settings.aggregations and not settings.memory_budget_bytes:
+        logger.warning(f"Skipping provisional estimates: report {DEFAULT_REPORT} is not configured")
+        return 0.0
+    
+    try:
+        estimates = estimate_average_by_category(
+            source,
+            settings.sample_blocks,
+            settings.sample_block_bytes,
+            settings.sample_confidence,
+            quality_rules=settings.quality_rules,
+            s3_client=s3_client
+        )
+        with RDSConnector(get_db_credentials()) as db:
+            db.store_summary_statistics(estimates, report=DEFAULT_REPORT, provisional=True, source=source)
+        logger.info(f"Stored provisional estimates for {len(estimates)} categories")
+    except Exception as e:
+        logger.warning(f"Could not store provisional estimates: {str(e)}")
+    
+    return (time.perf_counter() - start) * 1000
+
+def _delete_provisional_estimates(source: str) -> None:
+    """
+    Delete the provisional estimates of a file whose exact job failed, so
+    they do not remain its latest results. Failures are logged; rows left
+    behind expire after PROVISIONAL_TTL.
+    
+    Args:
+        source: S3 URI of the uploaded file
+    """
+    try:
+        with RDSConnector(get_db_credentials()) as db:
+            db.delete_provisional_statistics(source)
+    except Exception as e:
+        logger.warning(f"Could not delete provisional estimates of {source}: {str(e)}")
 
 def _extract_s3_info(event: Dict[str, Any]) -> Tuple[str, str]:
     """
@@ -0,0 +1,323 @@
+"""
+Lightweight processing engine for small-memory Lambdas.
+
+Reads the CSV with the standard library ``csv`` module and aggregates with
+NumPy, without importing pandas. Rows are streamed in batches, only the
+columns a report needs are kept, and the aggregation itself is shared with
+the pandas engine, so both engines produce the same results.
+"""
+import csv
+import operator
+import numpy as np
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from loguru import logger
+
+from .aggregation import CachedColumns, CategoricalAggregator, SpecAggregator, spec_columns
+from .quality import QualityReport, active_rules, apply_quality_rules, log_quality_report
+from .results import SummaryTable
+from .settings import AggregationSpec, DEFAULT_AGGREGATIONS, DEFAULT_QUALITY_RULES, QualityRule
+
+# Strings pandas.read_csv treats as missing by default
+NA_VALUES = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+])
+
+# Like pandas, read UTF-8 whatever the locale and skip a byte order mark
+CSV_ENCODING = 'utf-8-sig'
+
+# Rows parsed per batch when no chunksize is given
+DEFAULT_BATCH_SIZE = 10_000
+
+# Columns of the average-by-category report
+REQUIRED_COLUMNS = ['median_house_value', 'ocean_proximity']
+
+
+def process_california_housing_data(
+    file_path: str,
+    chunksize: Optional[int] = None,
+    quality_rules: Optional[Sequence[QualityRule]] = None,
+    quality_report: Optional[QualityReport] = None,
+    sample_blocks: Optional[int] = None,
+    sample_block_bytes: Optional[int] = None,
+    confidence: Optional[float] = None
+) -> SummaryTable:
+    """
+    Process California Housing dataset to calculate average median house value
+    per ocean_proximity category.
+
+    Args:
+        file_path: Path to the CSV file containing California Housing data
+        chunksize: Number of rows parsed per batch
+        quality_rules: Range and cap rules applied before aggregation;
+                       defaults to DEFAULT_QUALITY_RULES
+        quality_report: If given, receives the per-rule rejection counts
+        sample_blocks: If set, estimate the averages from this many randomly
+                       placed blocks instead of reading the whole file; the
+                       results then also include ci_low, ci_high and
+                       sample_size (see sampling.estimate_average_by_category)
+        sample_block_bytes: Size of each sampled block
+        confidence: Confidence level of the estimates' intervals
+
+    Returns:
+        Table with category, average value and count
+
+    Raises:
+        ValueError: If the data is missing required columns, or sample_blocks
+                    is combined with chunksize
+        FileNotFoundError: If the file cannot be found
+    """
+    if sample_blocks and chunksize:
+        raise ValueError("sample_blocks cannot be combined with chunksize")
+
+    logger.info(f"Processing file: {file_path}")
+
+    rules = DEFAULT_QUALITY_RULES if quality_rules is None else quality_rules
+    report = quality_report if quality_report is not None else QualityReport()
+
+    try:
+        if sample_blocks:
+            # Imported here because the sampling module builds on this engine
+            from .sampling import estimate_average_by_category
+            return estimate_average_by_category(
+                file_path, sample_blocks, sample_block_bytes, confidence, quality_rules=rules, quality_report=report
+            )
+
+        with open(file_path, newline='', encoding=CSV_ENCODING) as csv_file:
+            reader = csv.reader(csv_file)
+            result = average_rows_by_category(reader, next(reader, []), chunksize, rules, report)
+
+        log_quality_report(report)
+
+        logger.info(f"Calculated averages for {len(result)} categories")
+        return result
+
+    except FileNotFoundError:
+        logger.error(f"File not found: {file_path}")
+        raise
+    except Exception as e:
+        logger.error(f"Error processing data: {str(e)}")
+        raise
+
+def process_housing_reports(
+    file_path: str,
+    specs: Optional[Sequence[AggregationSpec]] = None,
+    chunksize: Optional[int] = None,
+    quality_rules: Optional[Sequence[QualityRule]] = None,
+    quality_report: Optional[QualityReport] = None
+) -> Dict[str, SummaryTable]:
+    """
+    Evaluate several declarative reports over a single pass over the dataset.
+
+    Args:
+        file_path: Path to the CSV file containing California Housing data
+        specs: Report specifications; defaults to the average value per
+               ocean_proximity category
+        chunksize: Number of rows parsed per batch
+        quality_rules: Range and cap rules applied before aggregation;
+                       defaults to DEFAULT_QUALITY_RULES
+        quality_report: If given, receives the per-rule rejection counts
+
+    Returns:
+        Report rows keyed by report name
+
+    Raises:
+        ValueError: If the data is missing columns needed by a report
+        FileNotFoundError: If the file cannot be found
+    """
+    specs = list(specs or DEFAULT_AGGREGATIONS)
+    rules = DEFAULT_QUALITY_RULES if quality_rules is None else quality_rules
+    report = quality_report if quality_report is not None else QualityReport()
+    logger.info(f"Processing file: {file_path} for {len(specs)} reports")
+
+    try:
+        required_columns = spec_columns(specs)
+        aggregators = [SpecAggregator(spec) for spec in specs]
+
+        for batch in _read_batches(file_path, required_columns, chunksize, [rule.column for rule in rules]):
+            # Each report skips and counts the nulls in its own columns
+            columns = _apply_quality(batch, (), rules, report)
+            for aggregator in aggregators:
+                aggregator.update(columns)
+
+        for aggregator in aggregators:
+            report.add_report_counts(aggregator.spec.name, aggregator.skipped)
+        log_quality_report(report)
+
+        reports = {aggregator.spec.name: aggregator.results() for aggregator in aggregators}
+        for name, rows in reports.items():
+            logger.info(f"Calculated {len(rows)} groups for report {name}")
+        return reports
+
+    except FileNotFoundError:
+        logger.error(f"File not found: {file_path}")
+        raise
+    except Exception as e:
+        logger.error(f"Error processing data: {str(e)}")
+        raise
+
+def average_rows_by_category(
+    rows: Iterable[List[str]],
+    header: Sequence[str],
+    chunksize: Optional[int],
+    rules: Sequence[QualityRule],
+    report: QualityReport
+) -> SummaryTable:
+    """
+    Calculate the average median house value per ocean_proximity category of
+    already split CSV rows, e.g. the rows of one sampled block.
+
+    Args:
+        rows: CSV rows after the header
+        header: Column names
+        chunksize: Number of rows parsed per batch
+        rules: Range and cap rules
+        report: Report receiving the rejection counts
+
+    Returns:
+        Table with category, average value and count
+
+    Raises:
+        ValueError: If the header is missing required columns
+    """
+    aggregator = CategoricalAggregator()
+
+    for batch in _parse_batches(rows, header, REQUIRED_COLUMNS, chunksize, [rule.column for rule in rules]):
+        columns = _apply_quality(batch, REQUIRED_COLUMNS, rules, report)
+        codes, categories = columns.source.categorical('ocean_proximity')
+        aggregator.update(categories, codes, columns.numeric('median_house_value'))
+
+    return aggregator.results()
+
+class _CsvColumns:
+    """
+    Column access to one batch of parsed CSV fields for the report engine.
+    """
+
+    def __init__(self, fields: Dict[str, List[str]]):
+        self.fields = fields
+
+    def numeric(self, name: str) -> np.ndarray:
+        column = self.fields[name]
+        try:
+            return np.fromiter(map(float, column), dtype=np.float64, count=len(column))
+        except ValueError:
+            # Only columns with missing markers take the slower path
+            return np.fromiter(
+                (np.nan if value in NA_VALUES else float(value) for value in column),
+                dtype=np.float64,
+                count=len(column)
+            )
+
+    def categorical(self, name: str) -> Tuple[np.ndarray, Sequence[str]]:
+        index: Dict[str, int] = {}
+        column = self.fields[name]
+        codes = np.fromiter(
+            (-1 if value in NA_VALUES else index.setdefault(value, len(index)) for value in column),
+            dtype=np.int64,
+            count=len(column)
+        )
+        return codes, list(index)
+
+    def isnull(self, name: str) -> np.ndarray:
+        column = self.fields[name]
+        return np.fromiter((value in NA_VALUES for value in column), dtype=bool, count=len(column))
+
+def _apply_quality(
+    batch: _CsvColumns,
+    required_columns: Sequence[str],
+    rules: Sequence[QualityRule],
+    report: QualityReport
+) -> CachedColumns:
+    """
+    Drop the rows with nulls in required columns or failing a reject rule.
+
+    Args:
+        batch: Parsed batch
+        required_columns: Columns that must not be null
+        rules: Range and cap rules
+        report: Report receiving the rejection counts
+
+    Returns:
+        Cached columns of the kept rows
+    """
+    columns = CachedColumns(batch)
+    keep = apply_quality_rules(columns, required_columns, active_rules(rules, batch.fields), report)
+    return columns if keep.all() else columns.select(keep)
+
+def _read_batches(
+    file_path: str,
+    required_columns: Sequence[str],
+    chunksize: Optional[int],
+    optional_columns: Sequence[str] = ()
+) -> Iterator[_CsvColumns]:
+    """
+    Stream the CSV in batches, keeping only the needed columns.
+
+    Like pandas, short rows are padded with missing values and blank lines
+    are skipped; missing values are left to the quality rules.
+
+    Args:
+        file_path: Path to the CSV file
+        required_columns: Columns that must be present
+        chunksize: Number of rows per batch
+        optional_columns: Columns kept when the file has them, e.g. the
+                          columns of quality rules
+
+    Yields:
+        Batch columns
+
+    Raises:
+        ValueError: If required columns are missing
+    """
+    with open(file_path, newline='', encoding=CSV_ENCODING) as csv_file:
+        reader = csv.reader(csv_file)
+        yield from _parse_batches(reader, next(reader, []), required_columns, chunksize, optional_columns)
+
+def _parse_batches(
+    rows: Iterable[List[str]],
+    header: Sequence[str],
+    required_columns: Sequence[str],
+    chunksize: Optional[int],
+    optional_columns: Sequence[str] = ()
+) -> Iterator[_CsvColumns]:
+    """
+    Group CSV rows into batches of the needed columns; see _read_batches.
+    """
+    batch_size = chunksize or DEFAULT_BATCH_SIZE
+    header = list(header)
+
+    missing_columns = [col for col in required_columns if col not in header]
+    if missing_columns:
+        error_msg = f"Missing required columns: {', '.join(missing_columns)}"
+        logger.error(error_msg)
+        raise ValueError(error_msg)
+
+    columns = list(dict.fromkeys(
+        list(required_columns) + [col for col in optional_columns if col in header]
+    ))
+
+    # Keep only the needed fields of each row, not the whole parsed row
+    pick = operator.itemgetter(*(header.index(col) for col in columns))
+    width = len(header)
+    rows = iter(rows)
+
+    while True:
+        kept: List[Any] = []
+        for row in rows:
+            if not row:
+                continue
+            if len(row) < width:
+                row = row + [''] * (width - len(row))
+            kept.append(pick(row))
+            if len(kept) == batch_size:
+                break
+
+        if not kept:
+            return
+
+        if len(columns) == 1:
+            fields = {columns[0]: kept}
+        else:
+            fields = dict(zip(columns, map(list, zip(*kept))))
+        yield _CsvColumns(fields)
@@ -0,0 +1,296 @@
+"""
+Local end-to-end runner that replays S3 events against the Lambda handler.
+
+Synthetic S3 ``ObjectCreated`` events are built for local CSV files and sent
+to ``handler.handler`` from a pool of worker processes. Each worker stands in
+for a Lambda container: it serves objects through the local filesystem S3
+backend and writes to the Postgres configured by DB_HOST, DB_PORT, DB_NAME,
+DB_USER and DB_PASSWORD. In warm mode workers are reused between invocations;
+in cold mode every invocation gets a fresh process and pays the import cost.
+
+Run from the ``src`` directory:
+    python -m lambda_functions.local_runner ../sample_data --invocations 200 --concurrency 8
+"""
+import os
+import sys
+import glob
+import json
+import math
+import time
+import uuid
+import argparse
+import importlib
+import urllib.parse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+DEFAULT_BUCKET = "local-housing-data"
+
+
+class LocalContext:
+    """
+    Minimal Lambda context object for local invocations.
+    """
+
+    def __init__(self, function_name: str = "california-housing-processor-local"):
+        self.aws_request_id = str(uuid.uuid4())
+        self.function_name = function_name
+        self.memory_limit_in_mb = 1024
+
+
+def resolve_files(paths: Sequence[str]) -> List[str]:
+    """
+    Expand files, directories and glob patterns into a sorted list of CSV files.
+
+    Args:
+        paths: File paths, directories or glob patterns
+
+    Returns:
+        Absolute paths of the matching files
+
+    Raises:
+        FileNotFoundError: If nothing matches
+    """
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            files.update(glob.glob(os.path.join(path, "**", "*.csv"), recursive=True))
+        elif os.path.isfile(path):
+            files.add(path)
+        else:
+            files.update(match for match in glob.glob(path, recursive=True) if os.path.isfile(match))
+
+    if not files:
+        raise FileNotFoundError(f"No input files found for: {', '.join(paths)}")
+
+    return sorted(os.path.abspath(file) for file in files)
+
+def build_s3_event(bucket: str, key: str, size: int) -> Dict[str, Any]:
+    """
+    Build an S3 ObjectCreated:Put event like the one S3 sends to Lambda.
+
+    Args:
+        bucket: Bucket name
+        key: Object key
+        size: Object size in bytes
+
+    Returns:
+        The event dictionary
+    """
+    return {
+        "Records": [
+            {
+                "eventVersion": "2.1",
+                "eventSource": "aws:s3",
+                "awsRegion": "us-east-1",
+                "eventTime": datetime.now(timezone.utc).isoformat(),
+                "eventName": "ObjectCreated:Put",
+                "s3": {
+                    "s3SchemaVersion": "1.0",
+                    "bucket": {
+                        "name": bucket,
+                        "arn": f"arn:aws:s3:::{bucket}"
+                    },
+                    "object": {
+                        # S3 URL-encodes keys in notifications
+                        "key": urllib.parse.quote_plus(key, safe="/"),
+                        "size": size
+                    }
+                }
+            }
+        ]
+    }
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of already sorted values.
+
+    Args:
+        sorted_values: Values in ascending order
+        fraction: Percentile as a fraction between 0 and 1
+
+    Returns:
+        The percentile, or 0.0 for no values
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def summarize(invocations: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    """
+    Aggregate per-invocation measurements into a load report.
+
+    Args:
+        invocations: Results returned by the workers
+        wall_seconds: Wall-clock duration of the whole run
+
+    Returns:
+        Dictionary with throughput, latency percentiles, cold starts and DB time
+    """
+    latencies = sorted(result["latency_ms"] for result in invocations)
+    db_times = [result["db_ms"] for result in invocations if result["db_ms"] is not None]
+    cold_inits = [result["init_ms"] for result in invocations if result["cold"]]
+
+    return {
+        "invocations": len(invocations),
+        "errors": sum(1 for result in invocations if result["status_code"] != 200),
+        "error_samples": sorted({result["error"] for result in invocations if result["error"]})[:3],
+        "wall_seconds": wall_seconds,
+        "invocations_per_second": len(invocations) / wall_seconds if wall_seconds else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50),
+            "p90": percentile(latencies, 0.90),
+            "p99": percentile(latencies, 0.99),
+            "max": latencies[-1] if latencies else 0.0
+        },
+        "cold_starts": len(cold_inits),
+        "mean_cold_init_ms": sum(cold_inits) / len(cold_inits) if cold_inits else 0.0,
+        "mean_db_ms": sum(db_times) / len(db_times) if db_times else 0.0,
+        "total_db_seconds": sum(db_times) / 1000
+    }
+
+def format_report(report: Dict[str, Any]) -> str:
+    """
+    Format a load report as readable text.
+
+    Args:
+        report: Dictionary returned by summarize()
+
+    Returns:
+        Formatted report
+    """
+    latency = report["latency_ms"]
+    lines = [
+        "Local replay summary",
+        "-" * 80,
+        f"{'Invocations':<24} {report['invocations']:>12,} ({report['errors']:,} errors)",
+        f"{'Wall time (s)':<24} {report['wall_seconds']:>12.2f}",
+        f"{'Invocations/sec':<24} {report['invocations_per_second']:>12.2f}",
+        f"{'Latency p50/p90/p99 (ms)':<24} {latency['p50']:>12.1f} {latency['p90']:>10.1f} {latency['p99']:>10.1f}",
+        f"{'Latency max (ms)':<24} {latency['max']:>12.1f}",
+        f"{'Cold starts':<24} {report['cold_starts']:>12,} (mean init {report['mean_cold_init_ms']:.1f} ms)",
+        f"{'DB time mean (ms)':<24} {report['mean_db_ms']:>12.1f}",
+        f"{'DB time total (s)':<24} {report['total_db_seconds']:>12.2f}",
+    ]
+    lines.extend(f"Error: {error}" for error in report["error_samples"])
+    return "\n".join(lines)
+
+
+# Handler module of the current worker process; None until its cold start
+_handler_module: Optional[Any] = None
+
+
+def _init_worker(s3_root: str, log_invocations: bool) -> None:
+    """
+    Configure a worker process as a local Lambda container.
+    """
+    os.environ["S3_BACKEND"] = "local"
+    os.environ["LOCAL_S3_ROOT"] = s3_root
+    if not log_invocations:
+        os.environ["LOCAL_RUNNER_QUIET"] = "1"
+
+def _invoke(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Invoke the handler once, importing it first if this worker is cold.
+    """
+    global _handler_module
+    cold = _handler_module is None
+    start = time.perf_counter()
+
+    if cold:
+        _handler_module = importlib.import_module("lambda_functions.handler")
+        if os.environ.get("LOCAL_RUNNER_QUIET"):
+            from loguru import logger
+            logger.remove()
+    init_ms = (time.perf_counter() - start) * 1000
+
+    response = _handler_module.handler(event, LocalContext())
+    latency_ms = (time.perf_counter() - start) * 1000
+
+    body = json.loads(response["body"])
+    return {
+        "status_code": response["statusCode"],
+        "cold": cold,
+        "init_ms": init_ms,
+        "latency_ms": latency_ms,
+        "db_ms": body.get("timings", {}).get("db_ms"),
+        "error": body.get("error")
+    }
+
+def run(
+    files: Sequence[str],
+    invocations: int,
+    concurrency: int,
+    mode: str = "warm",
+    bucket: str = DEFAULT_BUCKET,
+    log_invocations: bool = False
+) -> Dict[str, Any]:
+    """
+    Replay S3 events for the given files against the handler.
+
+    Args:
+        files: Local files to replay, cycled until the invocation count is reached
+        invocations: Total number of handler invocations
+        concurrency: Number of simulated containers running in parallel
+        mode: "warm" to reuse containers or "cold" for a fresh one per invocation
+        bucket: Bucket name used in the events
+        log_invocations: Keep the handler's per-invocation logging
+
+    Returns:
+        Load report as returned by summarize()
+    """
+    s3_root = os.path.commonpath([os.path.dirname(file) for file in files])
+    events = [
+        build_s3_event(bucket, os.path.relpath(file, s3_root), os.path.getsize(file))
+        for file in files
+    ]
+
+    executor = ProcessPoolExecutor(
+        max_workers=concurrency,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(s3_root, log_invocations),
+        max_tasks_per_child=1 if mode == "cold" else None
+    )
+    with executor:
+        start = time.perf_counter()
+        results = list(executor.map(_invoke, (events[i % len(events)] for i in range(invocations))))
+        wall_seconds = time.perf_counter() - start
+
+    return summarize(results, wall_seconds)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Replay synthetic S3 events for local files against the Lambda handler.",
+        epilog="Database settings are read from DB_HOST, DB_PORT, DB_NAME, DB_USER and DB_PASSWORD."
+    )
+    parser.add_argument("paths", nargs="+", help="CSV files, directories or glob patterns")
+    parser.add_argument("--invocations", type=int, default=None,
+                        help="total invocations (default: one per file)")
+    parser.add_argument("--concurrency", type=int, default=1, help="simulated containers running in parallel")
+    parser.add_argument("--mode", choices=("warm", "cold"), default="warm",
+                        help="reuse containers (warm) or start a fresh one per invocation (cold)")
+    parser.add_argument("--bucket", default=DEFAULT_BUCKET, help="bucket name used in the events")
+    parser.add_argument("--verbose", action="store_true", help="keep the handler's logging")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    files = resolve_files(args.paths)
+    report = run(
+        files,
+        invocations=args.invocations or len(files),
+        concurrency=args.concurrency,
+        mode=args.mode,
+        bucket=args.bucket,
+        log_invocations=args.verbose
+    )
+
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
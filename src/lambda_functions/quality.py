@@ -0,0 +1,158 @@
+"""
+Vectorized data-quality stage between column validation and aggregation.
+
+Every rule is evaluated as a boolean mask over the batch's columns, so a
+batch is checked in one pass per column, and the column conversions are
+shared with the aggregation step that follows. Failed ``reject`` rules drop
+the row; ``flag`` rules are counted but keep the row. Nulls only exclude a
+row from the reports that use the null column: a single report rejects them
+here, while several reports evaluated together each skip and count their
+own (``QualityReport.report_counts``).
+"""
+import numpy as np
+from typing import Any, Dict, List, Sequence
+from loguru import logger
+
+from .aggregation import CachedColumns
+from .settings import QualityRule
+
+
+class QualityReport:
+    """
+    Per-rule rejection and flag counts, accumulated across batches.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty report.
+        """
+        self.total_rows = 0
+        self.rejected_rows = 0
+        self.rule_counts: Dict[str, int] = {}
+        self.report_counts: Dict[str, Dict[str, int]] = {}
+
+    def add(self, total_rows: int, rejected_rows: int, rule_counts: Dict[str, int]) -> None:
+        """
+        Add the counts of one batch.
+
+        Args:
+            total_rows: Rows in the batch
+            rejected_rows: Rows dropped from the batch
+            rule_counts: Failing rows per rule
+        """
+        self.total_rows += total_rows
+        self.rejected_rows += rejected_rows
+        for label, count in rule_counts.items():
+            self.rule_counts[label] = self.rule_counts.get(label, 0) + count
+
+    def add_report_counts(self, report_name: str, counts: Dict[str, int]) -> None:
+        """
+        Add the rows one report skipped, e.g. bin values outside every edge;
+        the other reports still use these rows.
+
+        Args:
+            report_name: Name of the report
+            counts: Skipped rows per reason
+        """
+        report_counts = self.report_counts.setdefault(report_name, {})
+        for label, count in counts.items():
+            report_counts[label] = report_counts.get(label, 0) + count
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Summarize the report.
+
+        Returns:
+            Dictionary with total, accepted and rejected rows, per-rule counts
+            and the rows skipped by individual reports
+        """
+        return {
+            'total_rows': self.total_rows,
+            'accepted_rows': self.total_rows - self.rejected_rows,
+            'rejected_rows': self.rejected_rows,
+            'rules': dict(self.rule_counts),
+            'reports': {name: dict(counts) for name, counts in self.report_counts.items()}
+        }
+
+
+def active_rules(rules: Sequence[QualityRule], available_columns: Sequence[str]) -> List[QualityRule]:
+    """
+    Keep the rules whose column is present in the data.
+
+    Args:
+        rules: Configured rules
+        available_columns: Columns of the file
+
+    Returns:
+        Rules that can be evaluated
+    """
+    available = set(available_columns)
+    return [rule for rule in rules if rule.column in available]
+
+def apply_quality_rules(
+    columns: CachedColumns,
+    required_columns: Sequence[str],
+    rules: Sequence[QualityRule],
+    report: QualityReport
+) -> np.ndarray:
+    """
+    Evaluate the required-column null check and all rules on one batch.
+
+    Args:
+        columns: Cached columns of the batch
+        required_columns: Columns that must not be null
+        rules: Range and cap rules whose columns exist in the batch
+        report: Report to add the batch's counts to
+
+    Returns:
+        Boolean mask of the rows to keep
+    """
+    keep = None
+    rule_counts: Dict[str, int] = {}
+    total_rows = 0
+
+    for column in required_columns:
+        failed = columns.isnull(column)
+        total_rows = len(failed)
+        rule_counts[f"required:{column}"] = int(np.count_nonzero(failed))
+        keep = ~failed if keep is None else keep & ~failed
+
+    for rule in rules:
+        values = columns.numeric(rule.column)
+        total_rows = len(values)
+        # NaN compares False, so nulls never fail a rule
+        with np.errstate(invalid='ignore'):
+            if rule.kind == 'cap':
+                failed = values >= rule.cap if rule.cap is not None else np.zeros(len(values), dtype=bool)
+            else:
+                failed = np.zeros(len(values), dtype=bool)
+                if rule.min is not None:
+                    failed |= values < rule.min
+                if rule.max is not None:
+                    failed |= values > rule.max
+        rule_counts[rule.label] = rule_counts.get(rule.label, 0) + int(np.count_nonzero(failed))
+        if rule.action == 'reject':
+            keep = ~failed if keep is None else keep & ~failed
+
+    if keep is None:
+        keep = np.ones(total_rows, dtype=bool)
+
+    report.add(len(keep), int(len(keep) - np.count_nonzero(keep)), rule_counts)
+    return keep
+
+def log_quality_report(report: QualityReport) -> None:
+    """
+    Log the totals and per-rule counts of a report.
+
+    Args:
+        report: Report to log
+    """
+    counts = ", ".join(f"{label}={count}" for label, count in report.rule_counts.items() if count)
+    logger.info(
+        f"Rejected {report.rejected_rows} of {report.total_rows} rows"
+        + (f" ({counts})" if counts else "")
+    )
+    for name, report_counts in report.report_counts.items():
+        skipped = ", ".join(f"{label}={count}" for label, count in report_counts.items() if count)
+        if skipped:
+            logger.info(f"Report {name} skipped rows: {skipped}")
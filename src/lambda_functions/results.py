@@ -0,0 +1,191 @@
+"""
+Columnar container for summary statistics.
+
+Aggregators return a ``SummaryTable`` that holds one NumPy array per field
+instead of one dict per group, and the database connectors and formatters
+read those arrays directly. Indexing or iterating a table yields ``SummaryRow``
+views that behave like the read-only dicts earlier versions returned, so
+``row['category']`` and comparisons with lists of dicts keep working; the
+views are created on access and hold no data of their own.
+"""
+import numpy as np
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+
+class SummaryRow(Mapping):
+    """
+    Read-only dict view of one row of a SummaryTable.
+    """
+
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table: 'SummaryTable', index: int):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, name: str) -> Any:
+        return self._table._value(name, self._index)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table.fields)
+
+    def __len__(self) -> int:
+        return len(self._table.fields)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class SummaryTable:
+    """
+    Summary statistics stored column by column.
+
+    Every table has ``category``, ``average_value`` and ``count`` columns.
+    Multi-key reports add a ``keys`` field (one label column per group-by
+    key), and optional columns such as ``median_value`` or ``processed_at``
+    are kept in insertion order after the required ones.
+    """
+
+    __slots__ = ('columns', 'keys')
+
+    def __init__(
+        self,
+        category: Sequence[Any],
+        average_value: Sequence[float],
+        count: Sequence[int],
+        keys: Optional[Dict[str, Sequence[str]]] = None,
+        **extra_columns: Sequence[Any]
+    ):
+        """
+        Initialize the table.
+
+        Args:
+            category: Category label per row
+            average_value: Mean of the metric per row
+            count: Number of records per row
+            keys: Label column per group-by key, for multi-key reports
+            **extra_columns: Additional columns of the same length
+        """
+        self.columns: Dict[str, np.ndarray] = {
+            'category': _object_array(category),
+            'average_value': np.asarray(average_value, dtype=np.float64),
+            'count': np.asarray(count, dtype=np.int64),
+        }
+        for name, values in extra_columns.items():
+            self.columns[name] = np.asarray(values)
+        self.keys = {name: _object_array(labels) for name, labels in keys.items()} if keys is not None else None
+
+        lengths = {len(values) for values in self.columns.values()}
+        lengths.update(len(labels) for labels in (self.keys or {}).values())
+        if len(lengths) > 1:
+            raise ValueError(f"Columns have different lengths: {sorted(lengths)}")
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Mapping]) -> 'SummaryTable':
+        """
+        Build a table from dict-like rows with category, average_value and count.
+
+        Args:
+            rows: Rows such as the dictionaries of earlier versions
+
+        Returns:
+            The table
+        """
+        if isinstance(rows, SummaryTable):
+            return rows
+        rows = list(rows)
+        return cls(
+            [row['category'] for row in rows],
+            [row['average_value'] for row in rows],
+            [row['count'] for row in rows]
+        )
+
+    @classmethod
+    def from_query_results(cls, results: Sequence[Tuple[Any, ...]]) -> 'SummaryTable':
+        """
+        Build a table from query_latest_statistics tuples.
+
+        Args:
+            results: Tuples of (category, average_value, record_count, processed_at)
+
+        Returns:
+            The table, with a processed_at column
+        """
+        if not results:
+            return cls([], [], [], processed_at=[])
+        categories, values, counts, timestamps = tuple(zip(*results))[:4]
+        return cls(categories, np.asarray(values, dtype=np.float64), counts, processed_at=timestamps)
+
+    @property
+    def fields(self) -> List[str]:
+        """
+        Names of the fields of each row view.
+        """
+        names = list(self.columns)
+        if self.keys is not None:
+            names.insert(1, 'keys')
+        return names
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Return one column as an array.
+        """
+        return self.columns[name]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Materialize the rows as plain dictionaries, e.g. for JSON output.
+        """
+        columns: List[Iterable[Any]] = [values.tolist() for values in self.columns.values()]
+        if self.keys is not None:
+            names = list(self.keys)
+            key_rows = (dict(zip(names, labels)) for labels in zip(*(self.keys[name] for name in names)))
+            columns.insert(1, key_rows if names else ({} for _ in range(len(self))))
+        fields = self.fields
+        return [dict(zip(fields, values)) for values in zip(*columns)]
+
+    def _value(self, name: str, index: int) -> Any:
+        if name == 'keys' and self.keys is not None:
+            return {key: labels[index] for key, labels in self.keys.items()}
+        value = self.columns[name][index]
+        # NumPy scalars become the Python floats, ints and datetimes callers expect
+        return value.item() if isinstance(value, np.generic) else value
+
+    def __len__(self) -> int:
+        return len(self.columns['count'])
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[SummaryRow, 'SummaryTable']:
+        if isinstance(index, slice):
+            table = SummaryTable.__new__(SummaryTable)
+            table.columns = {name: values[index] for name, values in self.columns.items()}
+            table.keys = {name: labels[index] for name, labels in self.keys.items()} if self.keys is not None else None
+            return table
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("SummaryTable index out of range")
+        return SummaryRow(self, index)
+
+    def __iter__(self) -> Iterator[SummaryRow]:
+        return (SummaryRow(self, index) for index in range(len(self)))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (SummaryTable, list, tuple)):
+            return NotImplemented
+        return len(self) == len(other) and all(row == other_row for row, other_row in zip(self, other))
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"SummaryTable({len(self)} rows, fields={self.fields})"
+
+
+def _object_array(values: Iterable[Any]) -> np.ndarray:
+    """
+    Build a 1-d object array; unlike np.asarray, tuples stay single elements.
+    """
+    if isinstance(values, np.ndarray) and values.dtype == object:
+        return values
+    values = values if isinstance(values, Sequence) else list(values)
+    return np.fromiter(values, dtype=object, count=len(values))
@@ -0,0 +1,139 @@
+"""
+Pluggable S3 backends for the processing pipeline.
+
+The Lambda uses a regular boto3 S3 client. For local runs, ``S3_BACKEND=local``
+switches to a backend that serves objects from a directory on the local
+filesystem (``LOCAL_S3_ROOT``) through the same method names.
+"""
+import io
+import os
+import shutil
+import boto3
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+
+class LocalS3Backend:
+    """
+    Minimal stand-in for the boto3 S3 client backed by a local directory.
+
+    Object keys are resolved relative to the root directory; bucket names are
+    accepted for interface compatibility but not used.
+    """
+
+    def __init__(self, root: str):
+        """
+        Initialize the backend.
+
+        Args:
+            root: Directory that holds the objects
+        """
+        self.root = os.path.abspath(root)
+
+    def download_file(self, bucket: str, key: str, filename: str) -> None:
+        """
+        Copy an object to a local file, like boto3's download_file.
+
+        Args:
+            bucket: Bucket name (ignored)
+            key: Object key relative to the root directory
+            filename: Destination path
+
+        Raises:
+            FileNotFoundError: If the object does not exist
+        """
+        shutil.copyfile(self.object_path(key), filename)
+
+    def head_object(self, Bucket: str, Key: str) -> Dict[str, Any]:
+        """
+        Return the size and modification time of an object, like boto3's head_object.
+
+        Args:
+            Bucket: Bucket name (ignored)
+            Key: Object key relative to the root directory
+
+        Returns:
+            Dictionary with the ContentLength and LastModified (UTC) of the object
+
+        Raises:
+            FileNotFoundError: If the object does not exist
+        """
+        path = self.object_path(Key)
+        return {
+            'ContentLength': os.path.getsize(path),
+            'LastModified': datetime.fromtimestamp(os.path.getmtime(path), timezone.utc)
+        }
+
+    def get_object(self, Bucket: str, Key: str, Range: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Read an object or a byte range of it, like boto3's get_object.
+
+        Args:
+            Bucket: Bucket name (ignored)
+            Key: Object key relative to the root directory
+            Range: Optional HTTP range of the form "bytes=start-end" (inclusive)
+
+        Returns:
+            Dictionary with the object bytes as a readable Body
+
+        Raises:
+            FileNotFoundError: If the object does not exist
+        """
+        with open(self.object_path(Key), 'rb') as object_file:
+            if Range is None:
+                return {'Body': io.BytesIO(object_file.read())}
+            start, _, end = Range[len('bytes='):].partition('-')
+            object_file.seek(int(start))
+            return {'Body': io.BytesIO(object_file.read(int(end) - int(start) + 1))}
+
+    def object_path(self, key: str) -> str:
+        """
+        Resolve an object key to its path on disk.
+
+        Args:
+            key: Object key relative to the root directory
+
+        Returns:
+            Absolute path of the object
+
+        Raises:
+            ValueError: If the key points outside the root directory
+        """
+        path = os.path.abspath(os.path.join(self.root, key))
+        if os.path.commonpath([self.root, path]) != self.root:
+            raise ValueError(f"Object key escapes the local S3 root: {key}")
+        return path
+
+
+def split_s3_uri(uri: str) -> Tuple[str, str]:
+    """
+    Split an ``s3://bucket/key`` URI into bucket and key.
+
+    The key is everything after the first slash following the bucket, taken
+    verbatim; unlike with urlparse, ``?`` and ``#`` are ordinary characters
+    of an object key.
+
+    Args:
+        uri: ``s3://bucket/key`` URI
+
+    Returns:
+        Tuple containing (bucket_name, object_key)
+
+    Raises:
+        ValueError: If the URI does not start with ``s3://``
+    """
+    if not uri.startswith("s3://"):
+        raise ValueError(f"Not an S3 URI: {uri}")
+    bucket, _, key = uri[len("s3://"):].partition("/")
+    return bucket, key
+
+def create_s3_client() -> Any:
+    """
+    Create the S3 client selected by the S3_BACKEND environment variable.
+
+    Returns:
+        A boto3 S3 client, or a LocalS3Backend when S3_BACKEND is "local"
+    """
+    if os.environ.get("S3_BACKEND", "s3") == "local":
+        return LocalS3Backend(os.environ["LOCAL_S3_ROOT"])
+    return boto3.client('s3')
@@ -0,0 +1,300 @@
+"""
+Approximate average-by-category from a random sample of the file.
+
+``estimate_average_by_category`` reads a stratified random sample of byte
+blocks instead of the whole CSV: through mmap for local files and ranged GETs
+for ``s3://`` objects, so only the sampled bytes are read or downloaded. The
+data bytes are divided into slots of ``block_bytes``, the slots into
+``sample_blocks`` consecutive strata, and one slot is drawn from each stratum.
+A block holds the rows that start inside it, so blocks never share rows and
+sampling every slot gives the exact result.
+
+Rows of one block are not independent (files are often sorted by region), so
+each block is treated as a cluster: the mean of a category is the ratio of
+its weighted sampled sum to its weighted sampled count, and the standard
+error comes from the variation between blocks, with a finite population
+correction for the fraction of slots read. Counts are scaled up to the whole
+file. Quoted fields spanning several lines are not supported.
+"""
+import io
+import os
+import csv
+import mmap
+import numpy as np
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from statistics import NormalDist
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from loguru import logger
+
+from .lite_engine import average_rows_by_category
+from .quality import QualityReport, log_quality_report
+from .results import SummaryTable
+from .s3_backend import split_s3_uri
+from .settings import DEFAULT_QUALITY_RULES, QualityRule
+
+DEFAULT_SAMPLE_BLOCKS = 64
+DEFAULT_BLOCK_BYTES = 64 * 1024
+DEFAULT_CONFIDENCE = 0.95
+
+# Ranged GETs in flight at once for S3 objects
+RANGE_READ_CONCURRENCY = 16
+
+# Bytes read past the end of a block to complete its last row
+_TAIL_BYTES = 4096
+
+ReadRange = Callable[[int, int], bytes]
+
+
+def estimate_average_by_category(
+    source: str,
+    sample_blocks: Optional[int] = None,
+    block_bytes: Optional[int] = None,
+    confidence: Optional[float] = None,
+    quality_rules: Optional[Sequence[QualityRule]] = None,
+    quality_report: Optional[QualityReport] = None,
+    s3_client: Optional[Any] = None,
+    seed: Optional[int] = None
+) -> SummaryTable:
+    """
+    Estimate the average median house value per ocean_proximity category
+    from a stratified sample of blocks.
+
+    Args:
+        source: Local path or ``s3://bucket/key`` URI of the CSV file
+        sample_blocks: Number of blocks to read; defaults to DEFAULT_SAMPLE_BLOCKS
+        block_bytes: Size of each block; defaults to DEFAULT_BLOCK_BYTES
+        confidence: Confidence level of the intervals; defaults to DEFAULT_CONFIDENCE
+        quality_rules: Range and cap rules applied before aggregation;
+                       defaults to DEFAULT_QUALITY_RULES
+        quality_report: If given, receives the counts of the sampled rows
+        s3_client: Client for ``s3://`` sources (a boto3 client or
+                   LocalS3Backend); defaults to a new boto3 client
+        seed: Seed of the random block selection
+
+    Returns:
+        Table with category, estimated average value and estimated count,
+        plus ci_low, ci_high (NaN when the category was seen in fewer
+        than two of the blocks) and sample_size, the number of sampled rows
+        of each category
+
+    Raises:
+        ValueError: If the data is missing required columns or the
+                    confidence is not between 0 and 1
+        FileNotFoundError: If the file cannot be found
+    """
+    sample_blocks = sample_blocks or DEFAULT_SAMPLE_BLOCKS
+    block_bytes = block_bytes or DEFAULT_BLOCK_BYTES
+    confidence = confidence or DEFAULT_CONFIDENCE
+    if not 0 < confidence < 1:
+        raise ValueError(f"Confidence must be between 0 and 1, got {confidence}")
+
+    rules = DEFAULT_QUALITY_RULES if quality_rules is None else quality_rules
+    report = quality_report if quality_report is not None else QualityReport()
+    logger.info(f"Sampling {sample_blocks} blocks of {block_bytes} bytes from {source}")
+
+    with _open_ranges(source, s3_client) as (size, read):
+        header, data_start = _read_header(read, size)
+        blocks, weights, slots = _choose_blocks(data_start, size, sample_blocks, block_bytes, seed)
+
+        def read_block(block: Tuple[int, int]) -> str:
+            return _block_rows(read, size, *block)
+
+        texts: Iterable[str]
+        if source.startswith("s3://") and len(blocks) > 1:
+            # Ranged GETs are latency bound, so they are issued concurrently
+            with ThreadPoolExecutor(max_workers=min(RANGE_READ_CONCURRENCY, len(blocks))) as pool:
+                texts = list(pool.map(read_block, blocks))
+        else:
+            texts = map(read_block, blocks)
+
+        categories: Dict[str, int] = {}
+        block_sums: List[Dict[int, float]] = []
+        block_counts: List[Dict[int, int]] = []
+        for text in texts:
+            stats = average_rows_by_category(csv.reader(io.StringIO(text)), header, None, rules, report)
+            codes = [categories.setdefault(category, len(categories)) for category in stats.column('category')]
+            counts = stats.column('count')
+            block_sums.append(dict(zip(codes, (stats.column('average_value') * counts).tolist())))
+            block_counts.append(dict(zip(codes, counts.tolist())))
+
+    log_quality_report(report)
+
+    sums = np.zeros((len(blocks), len(categories)))
+    counts = np.zeros((len(blocks), len(categories)))
+    for i, (block_sum, block_count) in enumerate(zip(block_sums, block_counts)):
+        sums[i, list(block_sum)] = list(block_sum.values())
+        counts[i, list(block_count)] = list(block_count.values())
+
+    result = _ratio_estimates(list(categories), sums, counts, weights, 1 - len(blocks) / slots, confidence)
+    logger.info(f"Estimated averages for {len(result)} categories from {int(counts.sum())} sampled rows")
+    return result
+
+def _ratio_estimates(
+    labels: List[str],
+    sums: np.ndarray,
+    counts: np.ndarray,
+    weights: np.ndarray,
+    fpc: float,
+    confidence: float
+) -> SummaryTable:
+    """
+    Combine per-block sums and counts into estimates with confidence intervals.
+
+    Args:
+        labels: Category labels
+        sums: Metric sum per block and category
+        counts: Row count per block and category
+        weights: Inverse selection probability of each block
+        fpc: Finite population correction, 1 - sampled fraction
+        confidence: Confidence level of the intervals
+
+    Returns:
+        Table sorted by category
+    """
+    order = np.argsort(labels, kind='stable') if labels else np.array([], dtype=np.int64)
+    sums, counts = sums[:, order], counts[:, order]
+
+    total_sums = weights @ sums
+    total_counts = weights @ counts
+    means = total_sums / total_counts
+
+    blocks = len(weights)
+    if fpc <= 0:
+        # Every slot was read, so the estimates are exact
+        margin = np.zeros(len(labels))
+    elif blocks > 1:
+        # Linearized variance of a ratio estimator over clusters
+        residuals = weights[:, None] * (sums - means * counts)
+        spread = ((residuals - residuals.mean(axis=0)) ** 2).sum(axis=0)
+        variance = fpc * blocks / (blocks - 1) * spread / total_counts ** 2
+        margin = NormalDist().inv_cdf(0.5 + confidence / 2) * np.sqrt(variance)
+        # Variation between blocks says nothing about a category seen in one block
+        margin = np.where((counts > 0).sum(axis=0) < 2, np.nan, margin)
+    else:
+        margin = np.full(len(labels), np.nan)
+
+    return SummaryTable(
+        [labels[i] for i in order],
+        means,
+        np.rint(total_counts).astype(np.int64),
+        ci_low=means - margin,
+        ci_high=means + margin,
+        sample_size=counts.sum(axis=0).astype(np.int64)
+    )
+
+def _choose_blocks(
+    data_start: int,
+    size: int,
+    sample_blocks: int,
+    block_bytes: int,
+    seed: Optional[int]
+) -> Tuple[List[Tuple[int, int]], np.ndarray, int]:
+    """
+    Draw one slot per stratum.
+
+    Args:
+        data_start: Offset of the first data row
+        size: File size
+        sample_blocks: Number of strata
+        block_bytes: Slot size
+        seed: Random seed
+
+    Returns:
+        (start, end) byte ranges of the chosen slots, the weight of each
+        (the number of slots in its stratum) and the total number of slots
+    """
+    data_bytes = size - data_start
+    if data_bytes <= 0:
+        return [], np.zeros(0), 1
+
+    slots = -(-data_bytes // block_bytes)
+    strata = min(sample_blocks, slots)
+    slot_edges = data_start + np.rint(np.linspace(0, data_bytes, slots + 1)).astype(np.int64)
+    stratum_edges = np.rint(np.linspace(0, slots, strata + 1)).astype(np.int64)
+    sizes = np.diff(stratum_edges)
+
+    rng = np.random.default_rng(seed)
+    chosen = stratum_edges[:-1] + rng.integers(0, sizes)
+    blocks = list(zip(slot_edges[chosen].tolist(), slot_edges[chosen + 1].tolist()))
+    return blocks, sizes.astype(np.float64), slots
+
+def _block_rows(read: ReadRange, size: int, start: int, end: int) -> str:
+    """
+    Read the rows that start within [start, end).
+
+    Reads from the byte before start, to tell whether start begins a row,
+    and continues past end until the last row is complete.
+
+    Args:
+        read: Reads the bytes of a half-open range
+        size: File size
+        start: First byte of the block; at least the first data row's offset
+        end: End of the block
+
+    Returns:
+        The rows as text, including their line endings
+    """
+    offset = start - 1
+    data = read(offset, min(end + _TAIL_BYTES, size))
+    first = data.find(b"\n") + 1
+    if first == 0 or offset + first >= end:
+        return ""
+
+    stop = data.find(b"\n", end - 1 - offset)
+    while stop == -1 and offset + len(data) < size:
+        searched = len(data)
+        data += read(offset + len(data), min(offset + len(data) + _TAIL_BYTES, size))
+        stop = data.find(b"\n", searched)
+
+    return data[first:stop + 1 if stop != -1 else len(data)].decode("utf-8")
+
+def _read_header(read: ReadRange, size: int) -> Tuple[List[str], int]:
+    """
+    Read the header row.
+
+    Returns:
+        Column names and the offset of the first data row
+    """
+    data = b""
+    newline = -1
+    while newline == -1 and len(data) < size:
+        searched = len(data)
+        data += read(len(data), min(len(data) + _TAIL_BYTES, size))
+        newline = data.find(b"\n", searched)
+
+    end = newline + 1 if newline != -1 else len(data)
+    header = next(csv.reader([data[:end].decode("utf-8-sig")]), [])
+    return header, end
+
+@contextmanager
+def _open_ranges(source: str, s3_client: Optional[Any]) -> Iterator[Tuple[int, ReadRange]]:
+    """
+    Open a source for ranged reads.
+
+    Yields:
+        The size of the source and a function reading a half-open byte range
+    """
+    if source.startswith("s3://"):
+        bucket, key = split_s3_uri(source)
+        if s3_client is None:
+            import boto3
+            s3_client = boto3.client("s3")
+
+        def read_object(start: int, end: int) -> bytes:
+            if start >= end:
+                return b""
+            response = s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end - 1}")
+            return response["Body"].read()
+
+        yield s3_client.head_object(Bucket=bucket, Key=key)["ContentLength"], read_object
+        return
+
+    with open(source, "rb") as csv_file:
+        size = os.fstat(csv_file.fileno()).st_size
+        if size == 0:
+            yield 0, lambda start, end: b""
+            return
+        with mmap.mmap(csv_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield size, lambda start, end: mapped[start:end]
+
@@ -0,0 +1,181 @@
+"""
+Configuration for the processing pipeline.
+
+Settings are read from environment variables prefixed with ``HOUSING_`` and,
+optionally, from a JSON file named by ``HOUSING_CONFIG_FILE``. Environment
+variables take precedence over the file. Complex values such as the list of
+aggregations are given as JSON, e.g.::
+
+    HOUSING_AGGREGATIONS='[{"name": "value_by_proximity_and_age",
+                            "group_by": ["ocean_proximity",
+                                         {"column": "housing_median_age", "bins": [0, 10, 20, 30, 40, 53]}],
+                            "metric": "median_house_value"}]'
+"""
+import os
+from functools import lru_cache
+from typing import List, Literal, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+from pydantic_settings import (
+    BaseSettings,
+    JsonConfigSettingsSource,
+    PydanticBaseSettingsSource,
+    SettingsConfigDict
+)
+
+DEFAULT_REPORT = "average_by_ocean_proximity"
+
+
+class GroupKey(BaseModel):
+    """
+    A group-by key: a categorical column, or a numeric (possibly derived)
+    column cut into bins.
+    """
+
+    column: str
+    bins: Optional[List[float]] = Field(
+        default=None,
+        description="Increasing bin edges; values fall into [edge_i, edge_i+1)"
+    )
+
+    @field_validator('bins')
+    @classmethod
+    def _check_bins(cls, bins: Optional[List[float]]) -> Optional[List[float]]:
+        if bins is not None:
+            if len(bins) < 2:
+                raise ValueError("bins needs at least two edges")
+            if any(lo >= hi for lo, hi in zip(bins, bins[1:])):
+                raise ValueError("bin edges must be strictly increasing")
+        return bins
+
+
+class AggregationSpec(BaseModel):
+    """
+    One report: the mean and count of a metric per combination of keys.
+    """
+
+    name: str = Field(max_length=100)
+    group_by: List[GroupKey] = Field(min_length=1)
+    metric: str = 'median_house_value'
+
+    @field_validator('group_by', mode='before')
+    @classmethod
+    def _coerce_keys(cls, keys: List[Union[str, dict, GroupKey]]) -> List[Union[dict, GroupKey]]:
+        # Plain strings are shorthand for a categorical key
+        return [{'column': key} if isinstance(key, str) else key for key in keys]
+
+
+class QualityRule(BaseModel):
+    """
+    A per-column data-quality rule.
+
+    ``range`` rules fail values outside [min, max]; ``cap`` rules fail values
+    at or above ``cap`` (e.g. the 500001 top-coding of median_house_value).
+    Failing rows are dropped for ``reject`` rules and only counted for ``flag``
+    rules. Null values never fail these rules; nulls are handled by the
+    required-column check.
+    """
+
+    column: str
+    kind: Literal['range', 'cap']
+    min: Optional[float] = None
+    max: Optional[float] = None
+    cap: Optional[float] = None
+    action: Literal['reject', 'flag'] = 'reject'
+    name: Optional[str] = None
+
+    @model_validator(mode='after')
+    def _check_bounds(self) -> 'QualityRule':
+        # A rule without its bounds would silently never fail
+        if self.kind == 'cap':
+            if self.cap is None:
+                raise ValueError(f"cap rule on {self.column} needs a cap")
+            if self.min is not None or self.max is not None:
+                raise ValueError(f"cap rule on {self.column} takes cap, not min or max")
+        else:
+            if self.min is None and self.max is None:
+                raise ValueError(f"range rule on {self.column} needs min, max or both")
+            if self.cap is not None:
+                raise ValueError(f"range rule on {self.column} takes min and max, not cap")
+            if self.min is not None and self.max is not None and self.min > self.max:
+                raise ValueError(f"range rule on {self.column} has min above max")
+        return self
+
+    @property
+    def label(self) -> str:
+        """
+        Name used in rejection counts.
+        """
+        return self.name or f"{self.kind}:{self.column}"
+
+
+DEFAULT_QUALITY_RULES = [
+    QualityRule(column='median_house_value', kind='range', min=1),
+    QualityRule(column='housing_median_age', kind='range', min=0),
+    QualityRule(column='longitude', kind='range', min=-125, max=-114),
+    QualityRule(column='latitude', kind='range', min=32, max=42.5),
+    QualityRule(column='median_house_value', kind='cap', cap=500001, action='flag'),
+    QualityRule(column='housing_median_age', kind='cap', cap=52, action='flag'),
+]
+
+
+DEFAULT_AGGREGATIONS = [
+    AggregationSpec(name=DEFAULT_REPORT, group_by=['ocean_proximity'], metric='median_house_value')
+]
+
+
+class ProcessingSettings(BaseSettings):
+    """
+    Settings for the processing pipeline.
+    """
+
+    model_config = SettingsConfigDict(env_prefix='HOUSING_', extra='ignore')
+
+    engine: Literal['pandas', 'lite'] = 'pandas'
+    aggregations: List[AggregationSpec] = Field(default_factory=lambda: list(DEFAULT_AGGREGATIONS), min_length=1)
+    quality_rules: List[QualityRule] = Field(default_factory=lambda: list(DEFAULT_QUALITY_RULES))
+    chunksize: Optional[int] = None
+    memory_budget_bytes: Optional[int] = None
+    spill_dir: Optional[str] = None
+    # Store sampled estimates of the default report as provisional results
+    # before the exact job; unset sampling options use the sampling defaults
+    provisional_estimates: bool = False
+    sample_blocks: Optional[int] = Field(default=None, gt=0)
+    sample_block_bytes: Optional[int] = Field(default=None, gt=0)
+    sample_confidence: Optional[float] = Field(default=None, gt=0, lt=1)
+
+    @model_validator(mode='after')
+    def _check_spill_reports(self) -> 'ProcessingSettings':
+        # Spill mode is implemented for the default report only
+        if self.memory_budget_bytes and self.aggregations != DEFAULT_AGGREGATIONS:
+            raise ValueError(
+                "memory_budget_bytes only supports the default report; "
+                "unset it or remove the custom aggregations"
+            )
+        return self
+
+    @classmethod
+    def settings_customise_sources(
+        cls,
+        settings_cls: Type[BaseSettings],
+        init_settings: PydanticBaseSettingsSource,
+        env_settings: PydanticBaseSettingsSource,
+        dotenv_settings: PydanticBaseSettingsSource,
+        file_secret_settings: PydanticBaseSettingsSource
+    ) -> Tuple[PydanticBaseSettingsSource, ...]:
+        sources: Tuple[PydanticBaseSettingsSource, ...] = (init_settings, env_settings)
+        config_file = os.environ.get('HOUSING_CONFIG_FILE')
+        if config_file:
+            sources += (JsonConfigSettingsSource(settings_cls, json_file=config_file),)
+        return sources
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> ProcessingSettings:
+    """
+    Load the settings once per container.
+
+    Returns:
+        The processing settings
+    """
+    return ProcessingSettings()
@@ -0,0 +1,256 @@
+"""
+Memory-bounded aggregation that spills sorted runs to local disk.
+
+Rows are buffered until the buffer crosses the memory budget, then sorted by
+(key, value) and written to the spill directory as a run of ``.npy`` files.
+At the end the runs are memory-mapped and merged key by key: counts and sums
+come from per-run partial aggregates, and exact medians are found by rank
+selection across the sorted runs, so the rows never have to be resident at
+once.
+
+What the budget bounds is the size of the buffered key and value arrays, not
+the memory of the process: the chunk being read, the sort of a run and the
+pages of the memory-mapped runs come on top of it. The results hold Python
+lists over every distinct key, so memory still grows with the number of keys,
+which is small for the categories grouped here.
+"""
+import os
+import heapq
+import shutil
+import tempfile
+import numpy as np
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from loguru import logger
+
+from .results import SummaryTable
+
+DEFAULT_MEMORY_BUDGET_BYTES = 64 * 1024 * 1024
+
+
+class _Run:
+    """
+    A sorted run: values ordered by (key, value) plus per-key partials.
+    """
+
+    def __init__(self, keys: np.ndarray, offsets: np.ndarray, sums: np.ndarray, values: np.ndarray):
+        self.keys = keys
+        self.offsets = offsets
+        self.sums = sums
+        self.values = values
+
+    @classmethod
+    def build(cls, keys: np.ndarray, values: np.ndarray) -> '_Run':
+        """
+        Sort buffered rows and compute the per-key partial aggregates.
+        """
+        order = np.lexsort((values, keys))
+        keys = keys[order]
+        values = values[order]
+
+        starts = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+        starts = np.concatenate([[0], starts]).astype(np.int64)
+        offsets = np.concatenate([starts, [len(values)]]).astype(np.int64)
+
+        return cls(keys[starts], offsets, np.add.reduceat(values, starts), values)
+
+    def save(self, directory: str, index: int) -> '_Run':
+        """
+        Write the run to disk and return a memory-mapped view of it.
+        """
+        paths = {}
+        for name in ('keys', 'offsets', 'sums', 'values'):
+            paths[name] = os.path.join(directory, f"run-{index:05d}.{name}.npy")
+            np.save(paths[name], getattr(self, name))
+
+        return _Run(*(np.load(paths[name], mmap_mode='r') for name in ('keys', 'offsets', 'sums', 'values')))
+
+
+class SpillingAggregator:
+    """
+    Per-key count, mean and exact median, spilling buffered rows to disk
+    once they exceed a budget.
+    """
+
+    def __init__(
+        self,
+        memory_budget_bytes: int = DEFAULT_MEMORY_BUDGET_BYTES,
+        spill_dir: Optional[str] = None,
+        track_median: bool = True
+    ):
+        """
+        Initialize the aggregator.
+
+        Args:
+            memory_budget_bytes: Size of buffered rows that triggers a spill
+            spill_dir: Directory under which spill files are created; defaults
+                       to the system temporary directory (/tmp on Lambda)
+            track_median: Whether to compute exact medians
+        """
+        self.memory_budget_bytes = memory_budget_bytes
+        self.spill_dir = spill_dir
+        self.track_median = track_median
+        self.runs: List[_Run] = []
+        self._buffer: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._buffered_bytes = 0
+        self._directory: Optional[str] = None
+
+    def __enter__(self) -> 'SpillingAggregator':
+        return self
+
+    def __exit__(self, exc_type: Optional[type], exc_val: Optional[Exception], exc_tb: Optional[Any]) -> None:
+        self.close()
+
+    @property
+    def spilled_runs(self) -> int:
+        """
+        Number of runs written to disk so far.
+        """
+        return len(self.runs)
+
+    def update(self, keys: np.ndarray, values: np.ndarray) -> None:
+        """
+        Buffer a batch of rows, spilling to disk if the budget is exceeded.
+
+        Args:
+            keys: Key per row; converted to a fixed-width string array
+            values: Numeric value per row
+        """
+        keys = np.asarray(keys, dtype=np.str_)
+        values = np.asarray(values, dtype=np.float64)
+        if len(keys) == 0:
+            return
+
+        self._buffer.append((keys, values))
+        self._buffered_bytes += keys.nbytes + values.nbytes
+
+        if self._buffered_bytes >= self.memory_budget_bytes:
+            self._spill()
+
+    def results(self) -> SummaryTable:
+        """
+        Merge all runs and compute the final statistics.
+
+        Returns:
+            Table with category, average value, count and, when tracked,
+            median value, ordered by category
+        """
+        runs = list(self.runs)
+        if self._buffer:
+            # The last partial buffer is merged from memory without being written
+            runs.append(_Run.build(*self._concat_buffer()))
+
+        categories: List[str] = []
+        totals: List[float] = []
+        counts: List[int] = []
+        medians: List[float] = []
+        for key, slices in _merge_runs(runs):
+            count = sum(int(run.offsets[i + 1] - run.offsets[i]) for run, i in slices)
+            categories.append(str(key))
+            totals.append(sum(float(run.sums[i]) for run, i in slices))
+            counts.append(count)
+            if self.track_median:
+                medians.append(_median(
+                    [run.values[run.offsets[i]:run.offsets[i + 1]] for run, i in slices],
+                    count
+                ))
+
+        counts_array = np.asarray(counts, dtype=np.int64)
+        extra = {'median_value': np.asarray(medians, dtype=np.float64)} if self.track_median else {}
+        return SummaryTable(categories, np.asarray(totals, dtype=np.float64) / counts_array, counts_array, **extra)
+
+    def close(self) -> None:
+        """
+        Remove the spill files.
+        """
+        self.runs = []
+        self._buffer = []
+        self._buffered_bytes = 0
+        if self._directory:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+
+    def _concat_buffer(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Concatenate and clear the buffered batches.
+        """
+        keys = np.concatenate([batch_keys for batch_keys, _ in self._buffer])
+        values = np.concatenate([batch_values for _, batch_values in self._buffer])
+        self._buffer = []
+        self._buffered_bytes = 0
+        return keys, values
+
+    def _spill(self) -> None:
+        """
+        Sort the buffer and write it to disk as a new run.
+        """
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix='housing-spill-', dir=self.spill_dir)
+
+        buffered_bytes = self._buffered_bytes
+        run = _Run.build(*self._concat_buffer())
+        self.runs.append(run.save(self._directory, len(self.runs)))
+        logger.info(f"Spilled run {len(self.runs)} ({buffered_bytes} bytes) to {self._directory}")
+
+
+def _merge_runs(runs: List[_Run]) -> Iterator[Tuple[Any, List[Tuple[_Run, int]]]]:
+    """
+    K-way merge of the runs' sorted key tables.
+
+    Yields:
+        Tuples of (key, [(run, key index), ...]) in key order
+    """
+    streams = [_key_stream(run, run_index) for run_index, run in enumerate(runs)]
+
+    current_key = None
+    slices: List[Tuple[_Run, int]] = []
+    for key, run_index, i in heapq.merge(*streams):
+        if slices and key != current_key:
+            yield current_key, slices
+            slices = []
+        current_key = key
+        slices.append((runs[run_index], i))
+
+    if slices:
+        yield current_key, slices
+
+def _key_stream(run: _Run, run_index: int) -> Iterator[Tuple[Any, int, int]]:
+    """
+    Iterate over a run's keys tagged with the run and key index.
+    """
+    for i, key in enumerate(run.keys):
+        yield key, run_index, i
+
+def _median(sorted_slices: List[np.ndarray], count: int) -> float:
+    """
+    Exact median across several sorted arrays.
+    """
+    if count % 2:
+        return _select_kth(sorted_slices, count // 2)
+    return (_select_kth(sorted_slices, count // 2 - 1) + _select_kth(sorted_slices, count // 2)) / 2
+
+def _select_kth(sorted_slices: List[np.ndarray], k: int) -> float:
+    """
+    Find the k-th smallest (zero-based) value across sorted arrays without
+    merging them, using a pivot from the largest remaining range and binary
+    searches to count elements on each side.
+    """
+    lo = [0] * len(sorted_slices)
+    hi = [len(values) for values in sorted_slices]
+
+    while True:
+        largest = max(range(len(sorted_slices)), key=lambda j: hi[j] - lo[j])
+        pivot = sorted_slices[largest][(lo[largest] + hi[largest]) // 2]
+
+        below = [lo[j] + int(np.searchsorted(values[lo[j]:hi[j]], pivot, 'left')) for j, values in enumerate(sorted_slices)]
+        upto = [lo[j] + int(np.searchsorted(values[lo[j]:hi[j]], pivot, 'right')) for j, values in enumerate(sorted_slices)]
+
+        n_below = sum(b - l for b, l in zip(below, lo))
+        n_upto = sum(u - l for u, l in zip(upto, lo))
+
+        if k < n_below:
+            hi = below
+        elif k < n_upto:
+            return float(pivot)
+        else:
+            k -= n_upto
+            lo = upto
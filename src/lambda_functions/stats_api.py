@@ -0,0 +1,248 @@
+"""
+Read API for the latest housing summary statistics.
+
+Results of ``query_latest_statistics`` are kept in an in-process LRU cache.
+Entries are invalidated when the statistics version counter moves (any
+``store_summary_statistics`` call in this process) or when their TTL expires,
+which bounds staleness for writes made by other containers. Cache hits do not
+touch the database.
+"""
+import os
+import json
+import time
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+from loguru import logger
+
+from .db_connector import RDSConnector, get_statistics_version
+from .settings import DEFAULT_REPORT
+from .utils import get_db_credentials
+
+DEFAULT_TTL_SECONDS = float(os.environ.get("STATS_CACHE_TTL_SECONDS", "60"))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("STATS_CACHE_MAX_ENTRIES", "32"))
+
+# Latencies kept per kind for latency_stats; older ones are only counted
+LATENCY_WINDOW = 1024
+
+
+class TTLCache:
+    """
+    A small thread-safe LRU cache whose entries expire after a TTL or
+    when the version they were stored under changes.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of entries kept before evicting the least recently used
+            ttl_seconds: Lifetime of an entry in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[Hashable, Tuple[float, int, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: int) -> Tuple[bool, Any]:
+        """
+        Look up a key.
+
+        Args:
+            key: Cache key
+            version: Current statistics version
+
+        Returns:
+            Tuple of (found, value)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+
+            expires_at, entry_version, value = entry
+            if entry_version != version or expires_at <= time.monotonic():
+                del self._entries[key]
+                return False, None
+
+            self._entries.move_to_end(key)
+            return True, value
+
+    def put(self, key: Hashable, version: int, value: Any) -> None:
+        """
+        Store a value under the given version.
+
+        Args:
+            key: Cache key
+            version: Statistics version the value was read at
+            value: Value to cache
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Drop all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+class StatisticsReader:
+    """
+    Cached read access to the summary statistics table.
+    """
+
+    def __init__(
+        self,
+        connector_factory: Optional[Callable[[], RDSConnector]] = None,
+        cache: Optional[TTLCache] = None,
+        latency_window: int = LATENCY_WINDOW
+    ):
+        """
+        Initialize the reader.
+
+        Args:
+            connector_factory: Callable returning a connector to use as a context
+                               manager on cache misses; defaults to an RDSConnector
+                               built from get_db_credentials()
+            cache: Cache instance to use; defaults to a TTLCache with default settings
+            latency_window: Number of recent latencies kept per kind
+        """
+        self.connector_factory = connector_factory or (lambda: RDSConnector(get_db_credentials()))
+        self.cache = cache if cache is not None else TTLCache()
+        self._latencies: Dict[str, Deque[float]] = {
+            "hit": deque(maxlen=latency_window),
+            "miss": deque(maxlen=latency_window)
+        }
+        self._counts: Dict[str, int] = {"hit": 0, "miss": 0}
+        self._latencies_lock = threading.Lock()
+
+    def query_latest_statistics(self, report: str = DEFAULT_REPORT) -> List[Tuple[Any, ...]]:
+        """
+        Get the latest statistics for each category, from cache when possible.
+
+        Args:
+            report: Name of the report to query
+
+        Returns:
+            List of tuples containing the latest statistics; a copy, so
+            callers cannot change the cached entry
+        """
+        start = time.perf_counter()
+        version = get_statistics_version()
+        key = ("latest_statistics", report)
+
+        found, results = self.cache.get(key, version)
+        if not found:
+            with self.connector_factory() as db:
+                results = db.query_latest_statistics(report)
+            self.cache.put(key, version, results)
+
+        self._record_latency("hit" if found else "miss", time.perf_counter() - start)
+        return list(results)
+
+    def invalidate(self) -> None:
+        """
+        Drop every cached result.
+        """
+        self.cache.clear()
+
+    def latency_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarize the measured latencies of cache hits and misses.
+
+        The count covers every call; the mean, median and maximum cover the
+        most recent latency_window calls of each kind.
+
+        Returns:
+            Dictionary keyed by "hit"/"miss" with count, mean_ms, p50_ms and max_ms
+        """
+        with self._latencies_lock:
+            snapshot = {kind: list(values) for kind, values in self._latencies.items()}
+            counts = dict(self._counts)
+
+        summary = {}
+        for kind, values in snapshot.items():
+            if not values:
+                summary[kind] = {"count": counts[kind], "mean_ms": 0.0, "p50_ms": 0.0, "max_ms": 0.0}
+                continue
+            values.sort()
+            summary[kind] = {
+                "count": counts[kind],
+                "mean_ms": sum(values) / len(values) * 1000,
+                "p50_ms": values[len(values) // 2] * 1000,
+                "max_ms": values[-1] * 1000
+            }
+        return summary
+
+    def _record_latency(self, kind: str, seconds: float) -> None:
+        """
+        Record the latency of one call.
+        """
+        with self._latencies_lock:
+            self._latencies[kind].append(seconds)
+            self._counts[kind] += 1
+
+
+# Shared by all invocations of a warm container
+_default_reader: Optional[StatisticsReader] = None
+
+
+def get_latest_statistics(report: str = DEFAULT_REPORT) -> List[Tuple[Any, ...]]:
+    """
+    Get the latest statistics through the process-wide cached reader.
+
+    Args:
+        report: Name of the report to query
+
+    Returns:
+        List of tuples containing the latest statistics
+    """
+    global _default_reader
+    if _default_reader is None:
+        _default_reader = StatisticsReader()
+    return _default_reader.query_latest_statistics(report)
+
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler returning the latest statistics as JSON.
+
+    Args:
+        event: The event dict from AWS Lambda trigger
+        context: The Lambda context object
+
+    Returns:
+        Dict containing status and the latest statistics
+    """
+    try:
+        report = (event.get("queryStringParameters") or {}).get("report", DEFAULT_REPORT)
+        results = get_latest_statistics(report)
+        statistics = [
+            {
+                "category": category,
+                "average_value": float(average_value),
+                "count": int(record_count),
+                "processed_at": processed_at.isoformat(),
+                "provisional": bool(provisional)
+            }
+            for category, average_value, record_count, processed_at, provisional in results
+        ]
+        return {
+            "statusCode": 200,
+            "body": json.dumps({"report": report, "statistics": statistics})
+        }
+    except Exception as e:
+        logger.error(f"Error reading housing statistics: {str(e)}")
+        return {
+            "statusCode": 500,
+            "body": json.dumps({
+                "message": "Error reading housing statistics",
+                "error": str(e)
+            })
+        }
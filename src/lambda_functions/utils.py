@@ -1,12 +1,26 @@
 """
 Utility functions for the California Housing data processing pipeline.
 """
+import io
 import os
+import csv
 import json
 import boto3
-from typing import Dict
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, TextIO, Tuple, Union
 from loguru import logger
 
+from .results import SummaryTable
+
+QueryResults = Union[Sequence[Tuple[Any, ...]], SummaryTable]
+
+OUTPUT_FORMATS = ('table', 'csv', 'json')
+
+# Number of rows rendered per yielded chunk of formatted output
+FORMAT_BATCH_SIZE = 1000
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
 def setup_logging() -> None:
     """
     Set up and configure the logger.
@@ -38,7 +52,7 @@ def get_db_credentials() -> Dict[str, str]:
             "host": os.environ["DB_HOST"],
             "port": os.environ.get("DB_PORT", "5432"),
             "dbname": os.environ["DB_NAME"],
-            "user": os.environ["DB_USER"],
+            "username": os.environ["DB_USER"],
             "password": os.environ["DB_PASSWORD"]
         }
 
@@ -66,37 +80,198 @@ def _get_secret_from_secrets_manager(secret_name: str) -> Dict[str, str]:
         logger.error(f"Error retrieving secret from Secrets Manager: {str(e)}")
         raise
 
-def format_query_results(results):
-        """
-        Format database query results into a readable string.
-        
-        Args:
-            results: List of tuples containing query results
-            
-        Returns:
-            Formatted string representation of the results
-        """
-        if not results:
-            return "No results found."
-        
-        # Extract timestamp from first record (they should all be the same)
-        timestamp = results[0][3].strftime('%Y-%m-%d %H:%M:%S')
+def format_query_results(results: QueryResults, output_format: str = 'table') -> str:
+    """
+    Format database query results into a readable string.
+    
+    Args:
+        results: List of tuples containing query results
+                 (category, average_value, record_count, processed_at),
+                 or a SummaryTable
+        output_format: One of 'table', 'csv' or 'json'
         
-        # Create header
-        header = f"California Housing Data Summary (processed at {timestamp})\n"
-        header += "-" * 80 + "\n"
-        header += f"{'Category':<15} {'Average Value ($)':>20} {'Record Count':>15}\n"
-        header += "-" * 80
+    Returns:
+        Formatted string representation of the results
+    """
+    return "".join(iter_query_results(results, output_format))
+
+def write_query_results(results: QueryResults, stream: TextIO, output_format: str = 'table') -> None:
+    """
+    Write formatted query results to a file-like object chunk by chunk,
+    without joining the whole report into one string first. The results
+    themselves are held in memory; see iter_query_results.
+    
+    Args:
+        results: List of tuples containing query results, or a SummaryTable
+        stream: Writable text stream
+        output_format: One of 'table', 'csv' or 'json'
+    """
+    for chunk in iter_query_results(results, output_format):
+        stream.write(chunk)
+
+def iter_query_results(results: QueryResults, output_format: str = 'table') -> Iterator[str]:
+    """
+    Render query results in batches of rows.
+    
+    The results are transposed into columns up front (a SummaryTable already
+    is columnar), so they must be a sequence rather than a one-shot iterator
+    and are held in memory in full; the table header needs every timestamp
+    before the first row anyway. Only the formatted output is produced
+    batch by batch. Each distinct timestamp is formatted once and every row
+    keeps its own timestamp.
+    
+    Args:
+        results: List of tuples containing query results, or a SummaryTable
+        output_format: One of 'table', 'csv' or 'json'
         
-        # Format each row
-        rows = []
-        for category, avg_value, count, _ in results:
-            # Format the average value with commas and 2 decimal places
-            formatted_value = f"${float(avg_value):,.2f}"
-            formatted_count = f"{count:,}"
-            rows.append(f"{category:<15} {formatted_value:>20} {formatted_count:>15}")
+    Yields:
+        Consecutive pieces of the formatted output
         
-        # Combine everything
-        formatted_result = header + "\n" + "\n".join(rows)
+    Raises:
+        ValueError: If the output format is not supported
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format}. Expected one of {', '.join(OUTPUT_FORMATS)}")
+    
+    if output_format == 'table' and not results:
+        yield "No results found."
+        return
+    
+    columns = _to_columns(results)
+    
+    if output_format == 'table':
+        yield from _iter_table(*columns)
+    elif output_format == 'csv':
+        yield from _iter_csv(*columns)
+    else:
+        yield from _iter_json(*columns)
+
+def _to_columns(results: QueryResults) -> Tuple[Sequence[Any], Sequence[Any], Sequence[Any], List[str]]:
+    """
+    Transpose result rows into columns and format the timestamps.
+    
+    Tables without a processed_at column hold results that are not stored
+    yet; they are shown as processed now.
+    
+    Args:
+        results: List of tuples containing query results, or a SummaryTable
         
-        return formatted_result
\ No newline at end of file
+    Returns:
+        Tuple of (categories, average values, counts, formatted timestamps)
+    """
+    if not results:
+        return (), (), (), []
+    
+    if isinstance(results, SummaryTable):
+        categories = results.column('category')
+        values = results.column('average_value')
+        counts = results.column('count').tolist()
+        if 'processed_at' in results.columns:
+            timestamps = results.column('processed_at').tolist()
+        else:
+            timestamps = [datetime.utcnow()] * len(results)
+    else:
+        categories, values, counts, timestamps = tuple(zip(*results))[:4]
+    
+    # Rows usually share a handful of timestamps; format each only once
+    formatted = {timestamp: timestamp.strftime(TIMESTAMP_FORMAT) for timestamp in set(timestamps)}
+    
+    return categories, values, counts, [formatted[timestamp] for timestamp in timestamps]
+
+def _batches(size: int) -> Iterator[slice]:
+    """
+    Split a column length into consecutive slices of FORMAT_BATCH_SIZE rows.
+    """
+    for start in range(0, size, FORMAT_BATCH_SIZE):
+        yield slice(start, start + FORMAT_BATCH_SIZE)
+
+def _iter_table(
+    categories: Sequence[Any],
+    values: Sequence[Any],
+    counts: Sequence[Any],
+    timestamps: List[str]
+) -> Iterator[str]:
+    """
+    Render the results as a fixed-width text table.
+    """
+    distinct_timestamps = set(timestamps)
+    per_row_timestamps = len(distinct_timestamps) > 1
+    
+    # Create header
+    if per_row_timestamps:
+        header = (
+            f"California Housing Data Summary (processed between "
+            f"{min(distinct_timestamps)} and {max(distinct_timestamps)})\n"
+        )
+    else:
+        header = f"California Housing Data Summary (processed at {timestamps[0]})\n"
+    header += "-" * 80 + "\n"
+    header += f"{'Category':<15} {'Average Value ($)':>20} {'Record Count':>15}"
+    if per_row_timestamps:
+        header += f" {'Processed At':>20}"
+    header += "\n" + "-" * 80
+    yield header
+    
+    format_value = "${:,.2f}".format
+    format_count = "{:,}".format
+    if per_row_timestamps:
+        format_row = "{:<15} {:>20} {:>15} {:>20}".format
+    else:
+        format_row = "{:<15} {:>20} {:>15}".format
+    
+    for batch in _batches(len(categories)):
+        formatted_values = map(format_value, map(float, values[batch]))
+        formatted_counts = map(format_count, counts[batch])
+        if per_row_timestamps:
+            rows = map(format_row, categories[batch], formatted_values, formatted_counts, timestamps[batch])
+        else:
+            rows = map(format_row, categories[batch], formatted_values, formatted_counts)
+        yield "\n" + "\n".join(rows)
+
+def _iter_csv(
+    categories: Sequence[Any],
+    values: Sequence[Any],
+    counts: Sequence[Any],
+    timestamps: List[str]
+) -> Iterator[str]:
+    """
+    Render the results as CSV with a header row.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(['category', 'average_value', 'record_count', 'processed_at'])
+    
+    for batch in _batches(len(categories)):
+        writer.writerows(zip(categories[batch], values[batch], counts[batch], timestamps[batch]))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    
+    # Flush the header when there are no rows
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def _iter_json(
+    categories: Sequence[Any],
+    values: Sequence[Any],
+    counts: Sequence[Any],
+    timestamps: List[str]
+) -> Iterator[str]:
+    """
+    Render the results as a JSON array of objects.
+    """
+    yield "["
+    separator = ""
+    for batch in _batches(len(categories)):
+        objects = map(
+            lambda category, value, count, timestamp: json.dumps({
+                'category': category,
+                'average_value': float(value),
+                'record_count': int(count),
+                'processed_at': timestamp
+            }),
+            categories[batch], values[batch], counts[batch], timestamps[batch]
+        )
+        yield separator + ",\n".join(objects)
+        separator = ",\n"
+    yield "]"
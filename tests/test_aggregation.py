@@ -0,0 +1,189 @@
+"""
+Unit tests for the categorical aggregation module.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.lambda_functions.aggregation import CategoricalAggregator, run_aggregations, spec_columns
+from src.lambda_functions.data_processor import (
+    _FrameColumns,
+    _groupby_average_by_category,
+    process_california_housing_data,
+    process_housing_reports
+)
+from src.lambda_functions.settings import (
+    AggregationSpec,
+    DEFAULT_AGGREGATIONS,
+    DEFAULT_REPORT,
+    ProcessingSettings
+)
+
+
+def test_categorical_aggregator_keeps_codes_across_batches():
+    """Test that categories keep their codes when seen in later batches"""
+    aggregator = CategoricalAggregator()
+    aggregator.update(['NEAR BAY', 'INLAND'], np.array([0, 1, 0]), np.array([100.0, 50.0, 300.0]))
+    aggregator.update(['INLAND', 'ISLAND'], np.array([0, 1, 0]), np.array([150.0, 400.0, 100.0]))
+
+    assert aggregator.codes == {'NEAR BAY': 0, 'INLAND': 1, 'ISLAND': 2}
+    assert aggregator.results() == [
+        {'category': 'INLAND', 'average_value': 100.0, 'count': 3},
+        {'category': 'ISLAND', 'average_value': 400.0, 'count': 1},
+        {'category': 'NEAR BAY', 'average_value': 200.0, 'count': 2},
+    ]
+
+def test_categorical_aggregator_ignores_null_codes():
+    """Test that rows with a negative code are skipped"""
+    aggregator = CategoricalAggregator()
+    aggregator.update(['INLAND'], np.array([0, -1, 0]), np.array([10.0, 99.0, 20.0]))
+
+    assert aggregator.results() == [{'category': 'INLAND', 'average_value': 15.0, 'count': 2}]
+
+def test_categorical_aggregator_merge():
+    """Test merging aggregators built from different files"""
+    first = CategoricalAggregator()
+    first.update(['A', 'B'], np.array([0, 1]), np.array([1.0, 2.0]))
+    second = CategoricalAggregator()
+    second.update(['C', 'A'], np.array([0, 1, 1]), np.array([3.0, 5.0, 6.0]))
+
+    first.merge(second)
+    result = {item['category']: (item['average_value'], item['count']) for item in first.results()}
+
+    assert result == {'A': (4.0, 3), 'B': (2.0, 1), 'C': (3.0, 1)}
+
+def test_categorical_aggregator_matches_groupby():
+    """Test that the categorical engine agrees with the pandas groupby path"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'ocean_proximity': rng.choice(['<1H OCEAN', 'INLAND', 'ISLAND', 'NEAR BAY', 'NEAR OCEAN'], 10_000),
+        'median_house_value': rng.uniform(15_000, 500_001, 10_000)
+    })
+    codes, uniques = pd.factorize(df['ocean_proximity'])
+    aggregator = CategoricalAggregator()
+    aggregator.update(uniques, codes, df['median_house_value'].to_numpy())
+
+    expected = _groupby_average_by_category(df)
+    result = aggregator.results()
+
+    assert [item['category'] for item in result] == [item['category'] for item in expected]
+    assert [item['count'] for item in result] == [item['count'] for item in expected]
+    np.testing.assert_allclose(
+        [item['average_value'] for item in result],
+        [item['average_value'] for item in expected],
+        rtol=1e-12
+    )
+
+@pytest.fixture
+def housing_frame():
+    """Create a frame with the columns used by the derived features"""
+    rng = np.random.default_rng(3)
+    rows = 2_000
+    return pd.DataFrame({
+        'ocean_proximity': rng.choice(['<1H OCEAN', 'INLAND', 'NEAR BAY'], rows),
+        'housing_median_age': rng.integers(1, 53, rows).astype(float),
+        'total_rooms': rng.integers(100, 5_000, rows).astype(float),
+        'total_bedrooms': rng.integers(20, 1_000, rows).astype(float),
+        'households': rng.integers(10, 1_000, rows).astype(float),
+        'median_house_value': rng.uniform(15_000, 500_001, rows)
+    })
+
+def test_multi_key_spec_with_bins_matches_pandas(housing_frame):
+    """Test a categorical x binned key report against pandas groupby with pd.cut"""
+    edges = [0, 10, 20, 30, 40, 53]
+    spec = AggregationSpec(
+        name='value_by_proximity_and_age',
+        group_by=['ocean_proximity', {'column': 'housing_median_age', 'bins': edges}]
+    )
+    frame = housing_frame.astype({'ocean_proximity': 'category'})
+
+    result = run_aggregations(_FrameColumns(frame), [spec])['value_by_proximity_and_age']
+
+    expected = housing_frame.groupby(
+        [housing_frame['ocean_proximity'], pd.cut(housing_frame['housing_median_age'], edges, right=False)],
+        observed=True
+    )['median_house_value'].agg(['mean', 'count'])
+    assert len(result) == len(expected)
+    for item, ((category, interval), row) in zip(result, expected.iterrows()):
+        assert item['keys'] == {
+            'ocean_proximity': category,
+            'housing_median_age_bin': f"[{interval.left:g}, {interval.right:g})"
+        }
+        assert item['category'] == f"{category} | [{interval.left:g}, {interval.right:g})"
+        assert item['count'] == row['count']
+        assert item['average_value'] == pytest.approx(row['mean'], rel=1e-12)
+
+def test_derived_feature_metric(housing_frame):
+    """Test aggregating a derived feature computed from two columns"""
+    spec = AggregationSpec(name='rooms', group_by=['ocean_proximity'], metric='rooms_per_household')
+
+    result = run_aggregations(_FrameColumns(housing_frame), [spec])['rooms']
+
+    derived = housing_frame['total_rooms'] / housing_frame['households']
+    expected = derived.groupby(housing_frame['ocean_proximity']).mean()
+    assert [item['category'] for item in result] == list(expected.index)
+    np.testing.assert_allclose([item['average_value'] for item in result], expected, rtol=1e-12)
+
+def test_spec_columns_expands_derived_features():
+    """Test that the needed input columns include the inputs of derived features"""
+    specs = [
+        AggregationSpec(name='a', group_by=['ocean_proximity'], metric='bedrooms_per_room'),
+        AggregationSpec(name='b', group_by=[{'column': 'rooms_per_household', 'bins': [0, 5, 10]}]),
+    ]
+
+    assert spec_columns(specs) == [
+        'ocean_proximity', 'total_bedrooms', 'total_rooms', 'households', 'median_house_value'
+    ]
+
+def test_process_housing_reports_shares_one_parse(housing_frame, tmp_path):
+    """Test several reports from one file, chunked and unchunked"""
+    csv_path = tmp_path / 'housing.csv'
+    housing_frame.to_csv(csv_path, index=False)
+    specs = list(DEFAULT_AGGREGATIONS) + [
+        AggregationSpec(
+            name='rooms_by_age',
+            group_by=[{'column': 'housing_median_age', 'bins': [0, 25, 53]}],
+            metric='rooms_per_household'
+        )
+    ]
+
+    reports = process_housing_reports(str(csv_path), specs)
+    chunked = process_housing_reports(str(csv_path), specs, chunksize=300)
+
+    assert list(reports) == [DEFAULT_REPORT, 'rooms_by_age']
+    default = [(item['category'], item['count']) for item in reports[DEFAULT_REPORT]]
+    assert default == [(item['category'], item['count']) for item in process_california_housing_data(str(csv_path))]
+    for name in reports:
+        assert [item['count'] for item in chunked[name]] == [item['count'] for item in reports[name]]
+        np.testing.assert_allclose(
+            [item['average_value'] for item in chunked[name]],
+            [item['average_value'] for item in reports[name]],
+            rtol=1e-12
+        )
+
+def test_settings_load_aggregations_from_environment(monkeypatch):
+    """Test that report specs are read from HOUSING_AGGREGATIONS"""
+    monkeypatch.setenv('HOUSING_AGGREGATIONS', json.dumps([
+        {'name': 'by_age', 'group_by': [{'column': 'housing_median_age', 'bins': [0, 20, 60]}]}
+    ]))
+    monkeypatch.setenv('HOUSING_CHUNKSIZE', '5000')
+
+    settings = ProcessingSettings()
+
+    assert settings.chunksize == 5000
+    assert settings.aggregations[0].group_by[0].bins == [0, 20, 60]
+    assert settings.aggregations[0].metric == 'median_house_value'
+    assert ProcessingSettings(_env_prefix='UNSET_').aggregations == DEFAULT_AGGREGATIONS
+
+def test_settings_reject_memory_budget_with_custom_reports(monkeypatch):
+    """Test that spill mode cannot silently drop configured reports"""
+    monkeypatch.setenv('HOUSING_MEMORY_BUDGET_BYTES', '1000000')
+    assert ProcessingSettings().memory_budget_bytes == 1_000_000
+
+    monkeypatch.setenv('HOUSING_AGGREGATIONS', json.dumps([
+        {'name': 'by_age', 'group_by': [{'column': 'housing_median_age', 'bins': [0, 20, 60]}]}
+    ]))
+    with pytest.raises(ValueError, match="memory_budget_bytes"):
+        ProcessingSettings()
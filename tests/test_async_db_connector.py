@@ -0,0 +1,148 @@
+"""
+Unit tests for the asyncpg connector, against a fake pool.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import pytest
+
+from src.lambda_functions.async_db_connector import AsyncRDSConnector
+from src.lambda_functions.db_connector import COPY_COLUMNS
+from src.lambda_functions.results import SummaryTable
+
+DB_CONFIG = {'host': 'localhost', 'port': '5432', 'dbname': 'test', 'username': 'user', 'password': 'secret'}
+
+
+class FakeConnection:
+    """Connection stand-in that records COPYs and statements"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def copy_records_to_table(self, table, records, columns):
+        records = list(records)
+        if self.pool.fail_on and records[0][1] in self.pool.fail_on:
+            raise RuntimeError(f"COPY failed for {records[0][1]}")
+        # Yield so that concurrent stores overlap
+        await asyncio.sleep(0.01)
+        self.pool.copies.append((table, columns, records))
+
+    async def execute(self, query, *args):
+        self.pool.statements.append((query, args))
+
+    async def fetch(self, query, *args):
+        self.pool.statements.append((query, args))
+        return []
+
+
+class FakePool:
+    """Pool stand-in that tracks how many connections are in use at once"""
+
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.copies = []
+        self.statements = []
+        self.in_use = 0
+        self.max_in_use = 0
+
+    @asynccontextmanager
+    async def acquire(self):
+        self.in_use += 1
+        self.max_in_use = max(self.max_in_use, self.in_use)
+        try:
+            yield FakeConnection(self)
+        finally:
+            self.in_use -= 1
+
+def _connector(pool, pool_size=2):
+    connector = AsyncRDSConnector(DB_CONFIG, pool_size=pool_size)
+    connector.pool = pool
+    return connector
+
+def _stats(value):
+    return SummaryTable(['INLAND', 'NEAR BAY'], [value, value + 1], [10, 20])
+
+def test_store_many_limits_concurrency():
+    """Test that at most pool_size batches are stored at once"""
+    pool = FakePool()
+    batches = [(f'report_{i}', _stats(i)) for i in range(7)]
+
+    asyncio.run(_connector(pool, pool_size=2).store_many(batches))
+
+    assert pool.max_in_use == 2
+    assert sorted(records[0][1] for _, _, records in pool.copies) == [f'report_{i}' for i in range(7)]
+
+def test_store_many_awaits_every_batch_and_raises_first_error():
+    """Test that failed batches do not cancel the others and the first error is raised"""
+    pool = FakePool(fail_on={'report_1', 'report_3'})
+    batches = [(f'report_{i}', _stats(i)) for i in range(5)]
+
+    with pytest.raises(RuntimeError, match="report_1"):
+        asyncio.run(_connector(pool).store_many(batches))
+
+    assert sorted(records[0][1] for _, _, records in pool.copies) == ['report_0', 'report_2', 'report_4']
+
+def test_copy_column_order():
+    """Test that records are laid out in the order of COPY_COLUMNS"""
+    pool = FakePool()
+    stats = SummaryTable(['INLAND'], [124805.39], [6496], ci_low=[120000.0], ci_high=[129610.78], sample_size=[512])
+
+    asyncio.run(_connector(pool).store_summary_statistics(stats, report='value', provisional=True))
+
+    [(table, columns, [record])] = pool.copies
+    assert table == 'housing_summary_statistics'
+    assert columns == COPY_COLUMNS
+    row = dict(zip(columns, record))
+    assert len(row['id']) == 32
+    assert {key: row[key] for key in columns if key not in ('id', 'processed_at')} == {
+        'report': 'value',
+        'category': 'INLAND',
+        'average_value': 124805.39,
+        'record_count': 6496,
+        'provisional': True,
+        'ci_low': 120000.0,
+        'ci_high': 129610.78,
+        'sample_size': 512,
+        'source': None
+    }
+    # Provisional stores only delete expired provisional rows
+    [(query, (expired_before,))] = pool.statements
+    assert query.lstrip().startswith("DELETE")
+    assert expired_before < row['processed_at']
+
+def test_exact_store_replaces_rows_of_its_source():
+    """Test that exact statistics replace the earlier rows of the same file"""
+    pool = FakePool()
+
+    asyncio.run(_connector(pool).store_summary_statistics(_stats(1.0), report='value', source='s3://bucket/a.csv'))
+
+    [(table, columns, records)] = pool.copies
+    assert {record[columns.index('source')] for record in records} == {'s3://bucket/a.csv'}
+    [(query, args), _] = pool.statements
+    assert args == (['s3://bucket/a.csv'], ['value'])
+
+def test_store_many_batches_carry_their_own_source():
+    """Test that a batch's source overrides the default source"""
+    pool = FakePool()
+    stamp = datetime(2024, 1, 1)
+
+    asyncio.run(_connector(pool).store_many([('value', _stats(1.0), stamp, 'a.csv'), ('value', _stats(2.0))], source='b.csv'))
+
+    stored = {records[0][COPY_COLUMNS.index('source')] for _, _, records in pool.copies}
+    assert stored == {'a.csv', 'b.csv'}
+
+@pytest.mark.parametrize('call', [
+    lambda connector: connector._ensure_table_exists(),
+    lambda connector: connector.store_summary_statistics(_stats(1.0)),
+    lambda connector: connector.store_many([('value', _stats(1.0))]),
+    lambda connector: connector.query_latest_statistics()
+])
+def test_calls_without_pool_raise(call):
+    """Test that every operation fails clearly before the pool is opened"""
+    with pytest.raises(RuntimeError, match="Database connection not established"):
+        asyncio.run(call(AsyncRDSConnector(DB_CONFIG)))
@@ -0,0 +1,124 @@
+"""
+Unit tests for the backfill runner.
+"""
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from src.lambda_functions import backfill
+from src.lambda_functions.backfill import Checkpoint, format_summary, list_sources, run_backfill
+from src.lambda_functions.results import SummaryTable
+from src.lambda_functions.s3_backend import LocalS3Backend
+from src.lambda_functions.settings import DEFAULT_REPORT
+
+SAMPLE_CSV = "median_house_value,ocean_proximity\n100000,NEAR BAY\n200000,INLAND\n300000,NEAR BAY\n"
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Create a directory of small housing files"""
+    directory = tmp_path / 'data'
+    directory.mkdir()
+    for i in range(5):
+        (directory / f'part-{i}.csv').write_text(SAMPLE_CSV)
+    return directory
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_backfill_stores_all_files_in_batches(data_dir, tmp_path, executor):
+    """Test that every file is processed, stored in bulk batches and checkpointed"""
+    stored = []
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoint.jsonl'))
+    sources = list_sources([str(data_dir)])
+
+    summary = run_backfill(sources, stored.append, workers=2, executor=executor, checkpoint=checkpoint, batch_rows=4)
+
+    assert summary['files'] == 5
+    assert summary['rows'] == 15
+    assert summary['rows_stored'] == 10
+    # Two statistics rows per file, flushed once four rows are buffered
+    assert [len(batch) for batch in stored] == [2, 2, 1]
+    assert all(report == DEFAULT_REPORT for batch in stored for report, _, _, _ in batch)
+    assert {source for batch in stored for _, _, _, source in batch} == set(sources)
+    assert checkpoint.completed() == set(sources)
+    assert 'Files/sec' in format_summary(summary)
+
+def test_backfill_resumes_from_checkpoint(data_dir, tmp_path):
+    """Test that completed files are skipped and failed files are retried"""
+    (data_dir / 'broken.csv').write_text("population\n1000\n")
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoint.jsonl'))
+    sources = list_sources([str(data_dir)])
+
+    first = run_backfill(sources, lambda batch: None, workers=2, executor='thread', checkpoint=checkpoint)
+    assert (first['files'], first['failed']) == (5, 1)
+    assert 'Missing required columns' in first['error_samples'][0]
+
+    shutil.copyfile(data_dir / 'part-0.csv', data_dir / 'broken.csv')
+    stored = []
+    second = run_backfill(sources, stored.append, workers=2, executor='thread', checkpoint=checkpoint)
+
+    assert (second['files'], second['failed'], second['skipped']) == (1, 0, 5)
+    assert len(stored) == 1
+    assert checkpoint.completed() == set(sources)
+
+def test_dry_run_does_not_checkpoint(data_dir, tmp_path):
+    """Test that a dry run processes files without recording them"""
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoint.jsonl'))
+
+    summary = run_backfill(list_sources([str(data_dir)]), None, workers=1, executor='thread', checkpoint=checkpoint)
+
+    assert summary['files'] == 5
+    assert summary['batches'] == 0
+    assert checkpoint.completed() == set()
+
+def test_checkpoint_ignores_truncated_lines(tmp_path):
+    """Test that a partially written last line does not break resuming"""
+    path = tmp_path / 'checkpoint.jsonl'
+    path.write_text('{"source": "a.csv"}\n{"sour')
+
+    assert Checkpoint(str(path)).completed() == {'a.csv'}
+
+def test_backfill_stores_in_source_order_when_workers_finish_out_of_order(monkeypatch):
+    """Test that the stored order and stamps follow the sources, not worker timing"""
+    modified_at = datetime(2024, 3, 1, 12, 0, 0)
+
+    def process_source(source):
+        # Earlier sources finish last
+        time.sleep(0.02 * (4 - int(source)))
+        stats = SummaryTable(['INLAND'], [float(source)], [1])
+        return {'source': source, 'reports': {DEFAULT_REPORT: stats}, 'rows': 1,
+                'modified_at': modified_at, 'seconds': 0.0, 'error': None}
+
+    monkeypatch.setattr(backfill, 'process_source', process_source)
+    stored = []
+
+    run_backfill(['0', '1', '2', '3'], stored.extend, workers=4, executor='thread', batch_rows=2)
+
+    assert [source for _, _, _, source in stored] == ['0', '1', '2', '3']
+    assert [stats.column('average_value')[0] for _, stats, _, _ in stored] == [0.0, 1.0, 2.0, 3.0]
+    assert {processed_at for _, _, processed_at, _ in stored} == {modified_at}
+
+def test_backfill_stamps_files_with_their_modification_time(data_dir):
+    """Test that stored statistics carry the file's mtime rather than the backfill time"""
+    os.utime(data_dir / 'part-0.csv', (0, 946684800))
+    stored = []
+
+    run_backfill(list_sources([str(data_dir / 'part-0.csv')]), stored.extend, workers=1, executor='thread')
+
+    assert {processed_at for _, _, processed_at, _ in stored} == {datetime(2000, 1, 1)}
+
+@pytest.mark.parametrize('key', ['2024/housing?version=2.csv', '2024/housing#1.csv'])
+def test_s3_keys_with_query_and_fragment_characters(data_dir, monkeypatch, key):
+    """Test that ? and # are read as part of the object key"""
+    (data_dir / '2024').mkdir()
+    shutil.copyfile(data_dir / 'part-0.csv', data_dir / key)
+    os.utime(data_dir / key, (0, 946684800))
+    monkeypatch.setattr(backfill, '_s3_client', LocalS3Backend(str(data_dir)))
+
+    result = backfill.process_source(f's3://bucket/{key}')
+
+    assert result['error'] is None
+    assert result['rows'] == 3
+    assert result['modified_at'] == datetime(2000, 1, 1)
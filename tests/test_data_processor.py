@@ -104,3 +104,19 @@ def test_process_california_housing_data_handles_nulls():
         result = process_california_housing_data(str(csv_path))
         total_count = sum(item['count'] for item in result)
         assert total_count == 2
+
+def test_process_california_housing_data_in_chunks():
+    """Test that chunked processing matches processing the whole file"""
+    df = pd.DataFrame({
+        'median_house_value': [100000, 200000, None, 150000, 250000, 300000, 50000],
+        'ocean_proximity': ['NEAR BAY', 'INLAND', 'NEAR BAY', 'INLAND', '<1H OCEAN', 'NEAR BAY', 'ISLAND'],
+        'median_income': [5.0, 4.5, 3.2, 6.1, 5.5, 2.0, 1.0]
+    })
+    with tempfile.TemporaryDirectory() as tmp_dir_str:
+        tmp_dir = Path(tmp_dir_str)
+        csv_path = _write_temp_csv(df, tmp_dir)
+
+        expected = process_california_housing_data(str(csv_path))
+        result = process_california_housing_data(str(csv_path), chunksize=2)
+
+        assert result == expected
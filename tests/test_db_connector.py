@@ -0,0 +1,137 @@
+"""
+Unit tests for the psycopg2 connector, against a fake connection.
+"""
+import csv
+import io
+from datetime import datetime
+
+import pytest
+
+from src.lambda_functions import db_connector
+from src.lambda_functions.db_connector import (
+    COPY_COLUMNS,
+    MIGRATE_SCHEMA_QUERY,
+    SCHEMA_COLUMNS,
+    SCHEMA_COLUMNS_QUERY,
+    SCHEMA_INDEXES,
+    SCHEMA_INDEXES_QUERY,
+    RDSConnector
+)
+from src.lambda_functions.results import SummaryTable
+
+DB_CONFIG = {'host': 'localhost', 'port': '5432', 'dbname': 'test', 'username': 'user', 'password': 'secret'}
+
+
+class FakeCursor:
+    """Cursor stand-in that records COPYs and statements and answers catalog queries"""
+
+    def __init__(self, columns=(), indexes=()):
+        self.copies = []
+        self.statements = []
+        self.catalog = {
+            SCHEMA_COLUMNS_QUERY: list(columns),
+            SCHEMA_INDEXES_QUERY: [(name,) for name in indexes]
+        }
+        self.rows = []
+
+    def copy_expert(self, sql, buffer):
+        self.copies.append((sql, buffer.read()))
+
+    def execute(self, query, args=None):
+        self.statements.append((query, args))
+        self.rows = self.catalog.get(query, [])
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeConnection:
+    """Connection stand-in that counts commits"""
+
+    def __init__(self):
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+def _connector(cursor=None):
+    connector = RDSConnector(DB_CONFIG)
+    connector.conn = FakeConnection()
+    connector.cursor = cursor or FakeCursor()
+    return connector
+
+@pytest.fixture(autouse=True)
+def unchecked_schema(monkeypatch):
+    """Forget which databases this process has checked"""
+    monkeypatch.setattr(db_connector, '_checked_databases', set())
+
+CURRENT_COLUMNS = [(name, data_type, precision) for name, (data_type, precision) in SCHEMA_COLUMNS.items()]
+
+@pytest.mark.parametrize('columns, indexes, migrated', [
+    (CURRENT_COLUMNS, SCHEMA_INDEXES, False),
+    ([], [], True),
+    ([column for column in CURRENT_COLUMNS if column[0] != 'source'], SCHEMA_INDEXES, True),
+    ([('category', 'character varying', None)] + CURRENT_COLUMNS[2:], SCHEMA_INDEXES, True),
+    (CURRENT_COLUMNS, SCHEMA_INDEXES - {'idx_provisional'}, True)
+])
+def test_schema_is_only_migrated_when_out_of_date(columns, indexes, migrated):
+    """Test that the locking DDL only runs when the catalog shows a missing table, column, type or index"""
+    connector = _connector(FakeCursor(columns, indexes))
+
+    connector._ensure_table_exists()
+
+    assert (MIGRATE_SCHEMA_QUERY in [query for query, _ in connector.cursor.statements]) == migrated
+
+def test_schema_is_checked_once_per_process():
+    """Test that warm connections skip the catalog queries"""
+    _connector(FakeCursor(CURRENT_COLUMNS, SCHEMA_INDEXES))._ensure_table_exists()
+    connector = _connector()
+
+    connector._ensure_table_exists()
+
+    assert connector.cursor.statements == []
+
+def test_empty_category_is_not_copied_as_null():
+    """Test that an empty category reaches COPY as a non-null empty string"""
+    connector = _connector()
+
+    connector.store_summary_statistics(SummaryTable(['', 'INLAND'], [100.0, 200.0], [1, 2]))
+
+    [(sql, data)] = connector.cursor.copies
+    # COPY reads unquoted empty fields as NULL unless the column is forced not null
+    assert 'FORCE_NOT_NULL (category)' in sql
+    rows = [dict(zip(COPY_COLUMNS, row)) for row in csv.reader(io.StringIO(data))]
+    assert [row['category'] for row in rows] == ['', 'INLAND']
+    assert connector.conn.commits == 1
+
+def test_exact_store_only_replaces_rows_of_its_source():
+    """Test that one file's exact results leave other files' rows alone"""
+    connector = _connector()
+
+    connector.store_many([('value', SummaryTable(['INLAND'], [100.0], [1]))], source='s3://bucket/a.csv')
+    connector.store_many([('value', SummaryTable(['INLAND'], [100.0], [1]))], provisional=True, source='s3://bucket/b.csv')
+
+    [replace, expire_exact, expire_provisional] = connector.cursor.statements
+    assert replace[1] == {'sources': ['s3://bucket/a.csv'], 'reports': ['value']}
+    # Provisional stores only delete expired rows
+    assert 'expired_before' in expire_exact[1] and 'expired_before' in expire_provisional[1]
+    assert expire_exact[1]['expired_before'] < datetime.utcnow()
+    sources = [row[COPY_COLUMNS.index('source')] for _, data in connector.cursor.copies for row in csv.reader(io.StringIO(data))]
+    assert sources == ['s3://bucket/a.csv', 's3://bucket/b.csv']
+
+def test_batches_carry_their_own_source():
+    """Test that backfill batches replace the rows of their own files"""
+    connector = _connector()
+    stamp = datetime(2024, 1, 1)
+
+    connector.store_many([
+        ('value', SummaryTable(['INLAND'], [100.0], [1]), stamp, 'a.csv'),
+        ('value', SummaryTable(['INLAND'], [200.0], [1]), stamp, 'b.csv'),
+        ('bedrooms', SummaryTable(['INLAND'], [3.0], [1]), stamp, 'a.csv')
+    ])
+
+    replace = connector.cursor.statements[0][1]
+    assert list(zip(replace['sources'], replace['reports'])) == [('a.csv', 'bedrooms'), ('a.csv', 'value'), ('b.csv', 'value')]
+    [(_, data)] = connector.cursor.copies
+    rows = [dict(zip(COPY_COLUMNS, row)) for row in csv.reader(io.StringIO(data))]
+    assert [(row['source'], row['processed_at']) for row in rows] == [(source, stamp.isoformat()) for source in ('a.csv', 'b.csv', 'a.csv')]
@@ -0,0 +1,124 @@
+"""
+Round-trip tests against a real PostgreSQL database.
+
+Skipped unless DB_HOST (with DB_NAME, DB_USER and DB_PASSWORD) is set. Each
+test runs in a schema of its own, which is dropped afterwards.
+"""
+import os
+import uuid
+
+import numpy as np
+import psycopg2
+import pytest
+
+from src.lambda_functions import db_connector
+from src.lambda_functions.backfill import list_sources, run_backfill
+from src.lambda_functions.data_processor import process_housing_reports
+from src.lambda_functions.db_connector import RDSConnector
+from src.lambda_functions.results import SummaryTable
+from src.lambda_functions.settings import DEFAULT_REPORT, AggregationSpec
+from src.lambda_functions.utils import get_db_credentials
+
+HOUSING_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_data', 'housing.csv')
+SAMPLE_CSV = "median_house_value,ocean_proximity\n100000,NEAR BAY\n200000,INLAND\n300000,NEAR BAY\n"
+
+@pytest.fixture
+def db_config(monkeypatch):
+    """Database credentials with the search path set to a throwaway schema"""
+    if 'DB_HOST' not in os.environ:
+        pytest.skip("No database configured (DB_HOST)")
+    config = get_db_credentials()
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+
+    def connect():
+        return psycopg2.connect(
+            host=config['host'],
+            port=config['port'],
+            dbname=config['dbname'],
+            user=config['username'],
+            password=config['password']
+        )
+
+    with connect() as conn, conn.cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA {schema}")
+    # libpq applies PGOPTIONS to every connection the connector opens
+    monkeypatch.setenv('PGOPTIONS', f"-c search_path={schema}")
+    monkeypatch.setattr(db_connector, '_checked_databases', set())
+    yield config
+
+    monkeypatch.delenv('PGOPTIONS')
+    with connect() as conn, conn.cursor() as cursor:
+        cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+    conn.close()
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Two small housing files modified at the same time"""
+    directory = tmp_path / 'data'
+    directory.mkdir()
+    for i in range(2):
+        path = directory / f'part-{i}.csv'
+        path.write_text(SAMPLE_CSV)
+        os.utime(path, (0, 946684800))
+    return directory
+
+def test_backfill_twice_keeps_one_row_per_category(db_config, data_dir):
+    """Test that running a backfill again replaces its files' rows instead of adding a second set"""
+    sources = list_sources([str(data_dir)])
+
+    with RDSConnector(db_config) as db:
+        for _ in range(2):
+            run_backfill(sources, db.store_many, workers=2, executor='thread')
+        latest = db.query_latest_statistics(DEFAULT_REPORT)
+        db.cursor.execute("SELECT COUNT(*) FROM housing_summary_statistics")
+        [(stored,)] = db.cursor.fetchall()
+
+    assert [row[0] for row in latest] == ['INLAND', 'NEAR BAY']
+    assert stored == 4
+
+def test_backfill_replaces_live_results_of_the_same_file(db_config, data_dir):
+    """Test that a backfilled correction replaces the live row of its file, which is stamped later"""
+    path = str(data_dir / 'part-0.csv')
+
+    with RDSConnector(db_config) as db:
+        db.store_summary_statistics(SummaryTable(['INLAND'], [1.0], [1]), source=path)
+        run_backfill([path], db.store_many, workers=1, executor='thread')
+        latest = db.query_latest_statistics(DEFAULT_REPORT)
+
+    assert [(row[0], float(row[1])) for row in latest] == [('INLAND', 200000.0), ('NEAR BAY', 200000.0)]
+
+def test_ratio_metric_keeps_its_precision(db_config):
+    """Test that a derived ratio round-trips without being rounded to two decimals"""
+    spec = AggregationSpec(name='bedrooms', group_by=['ocean_proximity'], metric='bedrooms_per_room')
+    stats = process_housing_reports(HOUSING_CSV, [spec])['bedrooms']
+
+    with RDSConnector(db_config) as db:
+        db.store_summary_statistics(stats, report='bedrooms')
+        latest = db.query_latest_statistics('bedrooms')
+
+    assert [row[0] for row in latest] == list(stats.column('category'))
+    np.testing.assert_allclose([float(row[1]) for row in latest], stats.column('average_value'), rtol=1e-12)
+
+@pytest.mark.parametrize('extra_columns', ['', ', ci_low NUMERIC(12, 2), ci_high NUMERIC(12, 2)'])
+def test_earlier_schemas_are_migrated(db_config, extra_columns):
+    """Test that tables created by earlier versions are widened and completed"""
+    with RDSConnector(db_config) as db:
+        db.cursor.execute("DROP TABLE housing_summary_statistics")
+        db.cursor.execute(f"""
+        CREATE TABLE housing_summary_statistics (
+            id UUID PRIMARY KEY,
+            category VARCHAR(50) NOT NULL,
+            average_value NUMERIC(12, 2) NOT NULL,
+            record_count INTEGER NOT NULL,
+            processed_at TIMESTAMP NOT NULL{extra_columns}
+        )
+        """)
+    db_connector._checked_databases.clear()
+
+    with RDSConnector(db_config) as db:
+        db.cursor.execute(db_connector.SCHEMA_COLUMNS_QUERY)
+        columns = db.cursor.fetchall()
+        db.cursor.execute(db_connector.SCHEMA_INDEXES_QUERY)
+        indexes = [name for name, in db.cursor.fetchall()]
+
+    assert db_connector.schema_is_current(columns, indexes)
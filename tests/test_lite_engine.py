@@ -0,0 +1,86 @@
+"""
+Unit tests for the lightweight (no pandas) processing engine.
+"""
+from pathlib import Path
+
+import pytest
+
+from src.lambda_functions import data_processor, lite_engine
+from src.lambda_functions.engines import get_engine
+from src.lambda_functions.settings import AggregationSpec
+
+SAMPLE_DATA = Path(__file__).resolve().parent.parent / 'sample_data' / 'housing.csv'
+
+def test_lite_engine_matches_pandas_engine_on_sample_data():
+    """Test that both engines produce identical statistics"""
+    assert lite_engine.process_california_housing_data(str(SAMPLE_DATA)) == \
+        data_processor.process_california_housing_data(str(SAMPLE_DATA))
+
+def test_lite_engine_reports_match_pandas_engine():
+    """Test multi-key and derived-feature reports in batches"""
+    specs = [
+        AggregationSpec(
+            name='value_by_proximity_and_age',
+            group_by=['ocean_proximity', {'column': 'housing_median_age', 'bins': [0, 10, 20, 30, 40, 53]}]
+        ),
+        AggregationSpec(name='rooms', group_by=['ocean_proximity'], metric='rooms_per_household'),
+    ]
+
+    assert lite_engine.process_housing_reports(str(SAMPLE_DATA), specs, chunksize=5_000) == \
+        data_processor.process_housing_reports(str(SAMPLE_DATA), specs, chunksize=5_000)
+
+def test_lite_engine_handles_missing_values_like_pandas(tmp_path):
+    """Test missing markers, short rows and blank lines"""
+    csv_path = tmp_path / 'nulls.csv'
+    csv_path.write_text(
+        "median_house_value,ocean_proximity,median_income\n"
+        "100000,NEAR BAY,5.0\n"
+        "200000,INLAND,NA\n"
+        "\n"
+        "300000,NEAR BAY\n"
+        ",INLAND,4.0\n"
+        "150000,INLAND,6.1\n"
+        "250000,null,6.1\n"
+    )
+
+    result = lite_engine.process_california_housing_data(str(csv_path), chunksize=2)
+
+    assert result == data_processor.process_california_housing_data(str(csv_path))
+    # Nulls in median_income do not drop rows; nulls in required columns do
+    assert [(item['category'], item['count']) for item in result] == [('INLAND', 2), ('NEAR BAY', 2)]
+
+def test_lite_engine_errors(tmp_path):
+    """Test missing files and missing columns"""
+    with pytest.raises(FileNotFoundError):
+        lite_engine.process_california_housing_data(str(tmp_path / 'missing.csv'))
+
+    csv_path = tmp_path / 'columns.csv'
+    csv_path.write_text("population,median_income\n1000,5.0\n")
+    with pytest.raises(ValueError) as excinfo:
+        lite_engine.process_california_housing_data(str(csv_path))
+    assert "Missing required columns" in str(excinfo.value)
+
+def test_get_engine():
+    """Test engine selection by name"""
+    assert get_engine('lite') is lite_engine
+    assert get_engine('pandas') is data_processor
+    with pytest.raises(ValueError):
+        get_engine('spark')
+
+def test_lite_engine_matches_pandas_with_bom_and_numeric_keys(tmp_path):
+    """Test that a byte order mark and numeric group-by keys give the same labels in both engines"""
+    path = tmp_path / 'bom.csv'
+    path.write_text(
+        "ocean_proximity,housing_median_age,median_house_value\n"
+        "INLAND,41,100000\n"
+        "INLAND,41.0,200000\n"
+        "NEAR BAY,,300000\n"
+        "NEAR BAY,7.5,400000\n",
+        encoding='utf-8-sig'
+    )
+    specs = [AggregationSpec(name='by_age', group_by=['ocean_proximity', 'housing_median_age'])]
+
+    lite = lite_engine.process_housing_reports(str(path), specs, quality_rules=[])
+    assert lite == data_processor.process_housing_reports(str(path), specs, quality_rules=[])
+    assert lite['by_age'].column('category').tolist() == ['INLAND | 41', 'NEAR BAY | 7.5']
+    assert lite['by_age'][0]['count'] == 2
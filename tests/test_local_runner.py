@@ -0,0 +1,63 @@
+"""
+Unit tests for the local replay runner and the local S3 backend.
+"""
+import urllib.parse
+from pathlib import Path
+
+import pytest
+
+from src.lambda_functions.local_runner import build_s3_event, percentile, resolve_files, summarize
+from src.lambda_functions.s3_backend import LocalS3Backend
+
+
+def test_resolve_files_expands_directories_and_globs(tmp_path):
+    """Test that files, directories and glob patterns are all accepted"""
+    (tmp_path / 'nested').mkdir()
+    for name in ('a.csv', 'nested/b.csv', 'notes.txt'):
+        (tmp_path / name).write_text('x')
+
+    assert resolve_files([str(tmp_path)]) == [str(tmp_path / 'a.csv'), str(tmp_path / 'nested' / 'b.csv')]
+    assert resolve_files([str(tmp_path / '*.txt')]) == [str(tmp_path / 'notes.txt')]
+    with pytest.raises(FileNotFoundError):
+        resolve_files([str(tmp_path / 'missing*.csv')])
+
+def test_build_s3_event_encodes_key():
+    """Test that keys are URL-encoded the way S3 notifications encode them"""
+    event = build_s3_event('bucket', 'dir/my file+1.csv', 10)
+    record = event['Records'][0]['s3']
+
+    assert record['bucket']['name'] == 'bucket'
+    assert urllib.parse.unquote_plus(record['object']['key']) == 'dir/my file+1.csv'
+
+def test_local_s3_backend_download(tmp_path):
+    """Test downloading from and rejecting keys outside the local root"""
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'housing.csv').write_text('a,b\n1,2\n')
+    backend = LocalS3Backend(str(tmp_path / 'data'))
+
+    target = tmp_path / 'download.csv'
+    backend.download_file('any-bucket', 'housing.csv', str(target))
+    assert target.read_text() == 'a,b\n1,2\n'
+
+    with pytest.raises(ValueError):
+        backend.object_path('../download.csv')
+
+def test_summarize_reports_throughput_and_percentiles():
+    """Test the load report built from per-invocation results"""
+    invocations = [
+        {'status_code': 200, 'cold': i == 0, 'init_ms': 900.0 if i == 0 else 0.0,
+         'latency_ms': float(i + 1), 'db_ms': 2.0, 'error': None}
+        for i in range(100)
+    ]
+    invocations[-1].update(status_code=500, db_ms=None, error='boom')
+
+    report = summarize(invocations, wall_seconds=4.0)
+
+    assert report['invocations_per_second'] == 25.0
+    assert report['errors'] == 1
+    assert report['error_samples'] == ['boom']
+    assert report['latency_ms']['p50'] == 50.0
+    assert report['latency_ms']['p99'] == 99.0
+    assert report['cold_starts'] == 1
+    assert report['mean_db_ms'] == 2.0
+    assert percentile([], 0.5) == 0.0
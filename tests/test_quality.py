@@ -0,0 +1,152 @@
+"""
+Unit tests for the vectorized data-quality stage.
+"""
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.lambda_functions import data_processor, lite_engine
+from src.lambda_functions.quality import QualityReport
+from src.lambda_functions.settings import AggregationSpec, ProcessingSettings, QualityRule
+
+RULES = [
+    QualityRule(column='median_house_value', kind='range', min=1),
+    QualityRule(column='housing_median_age', kind='range', min=0, max=52),
+    QualityRule(column='median_house_value', kind='cap', cap=500001, action='flag'),
+]
+
+@pytest.fixture
+def csv_path(tmp_path):
+    """Write a small dataset with nulls, out-of-range and capped values"""
+    df = pd.DataFrame({
+        'median_house_value': [100000, 500001, 0, 200000, None, 300000, 150000, 500001],
+        'ocean_proximity': ['NEAR BAY', 'NEAR BAY', 'INLAND', 'INLAND', 'INLAND', None, 'INLAND', 'INLAND'],
+        'housing_median_age': [10, 52, 20, 60, 30, 30, None, 40],
+        'median_income': [5.0, None, 4.0, 3.0, 2.0, 1.0, 6.0, 7.0]
+    })
+    path = tmp_path / 'quality.csv'
+    df.to_csv(path, index=False)
+    return path
+
+def test_rule_counts(csv_path):
+    """Test per-rule counts; flag rules keep the row and nulls only fail required columns"""
+    report = QualityReport()
+    result = data_processor.process_california_housing_data(str(csv_path), quality_rules=RULES, quality_report=report)
+
+    assert report.as_dict() == {
+        'total_rows': 8,
+        'accepted_rows': 4,
+        'rejected_rows': 4,
+        'rules': {
+            'required:median_house_value': 1,
+            'required:ocean_proximity': 1,
+            'range:median_house_value': 1,
+            'range:housing_median_age': 1,
+            'cap:median_house_value': 2
+        },
+        'reports': {}
+    }
+    assert [(item['category'], item['count']) for item in result] == [('INLAND', 2), ('NEAR BAY', 2)]
+
+def test_chunked_and_spill_counts_match(csv_path, tmp_path):
+    """Test that chunked and spilling modes report the same counts without extra scans"""
+    expected = QualityReport()
+    whole = data_processor.process_california_housing_data(str(csv_path), quality_rules=RULES, quality_report=expected)
+
+    chunked = QualityReport()
+    assert data_processor.process_california_housing_data(
+        str(csv_path), chunksize=3, quality_rules=RULES, quality_report=chunked
+    ) == whole
+    assert chunked.as_dict() == expected.as_dict()
+
+    spilled = QualityReport()
+    data_processor.process_california_housing_data(
+        str(csv_path), chunksize=3, memory_budget_bytes=1, spill_dir=str(tmp_path),
+        quality_rules=RULES, quality_report=spilled
+    )
+    assert spilled.as_dict() == expected.as_dict()
+
+def test_reports_only_require_their_columns(csv_path):
+    """Test that a report drops rows with nulls in the columns it uses only"""
+    specs = [AggregationSpec(name='income', group_by=['ocean_proximity'], metric='median_income')]
+    report = QualityReport()
+    reports = data_processor.process_housing_reports(str(csv_path), specs, quality_rules=[], quality_report=report)
+
+    assert report.rule_counts == {}
+    assert report.report_counts['income'] == {'required:median_income': 1, 'required:ocean_proximity': 1}
+    assert sum(item['count'] for item in reports['income']) == 6
+
+@pytest.mark.parametrize('engine', [data_processor, lite_engine])
+def test_reports_with_different_inputs_keep_different_rows(engine):
+    """Test that a null in one report's column does not drop the row from another report"""
+    sample = Path(__file__).resolve().parent.parent / 'sample_data' / 'housing.csv'
+    specs = [
+        AggregationSpec(name='value', group_by=['ocean_proximity']),
+        AggregationSpec(name='bedrooms', group_by=['ocean_proximity'], metric='bedrooms_per_room'),
+    ]
+    report = QualityReport()
+    reports = engine.process_housing_reports(str(sample), specs, quality_rules=[], quality_report=report)
+
+    assert sum(item['count'] for item in reports['value']) == 20640
+    assert sum(item['count'] for item in reports['bedrooms']) == 20433
+    assert report.rejected_rows == 0
+    assert report.report_counts['value']['required:median_house_value'] == 0
+    assert report.report_counts['bedrooms']['required:bedrooms_per_room'] == 207
+
+@pytest.mark.parametrize('engine', [data_processor, lite_engine])
+def test_out_of_range_bins_are_counted(csv_path, engine):
+    """Test that values outside every bin edge are reported, not dropped silently"""
+    specs = [AggregationSpec(name='by_age', group_by=[{'column': 'housing_median_age', 'bins': [0, 25, 50]}])]
+    report = QualityReport()
+    reports = engine.process_housing_reports(str(csv_path), specs, quality_rules=[], quality_report=report)
+
+    # Ages 52 and 60 fall outside [0, 50); the null age is not out of range
+    assert report.report_counts['by_age']['out_of_range:housing_median_age'] == 2
+    assert report.as_dict()['reports']['by_age']['out_of_range:housing_median_age'] == 2
+    assert 'out_of_range:housing_median_age' not in report.rule_counts
+    assert sum(item['count'] for item in reports['by_age']) == 4
+
+def test_lite_engine_matches_pandas_engine(csv_path):
+    """Test that both engines apply the rules identically"""
+    pandas_report, lite_report = QualityReport(), QualityReport()
+
+    assert lite_engine.process_california_housing_data(
+        str(csv_path), chunksize=3, quality_rules=RULES, quality_report=lite_report
+    ) == data_processor.process_california_housing_data(
+        str(csv_path), quality_rules=RULES, quality_report=pandas_report
+    )
+    assert lite_report.as_dict() == pandas_report.as_dict()
+
+def test_rules_for_missing_columns_are_skipped(tmp_path):
+    """Test that rules on columns absent from the file are ignored"""
+    path = tmp_path / 'narrow.csv'
+    path.write_text("median_house_value,ocean_proximity\n100000,INLAND\n")
+    report = QualityReport()
+
+    data_processor.process_california_housing_data(str(path), quality_rules=RULES, quality_report=report)
+
+    assert 'range:housing_median_age' not in report.rule_counts
+
+def test_quality_rules_from_environment(monkeypatch):
+    """Test that rules can be configured with HOUSING_QUALITY_RULES"""
+    monkeypatch.setenv(
+        'HOUSING_QUALITY_RULES',
+        '[{"column": "median_income", "kind": "range", "min": 0, "action": "flag", "name": "income"}]'
+    )
+    rules = ProcessingSettings().quality_rules
+
+    assert [rule.label for rule in rules] == ['income']
+    assert rules[0].action == 'flag'
+
+@pytest.mark.parametrize('fields', [
+    {'kind': 'cap'},
+    {'kind': 'cap', 'cap': 5, 'max': 10},
+    {'kind': 'range'},
+    {'kind': 'range', 'min': 1, 'cap': 5},
+    {'kind': 'range', 'min': 10, 'max': 1},
+])
+def test_rules_without_matching_bounds_are_rejected(fields):
+    """Test that a rule whose bounds do not match its kind fails validation"""
+    with pytest.raises(ValueError):
+        QualityRule(column='median_house_value', **fields)
@@ -0,0 +1,76 @@
+"""
+Unit tests for the columnar summary table.
+"""
+import pickle
+
+import numpy as np
+import pytest
+
+from src.lambda_functions.aggregation import CategoricalAggregator, SpecAggregator, CachedColumns
+from src.lambda_functions.results import SummaryTable
+from src.lambda_functions.settings import AggregationSpec
+
+
+class _ArraySource:
+    """Column source over plain arrays"""
+
+    def __init__(self, **columns):
+        self.columns = columns
+
+    def numeric(self, name):
+        return np.asarray(self.columns[name], dtype=np.float64)
+
+    def categorical(self, name):
+        uniques, codes = np.unique(np.asarray(self.columns[name], dtype=object), return_inverse=True)
+        return codes, list(uniques)
+
+    def isnull(self, name):
+        return np.zeros(len(self.columns[name]), dtype=bool)
+
+
+def test_rows_behave_like_dicts():
+    """Test row views, equality with lists of dicts and slicing"""
+    table = SummaryTable(['INLAND', 'NEAR BAY'], [150000.0, 200000.0], [2, 3], median_value=[140000.0, 210000.0])
+    expected = [
+        {'category': 'INLAND', 'average_value': 150000.0, 'count': 2, 'median_value': 140000.0},
+        {'category': 'NEAR BAY', 'average_value': 200000.0, 'count': 3, 'median_value': 210000.0},
+    ]
+
+    assert table == expected
+    assert table[-1]['count'] == 3
+    assert type(table[0]['count']) is int
+    assert table[1:] == expected[1:]
+    assert table.to_dicts() == expected
+    assert [row['category'] for row in table] == ['INLAND', 'NEAR BAY']
+    with pytest.raises(IndexError):
+        table[2]
+
+def test_columns_must_have_the_same_length():
+    """Test that ragged columns are rejected"""
+    with pytest.raises(ValueError):
+        SummaryTable(['INLAND'], [1.0, 2.0], [1])
+
+def test_aggregators_return_tables():
+    """Test that aggregation results are columnar, including multi-key reports"""
+    aggregator = CategoricalAggregator()
+    aggregator.update(['NEAR BAY', 'INLAND'], np.array([0, 1, 1]), np.array([10.0, 20.0, 40.0]))
+    result = aggregator.results()
+
+    assert isinstance(result, SummaryTable)
+    assert result.column('average_value').tolist() == [30.0, 10.0]
+
+    spec = AggregationSpec(name='age', group_by=['ocean_proximity', {'column': 'age', 'bins': [0, 10, 20]}])
+    report = SpecAggregator(spec)
+    report.update(CachedColumns(_ArraySource(ocean_proximity=['INLAND', 'INLAND', 'NEAR BAY'],
+                                             age=[5, 15, 5], median_house_value=[1.0, 2.0, 3.0])))
+    rows = report.results()
+
+    assert rows.keys['age_bin'].tolist() == ['[0, 10)', '[10, 20)', '[0, 10)']
+    assert rows[1] == {'category': 'INLAND | [10, 20)', 'keys': {'ocean_proximity': 'INLAND', 'age_bin': '[10, 20)'},
+                       'average_value': 2.0, 'count': 1}
+
+def test_tables_pickle():
+    """Test that tables survive the trip back from worker processes"""
+    table = SummaryTable.from_rows([{'category': 'INLAND', 'average_value': 1.5, 'count': 2}])
+
+    assert pickle.loads(pickle.dumps(table)) == table
@@ -0,0 +1,117 @@
+"""
+Unit tests for the sampling-based approximate processing mode.
+"""
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.lambda_functions import data_processor, lite_engine
+from src.lambda_functions.s3_backend import LocalS3Backend
+from src.lambda_functions.sampling import _block_rows, estimate_average_by_category
+
+SAMPLE_DATA = Path(__file__).parent.parent / 'sample_data'
+HOUSING_CSV = str(SAMPLE_DATA / 'housing.csv')
+
+
+@pytest.fixture(scope='module')
+def exact():
+    """Exact statistics of the sample data keyed by category"""
+    return {row['category']: row for row in lite_engine.process_california_housing_data(HOUSING_CSV)}
+
+def test_blocks_partition_rows():
+    """Test that adjacent blocks hold every row exactly once, wherever they are cut"""
+    data = Path(HOUSING_CSV).read_bytes()[:50_000]
+    data_start = data.index(b'\n') + 1
+
+    def read(start, end):
+        return data[start:end]
+
+    rng = np.random.default_rng(0)
+    edges = [data_start] + sorted(rng.integers(data_start, len(data), 40).tolist()) + [len(data)]
+    text = ''.join(_block_rows(read, len(data), start, end) for start, end in zip(edges, edges[1:]))
+
+    assert text == data[data_start:].decode()
+
+def test_reading_every_block_is_exact(exact):
+    """Test that a sample covering the whole file gives the exact results"""
+    result = estimate_average_by_category(HOUSING_CSV, sample_blocks=1_000, block_bytes=4_096, seed=0)
+
+    assert [row['category'] for row in result] == list(exact)
+    assert [row['count'] for row in result] == [row['count'] for row in exact.values()]
+    assert result.column('sample_size').tolist() == [row['count'] for row in exact.values()]
+    np.testing.assert_allclose(result.column('average_value'), [row['average_value'] for row in exact.values()])
+    np.testing.assert_array_equal(result.column('ci_low'), result.column('ci_high'))
+
+def test_confidence_intervals_cover_exact_means(exact):
+    """Test that the 95% intervals cover the exact means in most repeated samples"""
+    covered = total = 0
+    for seed in range(20):
+        result = estimate_average_by_category(HOUSING_CSV, sample_blocks=32, block_bytes=8_192, seed=seed)
+        assert result.column('sample_size').sum() < sum(row['count'] for row in exact.values()) / 2
+        for row in result:
+            if not np.isnan(row['ci_low']):
+                total += 1
+                covered += row['ci_low'] <= exact[row['category']]['average_value'] <= row['ci_high']
+
+    assert total > 60
+    assert covered / total >= 0.85
+
+def test_s3_ranged_reads_match_local_sample():
+    """Test that ranged GETs read the same blocks as mmap"""
+    local = estimate_average_by_category(HOUSING_CSV, sample_blocks=16, block_bytes=8_192, seed=4)
+    remote = estimate_average_by_category(
+        's3://bucket/housing.csv',
+        sample_blocks=16,
+        block_bytes=8_192,
+        s3_client=LocalS3Backend(str(SAMPLE_DATA)),
+        seed=4
+    )
+
+    assert remote.to_dicts() == local.to_dicts()
+
+@pytest.mark.parametrize('key', ['housing?version=2.csv', 'housing#1.csv'])
+def test_s3_keys_with_query_and_fragment_characters(tmp_path, key):
+    """Test that ? and # are read as part of the key, not a query or fragment"""
+    (tmp_path / key).write_bytes(Path(HOUSING_CSV).read_bytes())
+    local = estimate_average_by_category(HOUSING_CSV, sample_blocks=16, block_bytes=8_192, seed=4)
+    remote = estimate_average_by_category(
+        f's3://bucket/{key}',
+        sample_blocks=16,
+        block_bytes=8_192,
+        s3_client=LocalS3Backend(str(tmp_path)),
+        seed=4
+    )
+
+    assert remote.to_dicts() == local.to_dicts()
+
+@pytest.mark.parametrize('engine', [data_processor, lite_engine])
+def test_engines_support_approximate_mode(engine):
+    """Test that both engines route sample_blocks to the estimator"""
+    result = engine.process_california_housing_data(HOUSING_CSV, sample_blocks=8, sample_block_bytes=4_096)
+
+    assert {'ci_low', 'ci_high', 'sample_size'} <= set(result.fields)
+    assert 0 < result.column('sample_size').sum() < 20_640
+
+@pytest.mark.parametrize('engine, options', [
+    (data_processor, {'chunksize': 1_000}),
+    (data_processor, {'memory_budget_bytes': 2**20}),
+    (lite_engine, {'chunksize': 1_000})
+])
+def test_sampling_rejects_full_read_options(engine, options):
+    """Test that options of the full read are not silently ignored when sampling"""
+    with pytest.raises(ValueError, match="sample_blocks cannot be combined"):
+        engine.process_california_housing_data(HOUSING_CSV, sample_blocks=8, **options)
+
+def test_missing_columns_raise(tmp_path):
+    """Test that sampled files are validated like full reads"""
+    csv_path = tmp_path / 'bad.csv'
+    csv_path.write_text("a,b\n1,2\n3,4\n")
+
+    with pytest.raises(ValueError, match="Missing required columns"):
+        estimate_average_by_category(str(csv_path))
+
+def test_invalid_confidence_raises():
+    """Test that confidence levels outside (0, 1) are rejected"""
+    with pytest.raises(ValueError, match="Confidence"):
+        estimate_average_by_category(HOUSING_CSV, confidence=1.5)
@@ -0,0 +1,92 @@
+"""
+Unit tests for the spill-to-disk aggregation module.
+"""
+import os
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.lambda_functions.data_processor import process_california_housing_data
+from src.lambda_functions.spill import SpillingAggregator, _select_kth
+
+CATEGORIES = ['<1H OCEAN', 'INLAND', 'ISLAND', 'NEAR BAY', 'NEAR OCEAN']
+
+
+def _expected(df: pd.DataFrame) -> pd.DataFrame:
+    """Reference statistics computed fully in memory"""
+    return df.groupby('ocean_proximity')['median_house_value'].agg(['mean', 'median', 'count'])
+
+def test_select_kth_across_sorted_arrays():
+    """Test rank selection against a full sort, including duplicates"""
+    rng = np.random.default_rng(1)
+    arrays = [np.sort(rng.integers(0, 50, size)).astype(float) for size in (0, 7, 30, 1, 64)]
+    merged = np.sort(np.concatenate(arrays))
+
+    for k in range(len(merged)):
+        assert _select_kth(arrays, k) == merged[k]
+
+def test_spilling_aggregator_matches_in_memory_statistics():
+    """Test that spilled runs merge to the exact in-memory statistics"""
+    rng = np.random.default_rng(0)
+    keys = np.array([f"CELL-{i}" for i in rng.integers(0, 500, 20_000)])
+    values = rng.normal(200_000, 50_000, 20_000).round()
+    df = pd.DataFrame({'ocean_proximity': keys, 'median_house_value': values})
+
+    with tempfile.TemporaryDirectory() as spill_dir:
+        with SpillingAggregator(memory_budget_bytes=64 * 1024, spill_dir=spill_dir) as aggregator:
+            for start in range(0, len(df), 1_000):
+                aggregator.update(keys[start:start + 1_000], values[start:start + 1_000])
+            assert aggregator.spilled_runs > 1
+
+            result = aggregator.results()
+        assert os.listdir(spill_dir) == []
+
+    expected = _expected(df)
+    assert [item['category'] for item in result] == list(expected.index)
+    assert [item['count'] for item in result] == list(expected['count'])
+    np.testing.assert_allclose([item['average_value'] for item in result], expected['mean'], rtol=1e-12)
+    assert [item['median_value'] for item in result] == list(expected['median'])
+
+def test_process_with_memory_budget_stays_bounded():
+    """Test that a file much larger than the budget is processed within a memory ceiling"""
+    rows = 400_000
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({
+        'longitude': rng.uniform(-124, -114, rows),
+        'latitude': rng.uniform(32, 42, rows),
+        'median_house_value': rng.integers(15_000, 500_001, rows).astype(float),
+        'ocean_proximity': np.array(CATEGORIES)[rng.integers(0, len(CATEGORIES), rows)]
+    })
+
+    with tempfile.TemporaryDirectory() as tmp_dir_str:
+        csv_path = Path(tmp_dir_str) / 'large.csv'
+        df.to_csv(csv_path, index=False)
+        frame_bytes = df.memory_usage(deep=True).sum()
+        del df
+
+        memory_ceiling = 8 * 1024 * 1024
+        tracemalloc.start()
+        try:
+            result = process_california_housing_data(
+                str(csv_path),
+                chunksize=10_000,
+                memory_budget_bytes=2 * 1024 * 1024,
+                spill_dir=tmp_dir_str
+            )
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert peak < memory_ceiling < frame_bytes
+
+        expected = _expected(pd.read_csv(csv_path))
+
+    assert [item['category'] for item in result] == CATEGORIES
+    assert [item['count'] for item in result] == list(expected['count'])
+    assert [item['median_value'] for item in result] == list(expected['median'])
+    for item, mean in zip(result, expected['mean']):
+        assert item['average_value'] == pytest.approx(mean, rel=1e-12)
@@ -0,0 +1,103 @@
+"""
+Unit tests for the cached statistics read API.
+"""
+from datetime import datetime
+
+import pytest
+
+from src.lambda_functions.db_connector import bump_statistics_version
+from src.lambda_functions.stats_api import StatisticsReader, TTLCache
+
+LATEST = [('INLAND', 124805.39, 6496, datetime(2025, 1, 1, 12, 0, 0))]
+
+
+class FakeConnector:
+    """Connector stand-in that counts database round-trips"""
+
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return None
+
+    def query_latest_statistics(self, report):
+        self.queries += 1
+        return LATEST
+
+@pytest.fixture
+def connector():
+    return FakeConnector()
+
+def test_cache_hit_skips_database(connector):
+    """Test that repeated reads are served from the cache"""
+    reader = StatisticsReader(connector_factory=connector)
+
+    assert reader.query_latest_statistics() == LATEST
+    assert reader.query_latest_statistics() == LATEST
+    assert connector.queries == 1
+
+    stats = reader.latency_stats()
+    assert stats['miss']['count'] == 1
+    assert stats['hit']['count'] == 1
+
+def test_latency_window_is_bounded(connector):
+    """Test that only the most recent latencies are kept, while every call is counted"""
+    reader = StatisticsReader(connector_factory=connector, latency_window=4)
+
+    for _ in range(10):
+        reader.query_latest_statistics()
+
+    assert len(reader._latencies['hit']) == 4
+    assert reader.latency_stats()['hit']['count'] == 9
+
+def test_results_are_copies_of_the_cached_entry(connector):
+    """Test that changing returned results does not change later cache hits"""
+    reader = StatisticsReader(connector_factory=connector)
+
+    reader.query_latest_statistics().clear()
+
+    assert reader.query_latest_statistics() == LATEST
+    assert connector.queries == 1
+
+def test_version_bump_invalidates_cache(connector):
+    """Test that storing statistics invalidates cached reads"""
+    reader = StatisticsReader(connector_factory=connector)
+
+    reader.query_latest_statistics()
+    bump_statistics_version()
+    reader.query_latest_statistics()
+
+    assert connector.queries == 2
+
+def test_ttl_expiry(connector, monkeypatch):
+    """Test that entries expire after their TTL"""
+    now = [1000.0]
+    monkeypatch.setattr('src.lambda_functions.stats_api.time.monotonic', lambda: now[0])
+    reader = StatisticsReader(connector_factory=connector, cache=TTLCache(ttl_seconds=5))
+
+    reader.query_latest_statistics()
+    now[0] += 4
+    reader.query_latest_statistics()
+    assert connector.queries == 1
+
+    now[0] += 2
+    reader.query_latest_statistics()
+    assert connector.queries == 2
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted first"""
+    cache = TTLCache(maxsize=2)
+    cache.put('a', 0, 1)
+    cache.put('b', 0, 2)
+    cache.get('a', 0)
+    cache.put('c', 0, 3)
+
+    assert cache.get('a', 0) == (True, 1)
+    assert cache.get('b', 0) == (False, None)
+    assert cache.get('c', 0) == (True, 3)
@@ -0,0 +1,92 @@
+"""
+Unit tests for the utils module.
+"""
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from src.lambda_functions import utils
+from src.lambda_functions.results import SummaryTable
+from src.lambda_functions.utils import format_query_results, write_query_results
+
+PROCESSED_AT = datetime(2025, 1, 1, 12, 30, 0)
+
+@pytest.fixture
+def query_results():
+    """Rows as returned by query_latest_statistics"""
+    return [
+        ('INLAND', Decimal('124805.39'), 6496, PROCESSED_AT),
+        ('NEAR BAY', Decimal('259212.31'), 2270, PROCESSED_AT),
+    ]
+
+def test_format_query_results_table(query_results):
+    """Test the default table layout with a shared timestamp"""
+    lines = format_query_results(query_results).split("\n")
+
+    assert lines[0] == "California Housing Data Summary (processed at 2025-01-01 12:30:00)"
+    assert lines[2].split() == ['Category', 'Average', 'Value', '($)', 'Record', 'Count']
+    assert lines[4].split() == ['INLAND', '$124,805.39', '6,496']
+    assert lines[5].split() == ['NEAR', 'BAY', '$259,212.31', '2,270']
+    assert len(lines) == 6
+
+def test_format_query_results_per_row_timestamps(query_results):
+    """Test that rows with different timestamps each show their own"""
+    query_results[1] = query_results[1][:3] + (datetime(2025, 1, 2, 8, 0, 0),)
+    lines = format_query_results(query_results).split("\n")
+
+    assert "between 2025-01-01 12:30:00 and 2025-01-02 08:00:00" in lines[0]
+    assert lines[4].endswith("2025-01-01 12:30:00")
+    assert lines[5].endswith("2025-01-02 08:00:00")
+
+def test_format_query_results_csv_and_json(query_results):
+    """Test the CSV and JSON outputs"""
+    csv_output = format_query_results(query_results, 'csv')
+    assert csv_output.splitlines() == [
+        'category,average_value,record_count,processed_at',
+        'INLAND,124805.39,6496,2025-01-01 12:30:00',
+        'NEAR BAY,259212.31,2270,2025-01-01 12:30:00',
+    ]
+
+    records = json.loads(format_query_results(query_results, 'json'))
+    assert records[1] == {
+        'category': 'NEAR BAY',
+        'average_value': 259212.31,
+        'record_count': 2270,
+        'processed_at': '2025-01-01 12:30:00'
+    }
+
+@pytest.mark.parametrize('output_format', ['table', 'csv', 'json'])
+def test_format_query_results_accepts_summary_table(query_results, output_format):
+    """Test that a columnar table renders like the equivalent query rows"""
+    table = SummaryTable.from_query_results(query_results)
+
+    assert format_query_results(table, output_format) == format_query_results(
+        [(category, float(value), count, processed_at) for category, value, count, processed_at in query_results],
+        output_format
+    )
+
+def test_format_query_results_empty():
+    """Test formatting of empty results"""
+    assert format_query_results([]) == "No results found."
+    assert json.loads(format_query_results([], 'json')) == []
+
+def test_format_query_results_invalid_format(query_results):
+    """Test that unknown formats are rejected"""
+    with pytest.raises(ValueError):
+        format_query_results(query_results, 'xml')
+
+def test_write_query_results_writes_in_batches(monkeypatch):
+    """Test that large results are written in several chunks"""
+    monkeypatch.setattr(utils, 'FORMAT_BATCH_SIZE', 10)
+    results = [(f"CELL-{i}", Decimal(i), i, PROCESSED_AT) for i in range(25)]
+    chunks = list(utils.iter_query_results(results, 'json'))
+
+    stream = io.StringIO()
+    write_query_results(results, stream, 'json')
+
+    assert len(chunks) == 5
+    assert stream.getvalue() == "".join(chunks)
+    assert len(json.loads(stream.getvalue())) == 25